@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Autograph, Tag
+from django.http import StreamingHttpResponse
+from .models import Autograph, Job, Tag
+from .transfer import export_lines
 from .models import SiteSetting
 
 @admin.register(Tag)
@@ -8,17 +10,32 @@ class TagAdmin(admin.ModelAdmin):
 
 @admin.register(Autograph)
 class AutographAdmin(admin.ModelAdmin):
-    list_display = ["id", "name", "price", "created_at"]
-    list_filter = ["created_at", "tags"]
+    list_display = ["id", "name", "price", "image_status", "created_at"]
+    list_filter = ["created_at", "image_status", "tags"]
     search_fields = ["id", "name", "description", "tags__name"]  # <-- add
     filter_horizontal = ["tags"]
     ordering = ["-created_at"]
 
     # optional: control layout on the edit form
-    fields = ("id", "name", "description", "image", "price", "tags", "created_at")
-    readonly_fields = ("id", "created_at")
+    fields = ("id", "name", "description", "image", "image_status", "price", "tags", "created_at")
+    readonly_fields = ("id", "image_status", "created_at")
+    actions = ["export_csv"]
+
+    @admin.action(description="Export selected autographs as CSV")
+    def export_csv(self, request, queryset):
+        # streamed row by row, so exporting the whole catalog is fine
+        response = StreamingHttpResponse(export_lines(queryset, "csv"), content_type="text/csv")
+        response["Content-Disposition"] = 'attachment; filename="autographs.csv"'
+        return response
 
 
 @admin.register(SiteSetting)
 class SiteSettingAdmin(admin.ModelAdmin):
     list_display = ("id", "shipping_cost_display", "updated_at")
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "status", "attempts", "run_after", "updated_at")
+    list_filter = ("status", "name")
+    readonly_fields = ("created_at", "updated_at")
@@ -1,6 +1,23 @@
+import logging
+
 from django.apps import AppConfig
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
 
 
 class AutographsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'autographs'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        if settings.WARM_ON_STARTUP:
+            from .warmup import warm_process
+
+            try:
+                warm_process()
+            except Exception:
+                # a cold start is slower, not broken
+                logger.exception("Start-up warming failed")
@@ -0,0 +1,66 @@
+"""
+Async versions of the catalog views, routed instead of ``views.home``,
+``views.results`` and ``views.autograph_detail`` when ``ASYNC_VIEWS`` is on
+(run under ASGI, see ``config/asgi.py``).
+
+Queries go through the async ORM, RapidFuzz ranking runs in a worker thread
+and template rendering (storage URLs included) in the request's sync thread,
+so the event loop stays free for other requests.
+"""
+from asgiref.sync import sync_to_async
+from django.shortcuts import aget_object_or_404
+from django.views.decorators.vary import vary_on_headers
+
+from .conditional import async_catalog_condition
+from .middleware import public_route
+from .models import Autograph, SiteSetting
+from .routers import replica_reads
+from .search import get_backend as get_search_backend
+from .taxonomy import request_tags
+from .views import (
+    catalog_cache,
+    catalog_context,
+    catalog_params,
+    home_paginator,
+    render_catalog,
+    render_detail,
+    results_paginator,
+    results_tags,
+)
+
+
+@public_route
+@vary_on_headers("HX-Request")
+@catalog_cache
+@async_catalog_condition
+@replica_reads
+async def home(request):
+    q, tag_ids, sort, cursor = catalog_params(request)
+    page_obj = await home_paginator(q, tag_ids, sort).aget_page(cursor)
+    all_tags = await sync_to_async(request_tags)(request)
+    context = catalog_context(page_obj, q, tag_ids, sort, all_tags)
+    return await sync_to_async(render_catalog)(request, context)
+
+
+@public_route
+@vary_on_headers("HX-Request")
+@catalog_cache
+@async_catalog_condition
+@replica_reads
+async def results(request):
+    q, tag_ids, sort, cursor = catalog_params(request)
+    matches = await get_search_backend().asearch(q.casefold(), tag_ids) if q else None
+    page_obj = await results_paginator(matches, q, tag_ids, sort).aget_page(cursor)
+    all_tags = await sync_to_async(results_tags)(request, q)
+    context = catalog_context(page_obj, q, tag_ids, sort, all_tags)
+    return await sync_to_async(render_catalog)(request, context)
+
+
+@public_route
+@catalog_cache
+@async_catalog_condition
+@replica_reads
+async def autograph_detail(request, pk):
+    autograph = await aget_object_or_404(Autograph.objects.prefetch_related("tags"), pk=pk)
+    site_settings = await sync_to_async(SiteSetting.get)()
+    return await sync_to_async(render_detail)(request, autograph, site_settings)
@@ -0,0 +1,378 @@
+"""
+Catalog benchmark helpers shared by ``autographs.tests`` (query budgets),
+``manage.py bench_catalog`` (latency percentiles), ``manage.py
+bench_asgi`` (WSGI vs ASGI throughput), ``manage.py bench_fast_path``
+(full middleware stack vs the public fast path) and ``manage.py
+bench_media_urls`` (S3/Spaces image URL cost).
+"""
+import asyncio
+import contextlib
+import json
+import random
+import re
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from decimal import Decimal
+from types import ModuleType
+from urllib.parse import urlencode
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection
+from django.test import AsyncRequestFactory, RequestFactory
+from django.test.utils import (
+    CaptureQueriesContext,
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from django.urls import include, path
+from faker import Faker
+
+from . import renditions
+from .models import Autograph, Tag
+from .urls import build_urlpatterns
+
+TAG_NAMES = [
+    "Actors", "Athletes", "Boxing", "Comedy", "Directors", "Football",
+    "Gaming", "Movies", "Music", "Musicians", "Politics", "Rock",
+    "Science", "Sports", "Television", "Wrestling",
+]
+
+SENTINEL_RE = re.compile(r'hx-get="([^"]+)"')
+
+
+@contextlib.contextmanager
+def throwaway_database():
+    """
+    Run the block against Django's test databases, created for it and
+    destroyed afterwards, so a benchmark never touches the real ones.
+    """
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity=0)
+        teardown_test_environment()
+
+
+def seed(count: int, seed_value: int = 1234, batch_size: int = 2000) -> list[Autograph]:
+    """
+    Insert ``count`` autographs with 0-3 tags each using Faker names.
+
+    Bulk inserts skip ``save()`` and model signals, so ``tag_ids`` and the
+    search fields are filled in here and no renditions or jobs are created;
+    cards fall back to the (non-existent) original image URL, which is fine
+    for timing the views.
+    """
+    fake = Faker()
+    Faker.seed(seed_value)
+    rng = random.Random(seed_value)
+
+    tags = [Tag.objects.get_or_create(name=name)[0] for name in TAG_NAMES]
+    through = Autograph.tags.through
+
+    created = []
+    for start in range(0, count, batch_size):
+        batch = [
+            Autograph(
+                name=fake.name()[:50],
+                description=fake.sentence(),
+                image=f"autographs/bench-{start + i}.jpg",
+                price=Decimal(rng.randint(500, 50000)) / 100,
+                tag_ids=sorted(tag.pk for tag in rng.sample(tags, rng.randint(0, 3))),
+            )
+            for i in range(min(batch_size, count - start))
+        ]
+        for autograph in batch:
+            autograph.set_search_fields()
+        Autograph.objects.bulk_create(batch, batch_size=batch_size)
+        links = [
+            through(autograph_id=autograph.pk, tag_id=tag_id)
+            for autograph in batch
+            for tag_id in autograph.tag_ids
+        ]
+        through.objects.bulk_create(links, batch_size=batch_size)
+        created.extend(batch)
+    return created
+
+
+@dataclass
+class Scenario:
+    name: str
+    url: str
+    # maximum queries for a warm request (caches and search index populated)
+    budget: int
+    htmx: bool = False
+    # follow this many infinite-scroll pages before measuring
+    depth: int = 0
+
+
+def scenarios(sample: Autograph, tag: Tag) -> list[Scenario]:
+    last_name = urlencode({"q": sample.name.split()[-1]})
+    full_name = urlencode({"q": sample.name})
+    return [
+        Scenario("home", "/", budget=2),
+        Scenario("home_price_asc", "/?sort=price_asc", budget=2),
+        Scenario("home_tag", f"/?tags={tag.pk}", budget=2),
+        Scenario("home_fragment", "/", budget=2, htmx=True),
+        Scenario("home_deep", "/", budget=2, htmx=True, depth=25),
+        Scenario("home_tag_deep", f"/?tags={tag.pk}&sort=price_desc", budget=2, htmx=True, depth=25),
+        Scenario("results_browse", "/results/", budget=2),
+        Scenario("results_prefix", "/results/?q=jo", budget=2),
+        Scenario("results_name", f"/results/?{last_name}", budget=2),
+        Scenario("results_full_name", f"/results/?{full_name}", budget=2),
+        Scenario("results_tag_sort", f"/results/?q=an&tags={tag.pk}&sort=price_asc", budget=2),
+        Scenario("results_deep", "/results/?q=an", budget=2, htmx=True, depth=10),
+        Scenario("detail", f"/autograph/{sample.pk}/", budget=2),
+        Scenario("suggest", "/api/suggest/?q=jo", budget=0),
+        Scenario("suggest_fragment", "/api/suggest/?q=jo", budget=0, htmx=True),
+    ]
+
+
+def resolve_url(client, scenario: Scenario) -> str:
+    """Follow the infinite-scroll sentinel ``scenario.depth`` times."""
+    url = scenario.url
+    path = url.split("?")[0]
+    for _ in range(scenario.depth):
+        response = client.get(url, HTTP_HX_REQUEST="true")
+        match = SENTINEL_RE.search(response.content.decode())
+        if not match:
+            break
+        url = path + match.group(1).replace("&amp;", "&")
+    return url
+
+
+def request(client, url: str, htmx: bool = False):
+    headers = {"HTTP_HX_REQUEST": "true"} if htmx else {}
+    return client.get(url, **headers)
+
+
+def count_queries(client, url: str, htmx: bool = False) -> tuple[int, list[str]]:
+    with CaptureQueriesContext(connection) as ctx:
+        response = request(client, url, htmx)
+    assert response.status_code == 200, (url, response.status_code)
+    return len(ctx), [q["sql"] for q in ctx.captured_queries]
+
+
+@dataclass
+class Result:
+    scenario: str
+    size: int
+    url: str
+    queries: int
+    budget: int
+    samples: int
+    p50_ms: float
+    p95_ms: float
+    max_ms: float
+    timings_ms: list[float] = field(repr=False, default_factory=list)
+
+
+def measure(client, scenario: Scenario, size: int, repeat: int = 20) -> Result:
+    url = resolve_url(client, scenario)
+    # warm-up request, then the steady state is what gets recorded
+    request(client, url, scenario.htmx)
+    queries, _ = count_queries(client, url, scenario.htmx)
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        request(client, url, scenario.htmx)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return Result(
+        scenario=scenario.name,
+        size=size,
+        url=url,
+        queries=queries,
+        budget=scenario.budget,
+        samples=repeat,
+        p50_ms=round(percentile(timings, 50), 3),
+        p95_ms=round(percentile(timings, 95), 3),
+        max_ms=round(max(timings), 3),
+        timings_ms=[round(t, 3) for t in timings],
+    )
+
+
+def percentile(values: list[float], pct: int) -> float:
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[pct - 1]
+
+
+def write_results(path: str, results: list[Result], meta: dict) -> None:
+    with open(path, "w") as fh:
+        json.dump({"meta": meta, "results": [asdict(r) for r in results]}, fh, indent=2)
+
+
+# -- WSGI vs ASGI throughput -------------------------------------------------
+
+def catalog_urlconf(catalog) -> ModuleType:
+    """A ``ROOT_URLCONF`` serving the catalog from ``views`` or ``async_views``."""
+    module = ModuleType(f"{catalog.__name__}_urls")
+    module.urlpatterns = [path("", include(build_urlpatterns(catalog)))]
+    return module
+
+
+def _headers(htmx: bool) -> dict:
+    return {"HX-Request": "true"} if htmx else {}
+
+
+def wsgi_get(handler: WSGIHandler, url: str, htmx: bool = False) -> int:
+    """One request through the real WSGI handler (signals included)."""
+    environ = RequestFactory().get(url, headers=_headers(htmx)).environ
+    status = []
+    response = handler(environ, lambda s, headers: status.append(s))
+    for _ in response:
+        pass
+    response.close()
+    return int(status[0].split()[0])
+
+
+async def asgi_get(handler: ASGIHandler, url: str, htmx: bool = False) -> int:
+    """One request through the real ASGI handler (signals included)."""
+    scope = AsyncRequestFactory().get(url, headers=_headers(htmx)).scope
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+    finished = asyncio.Event()
+    status = []
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+        elif not message.get("more_body"):
+            finished.set()
+
+    await handler(scope, receive, send)
+    return status[0]
+
+
+@dataclass
+class Throughput:
+    scenario: str
+    size: int
+    mode: str
+    concurrency: int
+    requests: int
+    seconds: float
+    rps: float
+    p50_ms: float
+    p95_ms: float
+
+
+def _throughput(scenario, size, mode, concurrency, seconds, latencies) -> Throughput:
+    return Throughput(
+        scenario=scenario.name,
+        size=size,
+        mode=mode,
+        concurrency=concurrency,
+        requests=len(latencies),
+        seconds=round(seconds, 3),
+        rps=round(len(latencies) / seconds, 1),
+        p50_ms=round(percentile(latencies, 50), 3),
+        p95_ms=round(percentile(latencies, 95), 3),
+    )
+
+
+def wsgi_throughput(url: str, scenario: Scenario, size: int, concurrency: int, total: int, mode: str = "wsgi") -> Throughput:
+    """``total`` requests from ``concurrency`` threads, like a threaded WSGI server."""
+    handler = WSGIHandler()
+    wsgi_get(handler, url, scenario.htmx)
+
+    def worker(count):
+        latencies = []
+        for _ in range(count):
+            start = time.perf_counter()
+            status = wsgi_get(handler, url, scenario.htmx)
+            latencies.append((time.perf_counter() - start) * 1000)
+            assert status == 200, (url, status)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        shares = [total // concurrency + (i < total % concurrency) for i in range(concurrency)]
+        latencies = [ms for chunk in pool.map(worker, shares) for ms in chunk]
+    return _throughput(scenario, size, mode, concurrency, time.perf_counter() - start, latencies)
+
+
+async def asgi_throughput(url: str, scenario: Scenario, size: int, concurrency: int, total: int) -> Throughput:
+    """``total`` requests from ``concurrency`` tasks on one event loop, like an ASGI server."""
+    handler = ASGIHandler()
+    await asgi_get(handler, url, scenario.htmx)
+
+    async def worker(count):
+        latencies = []
+        for _ in range(count):
+            start = time.perf_counter()
+            status = await asgi_get(handler, url, scenario.htmx)
+            latencies.append((time.perf_counter() - start) * 1000)
+            assert status == 200, (url, status)
+        return latencies
+
+    start = time.perf_counter()
+    shares = [total // concurrency + (i < total % concurrency) for i in range(concurrency)]
+    chunks = await asyncio.gather(*(worker(count) for count in shares))
+    latencies = [ms for chunk in chunks for ms in chunk]
+    return _throughput(scenario, size, "asgi", concurrency, time.perf_counter() - start, latencies)
+
+
+# -- S3/Spaces media URLs ----------------------------------------------------
+
+def page_media_names(page: int, cards: int = 9) -> list[str]:
+    """The storage names one grid page asks URLs for: every rendition of each card."""
+    names = []
+    for i in range(cards):
+        source = f"autographs/bench-{page * cards + i}.jpg"
+        for label, width in renditions.RENDITIONS.items():
+            for ext in renditions.FORMATS:
+                names.append(renditions.rendition_name(source, label, width, ext))
+    return names
+
+
+@dataclass
+class UrlCost:
+    storage: str
+    urls_per_page: int
+    # first url() in a new thread, after another thread already made one
+    new_thread_ms: float
+    # pages never seen before vs the same pages again
+    cold_page_us: float
+    warm_page_us: float
+
+
+def media_url_cost(label: str, storage, pages: int = 200) -> UrlCost:
+    names = [page_media_names(page) for page in range(pages)]
+    storage.url("autographs/warm-up.jpg")
+
+    elapsed = []
+    thread = threading.Thread(target=lambda: elapsed.append(_timed(storage.url, "autographs/thread.jpg")))
+    thread.start()
+    thread.join()
+
+    def per_page():
+        start = time.perf_counter()
+        for page in names:
+            for name in page:
+                storage.url(name)
+        return (time.perf_counter() - start) / pages * 1e6
+
+    cold = per_page()
+    warm = per_page()
+    return UrlCost(label, len(names[0]), round(elapsed[0] * 1000, 3), round(cold, 1), round(warm, 1))
+
+
+def _timed(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
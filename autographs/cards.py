@@ -0,0 +1,42 @@
+"""
+Pre-rendered card HTML for the catalog grid.
+
+With ``CARD_HTML`` on, ``Autograph.card_html`` holds ``partials/_card.html``
+rendered for the autograph and ``_autograph_page.html`` emits it as-is.
+It is re-rendered wherever ``updated_at`` moves (save, tag changes, tag
+renames, new renditions). Cards not rendered yet, e.g. after a bulk import,
+fall back to the cached fragment.
+"""
+from django.conf import settings
+from django.template.loader import render_to_string
+
+CARD_TEMPLATE = "partials/_card.html"
+
+
+def render_card(autograph) -> str:
+    """``autograph`` should come with its tags prefetched."""
+    return render_to_string(CARD_TEMPLATE, {"autograph": autograph})
+
+
+def refresh(pks=None, batch_size: int = 500) -> int:
+    """Re-render the cards of ``pks`` (every autograph if None)."""
+    from .models import Autograph
+
+    if not settings.CARD_HTML:
+        return 0
+
+    autographs = Autograph.objects.prefetch_related("tags").defer("card_html", "search_vector")
+    if pks is not None:
+        autographs = autographs.filter(pk__in=list(pks))
+
+    count = 0
+    batch = []
+    for autograph in autographs.iterator(chunk_size=batch_size):
+        autograph.card_html = render_card(autograph)
+        batch.append(autograph)
+        if len(batch) >= batch_size:
+            count += Autograph.objects.bulk_update(batch, ["card_html"])
+            batch = []
+    if batch:
+        count += Autograph.objects.bulk_update(batch, ["card_html"])
+    return count
@@ -0,0 +1,43 @@
+import time
+
+from django.core.cache import cache
+
+VERSION_KEY = "catalog:version"
+CHANGED_KEY = "catalog:changed-at"
+
+
+def _initial() -> int:
+    # Seeded from the clock so a flushed/restarted cache never reuses a
+    # version number that stale entries could still be keyed on.
+    return int(time.time() * 1000)
+
+
+def version() -> int:
+    """
+    Generation number of the catalog, shared by every process through the
+    default cache. Anything derived from autographs or tags can be keyed on
+    it and is implicitly invalidated by ``bump()``.
+    """
+    current = cache.get(VERSION_KEY)
+    if current is None:
+        cache.add(VERSION_KEY, _initial(), timeout=None)
+        current = cache.get(VERSION_KEY, _initial())
+    return current
+
+
+def bump() -> int:
+    """Start a new catalog generation and return its number."""
+    cache.set(CHANGED_KEY, time.time(), timeout=None)
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:
+        # key missing (first edit, eviction or cache restart)
+        new = _initial()
+        cache.set(VERSION_KEY, new, timeout=None)
+        return new
+
+
+def changed_within(seconds: float) -> bool:
+    """Whether the last ``bump()`` was less than ``seconds`` ago."""
+    changed_at = cache.get(CHANGED_KEY)
+    return changed_at is not None and time.time() - changed_at < seconds
@@ -0,0 +1,77 @@
+import hashlib
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+from . import catalog
+from .models import Autograph, SiteSetting, Tag
+from .routers import primary_reads
+
+
+def catalog_contents() -> tuple:
+    """
+    The newest edit and number of autographs (catches deletes), and every
+    tag's id and name: renaming a tag no autograph carries touches no rows,
+    but the tag menu still shows it.
+    """
+    with primary_reads():
+        autographs = Autograph.objects.aggregate(latest=Max("updated_at"), count=Count("id"))
+        tags = list(Tag.objects.order_by("id").values_list("id", "name"))
+    return autographs["latest"], autographs["count"], tags
+
+
+def catalog_state() -> str:
+    """
+    Fingerprint of everything a public page can show: the autographs and
+    tags (``catalog_contents()``) and the site settings. Computed once per
+    catalog version.
+    """
+    key = f"catalog-state:{catalog.version()}"
+    state = cache.get(key)
+    if state is None:
+        with primary_reads():
+            state = "|".join(str(v) for v in (*catalog_contents(), SiteSetting.get().updated_at))
+        cache.set(key, state, timeout=60 * 60 * 24)
+    return state
+
+
+def catalog_etag(request, *args, **kwargs) -> str:
+    """
+    ETag for a catalog page: the catalog fingerprint plus everything about
+    the request that changes the response (path, query, HTMX or not).
+    """
+    query = sorted(request.GET.lists())
+    parts = [
+        settings.RELEASE,
+        catalog_state(),
+        request.path,
+        repr(query),
+        request.headers.get("HX-Request", ""),
+    ]
+    return hashlib.md5("\n".join(parts).encode()).hexdigest()
+
+
+def async_catalog_condition(view):
+    """
+    ``condition(etag_func=catalog_etag)`` for async views. Django's decorator
+    calls the ETag function on the event loop, where the fingerprint's
+    queries aren't allowed.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return await view(request, *args, **kwargs)
+
+        etag = quote_etag(await sync_to_async(catalog_etag)(request, *args, **kwargs))
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = await view(request, *args, **kwargs)
+            response.headers.setdefault("ETag", etag)
+        return response
+
+    return wrapper
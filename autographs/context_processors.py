@@ -1,8 +1,8 @@
-from .models import Tag
+from .taxonomy import request_tags
 
 def header_filters(request):
     return {
-        "all_tags": Tag.objects.order_by("name"),
+        "all_tags": request_tags(request),
         "selected_tag_ids": request.GET.getlist("tags"),
         "q": (request.GET.get("q") or "").strip(),
     }
@@ -0,0 +1,102 @@
+"""
+Tag facet counts for the filter menu: how many of the autographs matching
+the search ``q`` carry each tag.
+
+Tags filter with "any of", so selecting one more tag widens the results;
+the counts therefore depend on ``q`` only, not on the tags already picked,
+and are cached per catalog version and query.
+"""
+import hashlib
+import threading
+
+from django.core.cache import cache
+
+from . import catalog
+from .models import Autograph, Tag
+from .routers import primary_reads
+from .search import get_backend as get_search_backend
+from .warmup import current_snapshot
+
+
+class Bitmaps:
+    """One int bitset of autograph positions per tag."""
+
+    def __init__(self, rows):
+        self.positions: dict[str, int] = {}
+        members: dict[int, bytearray] = {}
+        size = (len(rows) + 7) // 8
+        for position, (pk, tag_ids) in enumerate(rows):
+            self.positions[pk] = position
+            for tag_id in tag_ids:
+                if tag_id not in members:
+                    members[tag_id] = bytearray(size)
+                members[tag_id][position >> 3] |= 1 << (position & 7)
+        # set in bytes, converted once: or-ing ints bit by bit is quadratic
+        self.tags: dict[int, int] = {
+            tag_id: int.from_bytes(bits, "little") for tag_id, bits in members.items()
+        }
+
+    def mask(self, pks) -> int:
+        mask = 0
+        for pk in pks:
+            position = self.positions.get(pk)
+            if position is not None:
+                mask |= 1 << position
+        return mask
+
+    def counts(self, mask: int) -> dict[int, int]:
+        return {tag_id: (bits & mask).bit_count() for tag_id, bits in self.tags.items()}
+
+
+class FacetIndex:
+    """Per-process bitmaps, rebuilt (one query) once per catalog version."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._bitmaps = None
+
+    def bitmaps(self) -> Bitmaps:
+        version = catalog.version()
+        if self._version != version:
+            with self._lock:
+                if self._version != version:
+                    stored = current_snapshot(version)
+                    if stored is not None:
+                        rows = [(row[0], row[4]) for row in stored.autographs()]
+                    else:
+                        with primary_reads():
+                            rows = list(Autograph.objects.values_list("id", "tag_ids"))
+                    self._bitmaps = Bitmaps(rows)
+                    self._version = version
+        return self._bitmaps
+
+
+index = FacetIndex()
+
+
+def tag_counts(q_norm: str) -> dict[int, int]:
+    """Autographs per tag id among the search results for ``q_norm``."""
+    key = f"facets:{catalog.version()}:{hashlib.md5(q_norm.encode()).hexdigest()}"
+    counts = cache.get(key)
+    if counts is None:
+        bitmaps = index.bitmaps()
+        counts = bitmaps.counts(bitmaps.mask(get_search_backend().ids(q_norm)))
+        cache.set(key, counts, timeout=60 * 60 * 24)
+    return counts
+
+
+def faceted_tags(tags, q: str) -> list:
+    """
+    ``tags`` (from ``taxonomy.all_tags()``) with ``autograph_count`` narrowed
+    to the results for ``q``. Without a query the catalog-wide counts stand.
+    """
+    if not q:
+        return tags
+    counts = tag_counts(q.casefold())
+    faceted = []
+    for tag in tags:
+        tag = Tag(pk=tag.pk, name=tag.name)
+        tag.autograph_count = counts.get(tag.pk, 0)
+        faceted.append(tag)
+    return faceted
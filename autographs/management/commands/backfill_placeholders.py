@@ -0,0 +1,62 @@
+import os
+from concurrent.futures import as_completed
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from autographs import cards, catalog, placeholders, renditions
+from autographs.models import Autograph
+from autographs.workers import process_pool
+
+
+def _read(autograph) -> dict:
+    if renditions.is_current(autograph):
+        # the source size is on record, and the card JPEG decodes far
+        # cheaper than the original
+        with autograph.image.storage.open(autograph.renditions["card"]["jpg"], "rb") as fh:
+            fields = placeholders.read(fh)
+        fields.update(image_width=autograph.renditions["width"], image_height=autograph.renditions["height"])
+        return fields
+    with autograph.image.open("rb") as fh:
+        return placeholders.read(fh)
+
+
+def _backfill(pk: str) -> str:
+    autograph = Autograph.objects.get(pk=pk)
+    Autograph.objects.filter(pk=pk).update(**_read(autograph), updated_at=timezone.now())
+    cards.refresh([pk])
+    return pk
+
+
+class Command(BaseCommand):
+    help = "Record image size, dominant colour and inline placeholder for existing autographs."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Redo autographs that already have a placeholder.")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of worker processes.")
+
+    def handle(self, *args, force=False, workers=1, **options):
+        queryset = Autograph.objects.exclude(image="")
+        if not force:
+            queryset = queryset.filter(image_placeholder="")
+        pending = list(queryset.values_list("id", flat=True))
+        if not pending:
+            self.stdout.write("All placeholders are up to date.")
+            return
+
+        done = failed = 0
+        with process_pool(workers) as pool:
+            futures = {pool.submit(_backfill, pk): pk for pk in pending}
+            for future in as_completed(futures):
+                try:
+                    pk = future.result()
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f"{futures[future]}: failed ({exc})")
+                    continue
+                done += 1
+                self.stdout.write(f"{pk}: done")
+
+        if done:
+            catalog.bump()
+        self.stdout.write(self.style.SUCCESS(f"Backfilled placeholders for {done} autograph(s), {failed} failed."))
@@ -0,0 +1,72 @@
+import asyncio
+import json
+import platform
+from dataclasses import asdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.utils import timezone
+
+from autographs import async_views, benchmarks, views
+from autographs.models import Autograph, Tag
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare throughput of the sync catalog views behind the WSGI handler with the async "
+        "views behind the ASGI handler, at the same concurrency, on a seeded test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", type=int, default=10000, help="Catalog size to seed.")
+        parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight (threads / tasks).")
+        parser.add_argument("--requests", type=int, default=400, help="Requests per scenario and mode.")
+        parser.add_argument("--only", default="home,results_name,results_prefix,detail", help="Comma-separated scenario names.")
+        parser.add_argument("--output", default="bench_asgi.json", help="Where to write the JSON results.")
+
+    def handle(self, *args, size, concurrency, requests, only, output, **options):
+        only = {s.strip() for s in only.split(",") if s.strip()}
+        concurrency = max(concurrency, 1)
+
+        results = []
+        with benchmarks.throwaway_database():
+            cache.clear()
+            self.stdout.write(f"Seeding {size} autographs...")
+            benchmarks.seed(size)
+            sample = Autograph.objects.order_by("?").first()
+            tag = Tag.objects.order_by("name").first()
+
+            for scenario in benchmarks.scenarios(sample, tag):
+                if only and scenario.name not in only:
+                    continue
+                url = benchmarks.resolve_url(Client(), scenario)
+
+                with override_settings(ROOT_URLCONF=benchmarks.catalog_urlconf(views)):
+                    wsgi = benchmarks.wsgi_throughput(url, scenario, size, concurrency, requests)
+                with override_settings(ROOT_URLCONF=benchmarks.catalog_urlconf(async_views)):
+                    asgi = asyncio.run(benchmarks.asgi_throughput(url, scenario, size, concurrency, requests))
+
+                for result in (wsgi, asgi):
+                    results.append(result)
+                    self.stdout.write(
+                        f"{scenario.name:<20} {result.mode} c={concurrency} {result.rps:>8.1f} req/s "
+                        f"p50={result.p50_ms:.2f}ms p95={result.p95_ms:.2f}ms"
+                    )
+
+        with open(output, "w") as fh:
+            json.dump({
+                "meta": {
+                    "recorded_at": timezone.now().isoformat(),
+                    "database": connection.vendor,
+                    "search_backend": settings.SEARCH_BACKEND,
+                    "python": platform.python_version(),
+                    "size": size,
+                    "concurrency": concurrency,
+                    "requests": requests,
+                },
+                "results": [asdict(r) for r in results],
+            }, fh, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(results)} results to {output}"))
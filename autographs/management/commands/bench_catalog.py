@@ -0,0 +1,68 @@
+import platform
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.utils import timezone
+
+from autographs import benchmarks
+from autographs.models import Autograph, Tag
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database with 1k/10k/100k autographs and record query counts "
+        "and p50/p95 latency of the catalog views to a JSON file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="1000,10000,100000", help="Comma-separated catalog sizes.")
+        parser.add_argument("--repeat", type=int, default=20, help="Timed requests per scenario.")
+        parser.add_argument("--output", default="bench_results.json", help="Where to write the JSON results.")
+        parser.add_argument("--only", default="", help="Comma-separated scenario names to run.")
+        parser.add_argument(
+            "--check-budgets", action="store_true",
+            help="Exit with an error if any scenario exceeds its query budget.",
+        )
+
+    def handle(self, *args, sizes, repeat, output, only, check_budgets, **options):
+        sizes = [int(s) for s in sizes.split(",") if s.strip()]
+        only = {s.strip() for s in only.split(",") if s.strip()}
+
+        results = []
+        with benchmarks.throwaway_database():
+            for size in sizes:
+                call_command("flush", interactive=False, verbosity=0)
+                cache.clear()
+                self.stdout.write(f"Seeding {size} autographs...")
+                benchmarks.seed(size)
+
+                client = Client()
+                sample = Autograph.objects.order_by("?").first()
+                tag = Tag.objects.order_by("name").first()
+                for scenario in benchmarks.scenarios(sample, tag):
+                    if only and scenario.name not in only:
+                        continue
+                    result = benchmarks.measure(client, scenario, size, repeat=repeat)
+                    results.append(result)
+                    flag = "" if result.queries <= result.budget else "  OVER BUDGET"
+                    self.stdout.write(
+                        f"{size:>7} {scenario.name:<20} queries={result.queries}/{result.budget} "
+                        f"p50={result.p50_ms:.2f}ms p95={result.p95_ms:.2f}ms{flag}"
+                    )
+
+        benchmarks.write_results(output, results, {
+            "recorded_at": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "search_backend": settings.SEARCH_BACKEND,
+            "python": platform.python_version(),
+            "repeat": repeat,
+        })
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(results)} results to {output}"))
+
+        over = [r for r in results if r.queries > r.budget]
+        if check_budgets and over:
+            raise CommandError(", ".join(f"{r.scenario}@{r.size}: {r.queries} > {r.budget}" for r in over))
@@ -0,0 +1,82 @@
+import json
+import platform
+from dataclasses import asdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.utils import timezone
+
+from autographs import benchmarks
+from autographs.models import Autograph, Tag
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare requests per second of the public catalog views through the full middleware "
+        "stack and through the public fast path (PUBLIC_FAST_PATH), on a seeded test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", type=int, default=10000, help="Catalog size to seed.")
+        parser.add_argument("--concurrency", type=int, default=1, help="Threads issuing requests.")
+        parser.add_argument("--requests", type=int, default=1000, help="Requests per scenario, mode and round.")
+        parser.add_argument("--rounds", type=int, default=4, help="Alternating rounds per scenario.")
+        parser.add_argument("--only", default="home,results_name,detail,suggest", help="Comma-separated scenario names.")
+        parser.add_argument("--output", default="bench_fast_path.json", help="Where to write the JSON results.")
+
+    def handle(self, *args, size, concurrency, requests, rounds, only, output, **options):
+        only = {s.strip() for s in only.split(",") if s.strip()}
+        concurrency = max(concurrency, 1)
+
+        results = []
+        with benchmarks.throwaway_database():
+            cache.clear()
+            self.stdout.write(f"Seeding {size} autographs...")
+            benchmarks.seed(size)
+            sample = Autograph.objects.order_by("?").first()
+            tag = Tag.objects.order_by("name").first()
+
+            for scenario in benchmarks.scenarios(sample, tag):
+                if only and scenario.name not in only:
+                    continue
+                url = benchmarks.resolve_url(Client(), scenario)
+
+                # each run builds its own handler, so the middleware is loaded
+                # with the setting in effect; the modes alternate between
+                # rounds and the best round of each is kept
+                best = {}
+                modes = [("full-stack", False), ("fast-path", True)]
+                for round_ in range(rounds):
+                    for mode, enabled in modes[::-1] if round_ % 2 else modes:
+                        with override_settings(PUBLIC_FAST_PATH=enabled):
+                            result = benchmarks.wsgi_throughput(url, scenario, size, concurrency, requests, mode)
+                        if mode not in best or result.rps > best[mode].rps:
+                            best[mode] = result
+                pair = [best[mode] for mode, _ in modes]
+
+                for result in pair:
+                    results.append(result)
+                    self.stdout.write(
+                        f"{scenario.name:<20} {result.mode:<10} {result.rps:>8.1f} req/s "
+                        f"p50={result.p50_ms:.3f}ms p95={result.p95_ms:.3f}ms"
+                    )
+                self.stdout.write(f"{scenario.name:<20} {pair[1].rps / pair[0].rps - 1:+.1%}")
+
+        with open(output, "w") as fh:
+            json.dump({
+                "meta": {
+                    "recorded_at": timezone.now().isoformat(),
+                    "database": connection.vendor,
+                    "search_backend": settings.SEARCH_BACKEND,
+                    "python": platform.python_version(),
+                    "size": size,
+                    "concurrency": concurrency,
+                    "requests": requests,
+                    "rounds": rounds,
+                },
+                "results": [asdict(r) for r in results],
+            }, fh, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(results)} results to {output}"))
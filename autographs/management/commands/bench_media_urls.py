@@ -0,0 +1,64 @@
+import json
+import platform
+from dataclasses import asdict
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from storages.backends.s3 import S3Storage
+
+from autographs import benchmarks
+from autographs.storage import SpacesStorage
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the cost of image URLs per grid page between stock S3Storage and SpacesStorage "
+        "(with and without a CDN domain), against a local S3 stand-in endpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--endpoint", default="http://127.0.0.1:9000",
+            help="S3-compatible endpoint, e.g. a local MinIO; URL generation never contacts it.",
+        )
+        parser.add_argument("--pages", type=int, default=200, help="Distinct grid pages to generate URLs for.")
+        parser.add_argument("--output", default="bench_media_urls.json", help="Where to write the JSON results.")
+
+    def handle(self, *args, endpoint, pages, output, **options):
+        # as configured in settings for DO_SPACES_BUCKET
+        spaces = {
+            "access_key": "bench",
+            "secret_key": "bench",
+            "bucket_name": "bench",
+            "region_name": "us-east-1",
+            "endpoint_url": endpoint,
+            "default_acl": "public-read",
+            "querystring_auth": False,
+            "file_overwrite": False,
+        }
+        storages = [
+            ("S3Storage", S3Storage(**spaces)),
+            ("SpacesStorage", SpacesStorage(**spaces)),
+            ("SpacesStorage+cdn", SpacesStorage(**spaces, custom_domain="cdn.example.com")),
+        ]
+
+        results = []
+        for label, storage in storages:
+            result = benchmarks.media_url_cost(label, storage, pages)
+            results.append(result)
+            self.stdout.write(
+                f"{label:<18} {result.urls_per_page} urls/page  new thread {result.new_thread_ms:>7.2f}ms  "
+                f"cold {result.cold_page_us:>8.1f}us/page  warm {result.warm_page_us:>8.1f}us/page"
+            )
+
+        with open(output, "w") as fh:
+            json.dump({
+                "meta": {
+                    "recorded_at": timezone.now().isoformat(),
+                    "python": platform.python_version(),
+                    "endpoint": endpoint,
+                    "pages": pages,
+                },
+                "results": [asdict(r) for r in results],
+            }, fh, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(results)} results to {output}"))
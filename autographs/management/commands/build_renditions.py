@@ -0,0 +1,54 @@
+import os
+from concurrent.futures import as_completed
+
+from django.core.management.base import BaseCommand
+
+from autographs import catalog, renditions
+from autographs.models import Autograph
+from autographs.workers import process_pool
+
+
+def _build(pk: str, force: bool) -> tuple[str, bool]:
+    autograph = Autograph.objects.get(pk=pk)
+    try:
+        changed = renditions.refresh(autograph, force=force)
+    except Exception:
+        Autograph.objects.filter(pk=pk).update(image_status=Autograph.ImageStatus.FAILED)
+        raise
+    Autograph.objects.filter(pk=pk).update(image_status=Autograph.ImageStatus.READY)
+    return pk, changed
+
+
+class Command(BaseCommand):
+    help = "Generate missing or outdated image renditions for existing autographs."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Rebuild renditions that are already current.")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of worker processes.")
+
+    def handle(self, *args, force=False, workers=1, **options):
+        pending = [
+            autograph.pk
+            for autograph in Autograph.objects.exclude(image="").only("id", "image", "renditions", "image_status")
+            if force or not renditions.is_current(autograph) or autograph.image_status != Autograph.ImageStatus.READY
+        ]
+        if not pending:
+            self.stdout.write("All renditions are up to date.")
+            return
+
+        built = failed = 0
+        with process_pool(workers) as pool:
+            futures = {pool.submit(_build, pk, force): pk for pk in pending}
+            for future in as_completed(futures):
+                try:
+                    pk, changed = future.result()
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f"{futures[future]}: failed ({exc})")
+                    continue
+                built += changed
+                self.stdout.write(f"{pk}: {'built' if changed else 'skipped'}")
+
+        if built:
+            catalog.bump()
+        self.stdout.write(self.style.SUCCESS(f"Built renditions for {built} autograph(s), {failed} failed."))
@@ -0,0 +1,36 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from autographs.static_catalog import build
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the public catalog (detail pages, the first home pages of every sort, contact, "
+        "newsletter) into a directory for a CDN to serve. Only pages whose autographs, tags or "
+        "templates changed since the last build are rendered again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output", default=settings.STATIC_CATALOG_DIR,
+            help="Directory to build into (default: STATIC_CATALOG_DIR).",
+        )
+        parser.add_argument("--pages", type=int, default=5, help="Home pages per sort, the first one included.")
+        parser.add_argument(
+            "--workers", type=int, default=min(os.cpu_count() or 1, 4),
+            help="Rendering processes; 1 renders in this one.",
+        )
+        parser.add_argument("--full", action="store_true", help="Ignore the manifest and render everything.")
+
+    def handle(self, *args, output, pages, workers, full, **options):
+        start = time.perf_counter()
+        result = build(output, pages=max(pages, 1), workers=max(workers, 1), full=full)
+        self.stdout.write(
+            f"Rendered {result.rendered} of {result.units} page group(s): "
+            f"{len(result.written)} file(s) written, {len(result.removed)} removed"
+        )
+        self.stdout.write(self.style.SUCCESS(f"Built {output} in {time.perf_counter() - start:.1f}s"))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from autographs import transfer
+from autographs.models import Autograph
+
+
+class Command(BaseCommand):
+    help = "Write every autograph as CSV or JSON Lines, streamed so memory use stays flat."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", "-o", default="-", help='File to write, or "-" for stdout (default).')
+        parser.add_argument("--format", choices=transfer.FORMATS, help="Defaults to the file extension, else csv.")
+
+    def handle(self, *args, output="-", format=None, **options):
+        fmt = transfer.detect_format(output, format)
+        lines = transfer.export_lines(Autograph.objects.all(), fmt)
+
+        if output == "-":
+            for line in lines:
+                self.stdout.write(line, ending="")
+            return
+
+        with open(output, "w", encoding="utf-8", newline="") as fh:
+            fh.writelines(lines)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {output}."))
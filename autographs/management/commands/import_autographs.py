@@ -0,0 +1,45 @@
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from autographs import transfer
+
+
+class Command(BaseCommand):
+    help = "Load autographs from a CSV or JSON Lines file (see autographs.transfer for the columns)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help='File to read, or "-" for stdin.')
+        parser.add_argument("--format", choices=transfer.FORMATS, help="Defaults to the file extension, else csv.")
+        parser.add_argument("--images", help="Directory holding the files named in the image column; they are uploaded to storage.")
+        parser.add_argument("--batch-size", type=int, default=500, help="Rows per bulk insert.")
+        parser.add_argument("--workers", type=int, default=8, help="Threads uploading images.")
+
+    def handle(self, *args, path, format=None, images=None, batch_size=500, workers=8, **options):
+        if images and not os.path.isdir(images):
+            raise CommandError(f"{images} is not a directory")
+
+        fmt = transfer.detect_format(path, format)
+        importer = transfer.Importer(
+            images_dir=images,
+            batch_size=max(batch_size, 1),
+            workers=workers,
+            log=self.stdout.write,
+        )
+
+        if path == "-":
+            result = importer.run(transfer.read_records(sys.stdin, fmt))
+        else:
+            try:
+                fh = open(path, encoding="utf-8-sig", newline="")
+            except OSError as exc:
+                raise CommandError(exc)
+            with fh:
+                result = importer.run(transfer.read_records(fh, fmt))
+
+        for error in result.errors:
+            self.stderr.write(error)
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result.created} autograph(s), skipped {result.skipped} existing, {len(result.errors)} error(s)."
+        ))
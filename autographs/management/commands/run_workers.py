@@ -0,0 +1,62 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from autographs import tasks
+from autographs.workers import process_pool
+
+
+def _run(pk: int) -> str:
+    try:
+        return tasks.run(pk)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Process queued background jobs (image renditions etc.) with a pool of worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of worker processes.")
+        parser.add_argument("--poll", type=float, default=2.0, help="Seconds to sleep when the queue is empty.")
+        parser.add_argument("--once", action="store_true", help="Exit once no jobs are due instead of polling.")
+        parser.add_argument(
+            "--stale-after", type=int, default=600,
+            help="Requeue jobs that have been running for this many seconds (crashed worker).",
+        )
+
+    def handle(self, *args, workers=1, poll=2.0, once=False, stale_after=600, **options):
+        workers = max(workers, 1)
+        requeued = tasks.requeue_stale(timedelta(seconds=stale_after))
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale job(s).")
+
+        running = {}
+        with process_pool(workers) as pool:
+            try:
+                while True:
+                    free = workers - len(running)
+                    if free > 0:
+                        for pk in tasks.claim(free):
+                            running[pool.submit(_run, pk)] = pk
+
+                    if not running:
+                        if once:
+                            break
+                        time.sleep(poll)
+                        continue
+
+                    done, _ = wait(running, timeout=poll, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        pk = running.pop(future)
+                        try:
+                            self.stdout.write(f"Job {pk}: {future.result()}")
+                        except Exception as exc:
+                            # the worker process itself died; requeue_stale picks it up
+                            self.stderr.write(f"Job {pk}: crashed ({exc})")
+            except KeyboardInterrupt:
+                self.stdout.write("Stopping; waiting for running jobs to finish.")
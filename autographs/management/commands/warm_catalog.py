@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from autographs.cards import refresh as refresh_cards
+from autographs.warmup import warm_pages, write_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Warm the shared cache and write the catalog snapshot web processes "
+        "build their indexes from. Run after each deploy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--snapshot", default=settings.CATALOG_SNAPSHOT,
+            help="Where to write the snapshot (default: CATALOG_SNAPSHOT); empty to skip it.",
+        )
+        parser.add_argument("--no-pages", action="store_true", help="Don't pre-render the catalog pages.")
+        parser.add_argument(
+            "--cards", action="store_true",
+            help="Re-render every stored card (CARD_HTML), e.g. after partials/_card.html changed.",
+        )
+
+    def handle(self, *args, snapshot="", no_pages=False, cards=False, **options):
+        if cards:
+            self.stdout.write(f"Rendered {refresh_cards()} card(s)")
+        if snapshot:
+            count = write_snapshot(snapshot)
+            self.stdout.write(f"Wrote {count} autograph(s) to {snapshot}")
+        if not no_pages:
+            for url in warm_pages():
+                self.stdout.write(f"Rendered {url}")
+        self.stdout.write(self.style.SUCCESS("Catalog warmed."))
@@ -0,0 +1,198 @@
+import cProfile
+import json
+import logging
+import random
+import re
+import time
+from contextlib import ExitStack
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware as BaseAuthenticationMiddleware
+from django.contrib.messages.middleware import MessageMiddleware as BaseMessageMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware as BaseSessionMiddleware
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.middleware.csrf import CsrfViewMiddleware as BaseCsrfViewMiddleware
+from django.urls import Resolver404, resolve
+from django_otp.middleware import OTPMiddleware as BaseOTPMiddleware
+
+from . import perf
+
+logger = logging.getLogger("autographs.perf")
+
+
+class PerformanceMiddleware:
+    """
+    With ``PERF_INSTRUMENTATION`` on, records SQL count/time, the named spans
+    from ``autographs.perf.span`` and the total for every request. They are
+    sent back as a ``Server-Timing`` header and logged as one JSON line.
+
+    ``PERF_PROFILE_SAMPLE_RATE`` runs that share of requests under cProfile
+    and keeps the stats for those slower than ``PERF_PROFILE_THRESHOLD_MS``
+    in ``PERF_PROFILE_DIR`` (sync requests only: cProfile sees one thread).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self._is_async = iscoroutinefunction(get_response)
+        if self._is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self._is_async:
+            return self.__acall__(request)
+
+        if not settings.PERF_INSTRUMENTATION:
+            return self.get_response(request)
+
+        profiler = None
+        if random.random() < settings.PERF_PROFILE_SAMPLE_RATE:
+            profiler = cProfile.Profile()
+
+        start = time.perf_counter()
+        with perf.collect() as timings, ExitStack() as stack:
+            self.wrap_connections(stack)
+            if profiler is not None:
+                profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+        total_ms = (time.perf_counter() - start) * 1000
+        self.report(request, response, timings, total_ms)
+
+        if profiler is not None and total_ms >= settings.PERF_PROFILE_THRESHOLD_MS:
+            self.dump_profile(profiler, request, total_ms)
+
+        return response
+
+    async def __acall__(self, request):
+        if not settings.PERF_INSTRUMENTATION:
+            return await self.get_response(request)
+
+        start = time.perf_counter()
+        with perf.collect() as timings:
+            # async views query from the request's sync thread, which has its
+            # own connections; the wrappers must be installed there
+            stack = ExitStack()
+            await sync_to_async(self.wrap_connections)(stack)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(stack.close)()
+        total_ms = (time.perf_counter() - start) * 1000
+        self.report(request, response, timings, total_ms)
+        return response
+
+    def wrap_connections(self, stack: ExitStack) -> None:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(perf.sql_wrapper))
+
+    def report(self, request, response, timings, total_ms: float) -> None:
+        response["Server-Timing"] = timings.server_timing(total_ms)
+        logger.info(json.dumps({
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "total_ms": round(total_ms, 2),
+            **timings.as_dict(),
+        }))
+
+    def dump_profile(self, profiler, request, total_ms: float) -> None:
+        directory = Path(settings.PERF_PROFILE_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", request.path).strip("-") or "root"
+        path = directory / f"{time.strftime('%Y%m%d-%H%M%S')}-{slug}-{total_ms:.0f}ms.prof"
+        profiler.dump_stats(path)
+        logger.info(json.dumps({"profile": str(path), "path": request.path, "total_ms": round(total_ms, 2)}))
+
+
+# -- public fast path --------------------------------------------------------
+
+def public_route(view):
+    """
+    Mark ``view`` as public: anonymous GET/HEAD requests for it skip the
+    session, auth, OTP, CSRF and messages middleware (see
+    ``PublicFastPathMiddleware``). Such a view must not use
+    ``request.session``, ``request.user``, messages or ``{% csrf_token %}``.
+    """
+    view.public_route = True
+    return view
+
+
+class PublicFastPathMiddleware:
+    """
+    With ``PUBLIC_FAST_PATH`` on, flags GET/HEAD requests that resolve to a
+    ``public_route`` view, so the middleware below that only matter to the
+    admin and the two-factor pages pass them straight through. Anything else,
+    ``ADMIN_PATH`` and the ``two_factor`` URLs included, gets the full stack.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PUBLIC_FAST_PATH:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self._is_async = iscoroutinefunction(get_response)
+        if self._is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self._is_async:
+            return self.__acall__(request)
+        request.public_route = self.is_public(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        request.public_route = self.is_public(request)
+        return await self.get_response(request)
+
+    def is_public(self, request) -> bool:
+        if request.method not in ("GET", "HEAD"):
+            return False
+        try:
+            match = resolve(request.path_info, getattr(request, "urlconf", None))
+        except Resolver404:
+            return False
+        return getattr(match.func, "public_route", False)
+
+
+class PrivateOnlyMixin:
+    """Passes requests flagged by ``PublicFastPathMiddleware`` straight through."""
+
+    def __call__(self, request):
+        if getattr(request, "public_route", False):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class SessionMiddleware(PrivateOnlyMixin, BaseSessionMiddleware):
+    pass
+
+
+class CsrfViewMiddleware(PrivateOnlyMixin, BaseCsrfViewMiddleware):
+    def process_view(self, request, callback, callback_args, callback_kwargs):
+        # the handler calls this itself, outside __call__
+        if getattr(request, "public_route", False):
+            return None
+        return super().process_view(request, callback, callback_args, callback_kwargs)
+
+
+class AuthenticationMiddleware(PrivateOnlyMixin, BaseAuthenticationMiddleware):
+    pass
+
+
+class MessageMiddleware(PrivateOnlyMixin, BaseMessageMiddleware):
+    pass
+
+
+class OTPMiddleware(PrivateOnlyMixin, BaseOTPMiddleware):
+    pass
@@ -0,0 +1,108 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.contrib.postgres.search import SearchVectorField
+from django.db import migrations
+
+# Everything below is PostgreSQL-only; on other backends the column is simply
+# left NULL and search falls back to the in-memory index.
+
+CREATE_SQL = [
+    # substring/similarity lookups: icontains compiles to UPPER(name) LIKE ...,
+    # the % and <% operators work on the raw column
+    "CREATE INDEX autographs_autograph_name_upper_trgm "
+    "ON autographs_autograph USING gin (UPPER(name) gin_trgm_ops)",
+    "CREATE INDEX autographs_autograph_name_trgm "
+    "ON autographs_autograph USING gin (name gin_trgm_ops)",
+    "CREATE INDEX autographs_autograph_search_vector "
+    "ON autographs_autograph USING gin (search_vector)",
+    """
+    CREATE FUNCTION autographs_autograph_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('simple', coalesce(NEW.name, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce((
+                SELECT string_agg(t.name, ' ')
+                FROM autographs_tag t
+                JOIN autographs_autograph_tags at ON at.tag_id = t.id
+                WHERE at.autograph_id = NEW.id
+            ), '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(NEW.description, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER autographs_autograph_search_vector_update
+    BEFORE INSERT OR UPDATE ON autographs_autograph
+    FOR EACH ROW EXECUTE FUNCTION autographs_autograph_search_vector_update()
+    """,
+    # touching the autograph row re-runs the trigger above
+    """
+    CREATE FUNCTION autographs_autograph_tags_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        UPDATE autographs_autograph SET search_vector = NULL
+        WHERE id = CASE WHEN TG_OP = 'DELETE' THEN OLD.autograph_id ELSE NEW.autograph_id END;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER autographs_autograph_tags_search_vector_update
+    AFTER INSERT OR DELETE ON autographs_autograph_tags
+    FOR EACH ROW EXECUTE FUNCTION autographs_autograph_tags_search_vector_update()
+    """,
+    """
+    CREATE FUNCTION autographs_tag_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        UPDATE autographs_autograph SET search_vector = NULL
+        WHERE id IN (SELECT autograph_id FROM autographs_autograph_tags WHERE tag_id = NEW.id);
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER autographs_tag_search_vector_update
+    AFTER UPDATE OF name ON autographs_tag
+    FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+    EXECUTE FUNCTION autographs_tag_search_vector_update()
+    """,
+    # backfill existing rows
+    "UPDATE autographs_autograph SET search_vector = NULL",
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS autographs_tag_search_vector_update ON autographs_tag",
+    "DROP FUNCTION IF EXISTS autographs_tag_search_vector_update()",
+    "DROP TRIGGER IF EXISTS autographs_autograph_tags_search_vector_update ON autographs_autograph_tags",
+    "DROP FUNCTION IF EXISTS autographs_autograph_tags_search_vector_update()",
+    "DROP TRIGGER IF EXISTS autographs_autograph_search_vector_update ON autographs_autograph",
+    "DROP FUNCTION IF EXISTS autographs_autograph_search_vector_update()",
+    "DROP INDEX IF EXISTS autographs_autograph_search_vector",
+    "DROP INDEX IF EXISTS autographs_autograph_name_trgm",
+    "DROP INDEX IF EXISTS autographs_autograph_name_upper_trgm",
+]
+
+
+def run_postgres_sql(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autographs', '0003_autograph_description'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='autograph',
+            name='search_vector',
+            field=SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(run_postgres_sql(CREATE_SQL), run_postgres_sql(DROP_SQL)),
+    ]
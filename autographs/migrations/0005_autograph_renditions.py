@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-18 11:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autographs', '0004_autograph_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='autograph',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.10 on 2026-10-18 11:13
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def mark_ready(apps, schema_editor):
+    # rows whose renditions were already built by build_renditions
+    Autograph = apps.get_model('autographs', 'Autograph')
+    for autograph in Autograph.objects.only('id', 'image', 'renditions').iterator():
+        if autograph.image and autograph.renditions.get('source') == autograph.image.name:
+            Autograph.objects.filter(pk=autograph.pk).update(image_status='ready')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autographs', '0005_autograph_renditions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='autograph',
+            name='image_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending', editable=False, max_length=16),
+        ),
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64)),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=16)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('max_attempts', models.PositiveSmallIntegerField(default=3)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['run_after', 'id'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='autographs__status_bc5807_idx')],
+            },
+        ),
+        migrations.RunPython(mark_ready, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autographs', '0006_job_autograph_image_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='autograph',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.10 on 2026-10-18 11:19
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def fill_tag_ids(apps, schema_editor):
+    Autograph = apps.get_model('autographs', 'Autograph')
+    tags_by_id = defaultdict(list)
+    for autograph_id, tag_id in Autograph.tags.through.objects.values_list('autograph_id', 'tag_id'):
+        tags_by_id[autograph_id].append(tag_id)
+    for autograph_id, tag_ids in tags_by_id.items():
+        Autograph.objects.filter(pk=autograph_id).update(tag_ids=sorted(tag_ids))
+
+
+def run_postgres_sql(sql):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute(sql)
+    return run
+
+
+# `tag_ids @> '[n]'` lookups; jsonb_path_ops is smaller and only serves @>
+CREATE_GIN = (
+    'CREATE INDEX autographs_autograph_tag_ids_gin '
+    'ON autographs_autograph USING gin (tag_ids jsonb_path_ops)'
+)
+DROP_GIN = 'DROP INDEX IF EXISTS autographs_autograph_tag_ids_gin'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autographs', '0007_autograph_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='autograph',
+            name='tag_ids',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.RunPython(fill_tag_ids, migrations.RunPython.noop),
+        migrations.RunPython(run_postgres_sql(CREATE_GIN), run_postgres_sql(DROP_GIN)),
+        migrations.AddIndex(
+            model_name='autograph',
+            index=models.Index(fields=['-created_at', '-id'], name='autograph_newest_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='autograph',
+            index=models.Index(fields=['price', 'name', 'id'], name='autograph_price_asc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='autograph',
+            index=models.Index(fields=['-price', 'name', 'id'], name='autograph_price_desc_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.10 on 2026-10-18 11:38
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def search_fields(name):
+    # autographs.search.search_fields as of this migration, frozen so later
+    # changes to that module can't alter it
+    decomposed = unicodedata.normalize("NFKD", (name or "").casefold())
+    name_norm = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return name_norm, " ".join(TOKEN_RE.findall(name_norm))
+
+
+def fill_name_norm(apps, schema_editor):
+    Autograph = apps.get_model('autographs', 'Autograph')
+    batch = []
+    for autograph in Autograph.objects.only('id', 'name').iterator(chunk_size=2000):
+        autograph.name_norm, autograph.name_tokens = search_fields(autograph.name)
+        batch.append(autograph)
+        if len(batch) >= 2000:
+            Autograph.objects.bulk_update(batch, ['name_norm', 'name_tokens'])
+            batch = []
+    Autograph.objects.bulk_update(batch, ['name_norm', 'name_tokens'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autographs', '0008_autograph_sort_indexes_tag_ids'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='autograph',
+            name='name_norm',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='autograph',
+            name='name_tokens',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(fill_name_norm, migrations.RunPython.noop),
+    ]
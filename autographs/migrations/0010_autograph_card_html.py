@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-18 11:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autographs', '0009_autograph_name_norm'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='autograph',
+            name='card_html',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.10 on 2026-10-18 12:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autographs', '0010_autograph_card_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='autograph',
+            name='image_color',
+            field=models.CharField(blank=True, default='', editable=False, max_length=7),
+        ),
+        migrations.AddField(
+            model_name='autograph',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='autograph',
+            name='image_placeholder',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='autograph',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations
+
+
+def enqueue_pending(apps, schema_editor):
+    # 0006 marked rows with built renditions as ready but queued nothing for
+    # the others, so they stayed pending
+    Autograph = apps.get_model('autographs', 'Autograph')
+    Job = apps.get_model('autographs', 'Job')
+    queued = {
+        job.payload.get('pk')
+        for job in Job.objects.filter(name='build_renditions', status__in=['queued', 'running']).only('payload')
+    }
+    Job.objects.bulk_create([
+        Job(name='build_renditions', payload={'pk': pk})
+        for pk in Autograph.objects.filter(image_status='pending').exclude(image='').values_list('id', flat=True)
+        if pk not in queued
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autographs', '0011_autograph_image_placeholder'),
+    ]
+
+    operations = [
+        migrations.RunPython(enqueue_pending, migrations.RunPython.noop),
+    ]
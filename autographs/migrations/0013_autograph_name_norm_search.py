@@ -0,0 +1,61 @@
+from django.db import migrations
+
+# PostgresBackend matches normalized queries against name_norm (accents
+# stripped) instead of name. PostgreSQL-only, like 0004.
+
+VECTOR_FUNCTION = """
+CREATE OR REPLACE FUNCTION autographs_autograph_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', coalesce({name}, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce((
+            SELECT string_agg(t.name, ' ')
+            FROM autographs_tag t
+            JOIN autographs_autograph_tags at ON at.tag_id = t.id
+            WHERE at.autograph_id = NEW.id
+        ), '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(NEW.description, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql
+"""
+
+FORWARD_SQL = [
+    "CREATE INDEX autographs_autograph_name_norm_trgm "
+    "ON autographs_autograph USING gin (name_norm gin_trgm_ops)",
+    "DROP INDEX IF EXISTS autographs_autograph_name_upper_trgm",
+    "DROP INDEX IF EXISTS autographs_autograph_name_trgm",
+    # rows written without save() (loaddata) may lack name_norm
+    VECTOR_FUNCTION.replace("{name}", "nullif(NEW.name_norm, ''), NEW.name"),
+    "UPDATE autographs_autograph SET search_vector = NULL",
+]
+
+BACKWARD_SQL = [
+    VECTOR_FUNCTION.replace("{name}", "NEW.name"),
+    "UPDATE autographs_autograph SET search_vector = NULL",
+    "CREATE INDEX autographs_autograph_name_upper_trgm "
+    "ON autographs_autograph USING gin (UPPER(name) gin_trgm_ops)",
+    "CREATE INDEX autographs_autograph_name_trgm "
+    "ON autographs_autograph USING gin (name gin_trgm_ops)",
+    "DROP INDEX IF EXISTS autographs_autograph_name_norm_trgm",
+]
+
+
+def run_postgres_sql(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autographs', '0012_enqueue_pending_renditions'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_postgres_sql(FORWARD_SQL), run_postgres_sql(BACKWARD_SQL)),
+    ]
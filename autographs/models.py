@@ -1,6 +1,16 @@
 import secrets
 import string
+from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
+from django.core.cache import cache
 from django.db import models
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.functional import cached_property
+from django.utils.safestring import mark_safe
+
+from .routers import primary_reads
+from .search import search_fields
 
 ALPHABET = string.ascii_letters + string.digits  # a-zA-Z0-9 (62 chars)
 
@@ -19,6 +29,12 @@ class Tag(models.Model):
 
 
 class Autograph(models.Model):
+    class ImageStatus(models.TextChoices):
+        PENDING = "pending", "Pending"
+        PROCESSING = "processing", "Processing"
+        READY = "ready", "Ready"
+        FAILED = "failed", "Failed"
+
     id = models.CharField(
         primary_key=True,
         max_length=11,
@@ -33,14 +49,122 @@ class Autograph(models.Model):
     price = models.DecimalField(max_digits=8, decimal_places=2)
     tags = models.ManyToManyField(Tag, blank=True, related_name="autographs")
     created_at = models.DateTimeField(auto_now_add=True)
+    # also bumped when tags or renditions change; keys the cached card HTML
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # name + tag names + description; maintained by database triggers on
+    # PostgreSQL (migration 0004), unused elsewhere
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    # search.normalize(name) and its space-separated tokens, set by save() so
+    # the in-memory search index loads them instead of re-deriving every row
+    name_norm = models.TextField(blank=True, default="", editable=False)
+    name_tokens = models.TextField(blank=True, default="", editable=False)
+
+    # partials/_card.html rendered for this autograph, see autographs.cards
+    card_html = models.TextField(blank=True, default="", editable=False)
+
+    # sorted ids of `tags`, kept in sync by the m2m signal handlers so tag
+    # filters need no join (GIN-indexed on PostgreSQL, migration 0008)
+    tag_ids = models.JSONField(default=list, blank=True, editable=False)
+
+    # resized WebP/JPEG variants of `image`, see autographs.renditions
+    renditions = models.JSONField(default=dict, blank=True, editable=False)
+    # intrinsic size, dominant colour and inline preview of `image`, set
+    # along with the renditions, see autographs.placeholders
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_color = models.CharField(max_length=7, blank=True, default="", editable=False)
+    image_placeholder = models.TextField(blank=True, default="", editable=False)
+    # renditions are built by `manage.py run_workers`, not in the admin request
+    image_status = models.CharField(
+        max_length=16,
+        choices=ImageStatus.choices,
+        default=ImageStatus.PENDING,
+        editable=False,
+    )
 
     class Meta:
         ordering = ["-created_at"]
+        # one per sort key in autographs.pagination.SORT_KEYS
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="autograph_newest_idx"),
+            models.Index(fields=["price", "name", "id"], name="autograph_price_asc_idx"),
+            models.Index(fields=["-price", "name", "id"], name="autograph_price_desc_idx"),
+        ]
 
     def __str__(self) -> str:
         return self.name
 
+    def get_absolute_url(self) -> str:
+        return self.detail_url
+
+    @cached_property
+    def detail_url(self) -> str:
+        return reverse("detail", args=[self.pk])
+
+    def storage_url(self, name: str) -> str:
+        """``image.storage.url(name)``, memoized on the instance."""
+        urls = self.__dict__.setdefault("_storage_urls", {})
+        if name not in urls:
+            urls[name] = self.image.storage.url(name)
+        return urls[name]
+
+    @property
+    def image_url(self) -> str:
+        return self.storage_url(self.image.name)
+
+    @property
+    def placeholder_style(self) -> str:
+        """Inline CSS painting the preview behind the image while it loads."""
+        if not self.image_color:
+            return ""
+        if not self.image_placeholder:
+            return f"background: {self.image_color}"
+        return f"background: {self.image_color} url({self.image_placeholder}) center / cover no-repeat"
+
+    @property
+    def prerendered_card(self) -> str:
+        """``card_html`` when ``CARD_HTML`` is on and it has been rendered."""
+        return mark_safe(self.card_html) if settings.CARD_HTML and self.card_html else ""
+
+    def set_search_fields(self) -> None:
+        """Fill ``name_norm``/``name_tokens``; bulk inserts must call it."""
+        self.name_norm, self.name_tokens = search_fields(self.name)
+
+    def save(self, *args, **kwargs):
+        self.set_search_fields()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "name" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "name_norm", "name_tokens"}
+        super().save(*args, **kwargs)
+
 
+class Job(models.Model):
+    """A unit of background work, run by `manage.py run_workers`."""
+
+    class Status(models.TextChoices):
+        QUEUED = "queued", "Queued"
+        RUNNING = "running", "Running"
+        DONE = "done", "Done"
+        FAILED = "failed", "Failed"
+
+    name = models.CharField(max_length=64)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["run_after", "id"]
+        indexes = [models.Index(fields=["status", "run_after"])]
+
+    def __str__(self) -> str:
+        return f"{self.name} #{self.pk} ({self.status})"
 
 
 class SiteSetting(models.Model):
@@ -52,6 +176,11 @@ class SiteSetting(models.Model):
 
     updated_at = models.DateTimeField(auto_now=True)
 
+    CACHE_KEY = "site-settings"
+    # the signals drop the entry on save, but only from the cache the saving
+    # process uses; bounds staleness if that cache isn't shared
+    CACHE_TIMEOUT = 300
+
     def save(self, *args, **kwargs):
         # enforce singleton (only one row)
         self.pk = 1
@@ -59,7 +188,13 @@ class SiteSetting(models.Model):
 
     @classmethod
     def get(cls):
-        obj, _ = cls.objects.get_or_create(pk=1)
+        # cached until the next save/delete (see signals) or CACHE_TIMEOUT, so
+        # page views rarely hit (or write) the table
+        obj = cache.get(cls.CACHE_KEY)
+        if obj is None:
+            with primary_reads():
+                obj, _ = cls.objects.get_or_create(pk=1)
+            cache.set(cls.CACHE_KEY, obj, timeout=cls.CACHE_TIMEOUT)
         return obj
 
     def __str__(self):
@@ -0,0 +1,131 @@
+import base64
+import binascii
+import datetime
+import decimal
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+# Keyset orderings for the catalog sorts. Each ends in a unique column so the
+# position after any row is unambiguous.
+SORT_KEYS = {
+    "": ("-created_at", "-id"),
+    "price_asc": ("price", "name", "id"),
+    "price_desc": ("-price", "name", "id"),
+}
+
+
+def _cursor_value(value):
+    # full precision; DjangoJSONEncoder would cut datetimes to milliseconds
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+
+def encode_cursor(data: dict) -> str:
+    raw = json.dumps(data, default=_cursor_value, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict | None:
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+    except (binascii.Error, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+class CursorPage:
+    def __init__(self, object_list, next_cursor: str | None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+
+class CursorPaginator:
+    """
+    Paginates by position instead of page number, so no page ever needs an
+    OFFSET or a COUNT(*).
+
+    With ``keys`` (field names, ``-`` for descending) the queryset is ordered
+    by them and each cursor holds the last row's key values. Without ``keys``
+    the queryset's own ordering is kept and the cursor holds a plain offset;
+    that is only meant for small, capped sets such as ranked search results.
+    """
+
+    def __init__(self, queryset, per_page: int, keys=None):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.keys = tuple(keys) if keys else None
+
+    def get_page(self, cursor: str | None = None) -> CursorPage:
+        window, next_position = self._window(decode_cursor(cursor))
+        return self._page(list(window), next_position)
+
+    async def aget_page(self, cursor: str | None = None) -> CursorPage:
+        """``get_page()`` for async views, fetching through the async ORM."""
+        window, next_position = self._window(decode_cursor(cursor))
+        return self._page([row async for row in window], next_position)
+
+    def _window(self, position):
+        """
+        The (unevaluated) queryset for one page plus one extra row, and a
+        function turning the page's last row into the next cursor's data.
+        """
+        if self.keys:
+            return self._keyset_window(position)
+        return self._offset_window(position)
+
+    def _page(self, rows, next_position) -> CursorPage:
+        next_cursor = None
+        if len(rows) > self.per_page:
+            rows = rows[:self.per_page]
+            next_cursor = encode_cursor(next_position(rows[-1]))
+        return CursorPage(rows, next_cursor)
+
+    def _keyset_window(self, position):
+        fields = [key.lstrip("-") for key in self.keys]
+        qs = self.queryset.order_by(*self.keys)
+
+        values = position.get("k") if position else None
+        if isinstance(values, list) and len(values) == len(fields):
+            try:
+                qs = qs.filter(self._after(values))
+            except (ValidationError, ValueError, TypeError):
+                # tampered cursor: start over rather than error
+                pass
+
+        return qs[:self.per_page + 1], lambda last: {"k": [getattr(last, f) for f in fields]}
+
+    def _after(self, values) -> Q:
+        # (a, b, c) > (x, y, z) with per-column direction:
+        #   a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z)
+        condition = Q()
+        equal = Q()
+        for key, value in zip(self.keys, values):
+            field = key.lstrip("-")
+            lookup = "lt" if key.startswith("-") else "gt"
+            condition |= equal & Q(**{f"{field}__{lookup}": value})
+            equal &= Q(**{field: value})
+        return condition
+
+    def _offset_window(self, position):
+        offset = position.get("o") if position else 0
+        if not isinstance(offset, int) or offset < 0:
+            offset = 0
+
+        return self.queryset[offset:offset + self.per_page + 1], lambda last: {"o": offset + self.per_page}
@@ -0,0 +1,72 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_current = ContextVar("perf_timings", default=None)
+
+
+class Timings:
+    """SQL and named span timings collected for one request."""
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_ms = 0.0
+        self.spans: dict[str, float] = {}
+
+    def add_span(self, name: str, ms: float) -> None:
+        self.spans[name] = self.spans.get(name, 0.0) + ms
+
+    def server_timing(self, total_ms: float) -> str:
+        parts = [f'db;dur={self.sql_ms:.1f};desc="{self.sql_count} queries"']
+        parts += [f"{name};dur={ms:.1f}" for name, ms in self.spans.items()]
+        parts.append(f"total;dur={total_ms:.1f}")
+        return ", ".join(parts)
+
+    def as_dict(self) -> dict:
+        return {
+            "sql_count": self.sql_count,
+            "sql_ms": round(self.sql_ms, 2),
+            "spans": {name: round(ms, 2) for name, ms in self.spans.items()},
+        }
+
+
+def current() -> Timings | None:
+    return _current.get()
+
+
+@contextmanager
+def collect():
+    """Make a fresh ``Timings`` current for the duration of the block."""
+    timings = Timings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def span(name: str):
+    """Time the block as ``name``; free when no request is being instrumented."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add_span(name, (time.perf_counter() - start) * 1000)
+
+
+def sql_wrapper(execute, sql, params, many, context):
+    """``connection.execute_wrapper`` hook counting and timing queries."""
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.sql_count += 1
+        timings.sql_ms += (time.perf_counter() - start) * 1000
@@ -0,0 +1,54 @@
+"""
+What a card shows before its image arrives: the intrinsic size, the
+dominant colour and a tiny blurred preview inlined as a ``data:`` URI
+(``Autograph.image_width``/``image_height``/``image_color``/``image_placeholder``).
+
+``renditions.generate`` fills them from the image it decodes anyway;
+``manage.py backfill_placeholders`` fills them for older rows.
+"""
+import base64
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+# long side of the inline preview; browsers blur it when scaling it up
+PLACEHOLDER_SIZE = 16
+# long side the colour and preview are taken from
+SAMPLE_SIZE = 64
+# EXIF orientations that swap width and height
+TRANSPOSED = {5, 6, 7, 8}
+
+
+def describe(image: Image.Image) -> dict:
+    """``image_color`` and ``image_placeholder`` for a decoded image."""
+    sample = image.convert("RGB")
+    sample.thumbnail((SAMPLE_SIZE, SAMPLE_SIZE), Image.Resampling.BOX)
+
+    # most frequent colour of a small palette, rather than the mean, which
+    # turns a dark signature on white paper into grey
+    palette = sample.quantize(colors=5)
+    _, index = max(palette.getcolors())
+    red, green, blue = palette.getpalette()[index * 3:index * 3 + 3]
+
+    sample.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE), Image.Resampling.LANCZOS)
+    buf = BytesIO()
+    sample.save(buf, "WEBP", quality=40)
+    return {
+        "image_color": f"#{red:02x}{green:02x}{blue:02x}",
+        "image_placeholder": "data:image/webp;base64," + base64.b64encode(buf.getvalue()).decode(),
+    }
+
+
+def read(fh) -> dict:
+    """
+    Every placeholder field for the image in ``fh``. The size comes from the
+    header; JPEGs are then decoded at a fraction of their size (draft mode),
+    other formats in full.
+    """
+    with Image.open(fh) as image:
+        width, height = image.size
+        if image.getexif().get(0x0112) in TRANSPOSED:
+            width, height = height, width
+        image.draft("RGB", (SAMPLE_SIZE, SAMPLE_SIZE))
+        fields = describe(ImageOps.exif_transpose(image))
+    return {"image_width": width, "image_height": height, **fields}
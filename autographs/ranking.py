@@ -0,0 +1,110 @@
+"""
+RapidFuzz scoring for ``search.SearchIndex.rank``, one match tier at a time.
+
+Small candidate sets are scored in the request. Above
+``SEARCH_PARALLEL_THRESHOLD`` candidates the work is spread out: with NumPy
+installed RapidFuzz's multi-threaded ``process.cdist`` scores everything
+in native threads, otherwise the candidates are sharded across a persistent
+process pool. Either way each shard keeps only its own top ``limit``, and
+the shards are merged, so the tiers and the result cap stay exactly as in
+the serial path.
+
+Nothing here imports Django models, so pool workers start cheaply.
+"""
+import atexit
+import heapq
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from rapidfuzz import fuzz, process
+
+try:
+    import numpy
+except ImportError:  # optional: sharded process pool instead of cdist
+    numpy = None
+
+MIN_SCORE = 60
+
+
+def _sort_keys(entries, scored, limit: int, tier: int) -> list[tuple]:
+    """The best ``limit`` of ``(entry index, score)`` pairs as sortable tuples."""
+    keys = []
+    for i, score in scored:
+        pk, name_norm = entries[i]
+        keys.append((tier, -score, len(name_norm), name_norm, pk))
+    return heapq.nsmallest(limit, keys)
+
+
+def rank_shard(q_norm: str, entries: list[tuple], limit: int, tier: int) -> list[tuple]:
+    """
+    Score ``(pk, name_norm)`` entries, all in match tier ``tier``, against
+    ``q_norm`` and return the best ``limit`` sort keys, best first. The last
+    item of each key is the pk.
+    """
+    scored = process.extract(
+        q_norm,
+        [name_norm for _, name_norm in entries],
+        scorer=fuzz.WRatio,
+        score_cutoff=MIN_SCORE,
+        limit=None,
+    )
+    return _sort_keys(entries, ((i, score) for _, score, i in scored), limit, tier)
+
+
+def rank_cdist(q_norm: str, entries: list[tuple], limit: int, tier: int, workers: int) -> list[tuple]:
+    """``rank_shard()`` with the scoring done by ``cdist`` on ``workers`` threads."""
+    scores = process.cdist(
+        [q_norm],
+        [name_norm for _, name_norm in entries],
+        scorer=fuzz.WRatio,
+        score_cutoff=MIN_SCORE,
+        workers=workers,
+    )[0]
+    matched = numpy.flatnonzero(scores)
+    return _sort_keys(entries, zip(matched.tolist(), scores[matched].tolist()), limit, tier)
+
+
+class ShardedRanker:
+    """
+    A process pool kept for the life of the web worker. Started on first use
+    with the ``forkserver`` method, so it never inherits the parent's threads,
+    locks or database connections.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pool = None
+        self._workers = 0
+
+    def pool(self, workers: int) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None or self._workers != workers:
+                self.shutdown()
+                context = multiprocessing.get_context("forkserver")
+                self._pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+                self._workers = workers
+            return self._pool
+
+    def rank(self, q_norm: str, entries: list[tuple], limit: int, tier: int, workers: int) -> list[tuple]:
+        shards = [entries[i::workers] for i in range(workers)]
+        futures = [self.pool(workers).submit(rank_shard, q_norm, shard, limit, tier) for shard in shards]
+        return list(heapq.merge(*(f.result() for f in futures)))[:limit]
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+
+sharded = ShardedRanker()
+atexit.register(sharded.shutdown)
+
+
+def rank(q_norm: str, entries: list[tuple], limit: int, tier: int, threshold: int, workers: int) -> list[tuple]:
+    """Best ``limit`` sort keys for ``entries``, in parallel when there are many."""
+    if workers < 2 or len(entries) < threshold:
+        return rank_shard(q_norm, entries, limit, tier)
+    if numpy is not None:
+        return rank_cdist(q_norm, entries, limit, tier, workers)
+    return sharded.rank(q_norm, entries, limit, tier, workers)
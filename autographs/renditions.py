@@ -0,0 +1,125 @@
+import secrets
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from . import cards, placeholders
+
+# label -> maximum width in pixels. Smaller originals are never upscaled.
+RENDITIONS = {
+    "card": 640,
+    "detail": 1200,
+    "zoom": 2000,
+}
+
+# extension -> (Pillow format, save options)
+FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 6}),
+    "jpg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+RENDITIONS_DIR = "autographs/renditions"
+
+
+def rendition_name(source_name: str, label: str, width: int, ext: str, generation: str = "") -> str:
+    # the whole source name, so jordan.jpg and jordan.png never share files;
+    # ``generation`` keeps a rebuild from overwriting the files still served
+    suffix = f"-{generation}" if generation else ""
+    return f"{RENDITIONS_DIR}/{source_name}/{label}-{width}{suffix}.{ext}"
+
+
+def is_current(autograph) -> bool:
+    return bool(autograph.image) and autograph.renditions.get("source") == autograph.image.name
+
+
+def generate(autograph) -> dict:
+    """
+    Write every rendition of ``autograph.image`` through the image field's
+    storage (filesystem or S3/Spaces) and return the metadata to keep in
+    ``Autograph.renditions``. Also sets the ``placeholders`` fields on
+    ``autograph`` from the decoded image.
+
+    New files get new names; the ones ``autograph.renditions`` points to are
+    left alone, and removed by ``refresh()`` once the row has moved on.
+    """
+    storage = autograph.image.storage
+
+    with autograph.image.open("rb") as fh:
+        with Image.open(fh) as original:
+            image = ImageOps.exif_transpose(original)
+            image = image.convert("RGB")
+
+    autograph.image_width, autograph.image_height = image.size
+    for name, value in placeholders.describe(image).items():
+        setattr(autograph, name, value)
+
+    data = {
+        "source": autograph.image.name,
+        "width": image.width,
+        "height": image.height,
+    }
+    generation = secrets.token_hex(4)
+
+    try:
+        for label, max_width in RENDITIONS.items():
+            resized = image
+            if image.width > max_width:
+                height = round(image.height * max_width / image.width)
+                resized = image.resize((max_width, height), Image.Resampling.LANCZOS)
+
+            variant = {"width": resized.width, "height": resized.height}
+            data[label] = variant
+            for ext, (fmt, options) in FORMATS.items():
+                buf = BytesIO()
+                resized.save(buf, fmt, **options)
+                name = rendition_name(autograph.image.name, label, resized.width, ext, generation)
+                variant[ext] = storage.save(name, ContentFile(buf.getvalue()))
+    except Exception:
+        # nothing points at the files written so far
+        delete_files(storage, data)
+        raise
+
+    return data
+
+
+def delete_files(storage, data: dict) -> None:
+    """Remove the files listed in ``data`` (an ``Autograph.renditions`` value)."""
+    for label in RENDITIONS:
+        variant = data.get(label) or {}
+        for ext in FORMATS:
+            name = variant.get(ext)
+            if name and storage.exists(name):
+                storage.delete(name)
+
+
+def refresh(autograph, force: bool = False) -> bool:
+    """Regenerate renditions when the image changed. Returns True if it did."""
+    if not autograph.image or (is_current(autograph) and not force):
+        return False
+
+    previous = autograph.renditions
+    autograph.renditions = generate(autograph)
+    type(autograph).objects.filter(pk=autograph.pk).update(
+        renditions=autograph.renditions,
+        image_width=autograph.image_width,
+        image_height=autograph.image_height,
+        image_color=autograph.image_color,
+        image_placeholder=autograph.image_placeholder,
+        updated_at=timezone.now(),
+    )
+    cards.refresh([autograph.pk])
+    # only now that the row points at the new files
+    delete_files(autograph.image.storage, previous)
+    return True
+
+
+def srcset(autograph, ext: str) -> str:
+    """All widths in ``ext`` as a srcset value, smallest first."""
+    entries = {}
+    for label in RENDITIONS:
+        variant = autograph.renditions.get(label)
+        if variant and variant.get(ext):
+            entries[variant["width"]] = autograph.storage_url(variant[ext])
+    return ", ".join(f"{url} {width}w" for width, url in sorted(entries.items()))
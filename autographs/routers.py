@@ -0,0 +1,81 @@
+"""
+Read replicas (``DATABASE_REPLICAS``, see settings).
+
+Views wrapped in ``replica_reads`` pick one replica per request and send
+their reads there. Everything else reads and writes the primary: the admin,
+management commands, background jobs, and whatever is computed once per
+catalog version and cached (``primary_reads``).
+
+The ETag of a catalog page comes from the primary, so a body rendered from a
+lagging replica could be stored under the new ETag and revalidated for good.
+For ``REPLICA_LAG_WINDOW`` seconds after each catalog change, views read the
+primary instead.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from . import catalog
+
+_replica = ContextVar("replica", default=None)
+# set by primary_reads(), so views called inside it stay on the primary
+_pinned = ContextVar("pinned", default=False)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return _replica.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def _pick() -> str | None:
+    if _pinned.get() or not settings.REPLICA_READS or not settings.DATABASE_REPLICAS:
+        return None
+    if catalog.changed_within(settings.REPLICA_LAG_WINDOW):
+        return None
+    return random.choice(settings.DATABASE_REPLICAS)
+
+
+def replica_reads(view):
+    """Route the reads of ``view`` (sync or async) to one replica."""
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            token = _replica.set(_pick())
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                _replica.reset(token)
+    else:
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            token = _replica.set(_pick())
+            try:
+                return view(request, *args, **kwargs)
+            finally:
+                _replica.reset(token)
+    return wrapper
+
+
+@contextmanager
+def primary_reads():
+    token, pinned = _replica.set(None), _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(pinned)
+        _replica.reset(token)
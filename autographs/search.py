@@ -0,0 +1,443 @@
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+from functools import lru_cache
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.db.models.functions import Greatest, Length, Lower
+from django.utils.module_loading import import_string
+
+from . import catalog, perf, ranking
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+MIN_QUERY_LENGTH = 2
+MAX_RESULTS = 200
+
+
+def normalize(value: str) -> str:
+    """Casefolded with accents stripped, so "beyonce" finds "Beyoncé"."""
+    decomposed = unicodedata.normalize("NFKD", (value or "").casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def search_fields(name: str) -> tuple[str, str]:
+    """``(name_norm, name_tokens)`` as stored on ``Autograph``."""
+    name_norm = normalize(name)
+    return name_norm, " ".join(TOKEN_RE.findall(name_norm))
+
+
+def trigrams(value: str) -> set[str]:
+    return {value[i:i + 3] for i in range(len(value) - 2)}
+
+
+@lru_cache(maxsize=256)
+def word_re(q_norm: str) -> re.Pattern:
+    return re.compile(rf"\b{re.escape(q_norm)}\b", re.IGNORECASE)
+
+
+def match_tier(q_norm: str, q_re: re.Pattern, name_norm: str, tokens) -> int:
+    if name_norm == q_norm:
+        return 0
+    if q_norm in tokens:
+        return 1
+    if name_norm.startswith(q_norm + " "):
+        return 2
+    if any(t.startswith(q_norm) for t in tokens):
+        return 3
+    if q_re.search(name_norm):
+        return 4
+    if q_norm in name_norm:
+        return 5
+    return 6
+
+
+TIERS = 7
+
+
+class Entry:
+    __slots__ = ("name_norm", "tokens", "tag_ids")
+
+    def __init__(self, name_norm: str, tokens: tuple[str, ...], tag_ids: frozenset[int]):
+        self.name_norm = name_norm
+        self.tokens = tokens
+        self.tag_ids = tag_ids
+
+
+class SearchIndex:
+    """
+    Per-process index of autograph names used by ``results()``.
+
+    Built lazily from the database on first use and then kept in sync by the
+    signal handlers in ``autographs.signals``. Signals only reach the process
+    that made the edit, so the index also remembers the catalog version it
+    reflects and rebuilds once another worker has moved it on.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built = False
+        self._version = None
+        self._clear()
+
+    def _clear(self) -> None:
+        self._entries: dict[str, Entry] = {}
+        self._trigrams: dict[str, set[str]] = defaultdict(set)
+        # postings for the exact-name and token tiers; prefixes of tokens are
+        # found by bisecting the sorted keys, re-sorted after new tokens
+        self._names: dict[str, set[str]] = defaultdict(set)
+        self._tokens: dict[str, set[str]] = defaultdict(set)
+        self._token_keys: list[str] | None = None
+
+    # -- maintenance ---------------------------------------------------------
+
+    def build(self) -> None:
+        from .models import Autograph
+        from .routers import primary_reads
+        from .warmup import current_snapshot
+
+        # read before the rows so a concurrent edit triggers another rebuild
+        version = catalog.version()
+        snapshot = current_snapshot(version)
+        if snapshot is not None:
+            rows = snapshot.autographs()
+        else:
+            with primary_reads():
+                rows = list(Autograph.objects.values_list("id", "name", "name_norm", "name_tokens", "tag_ids"))
+
+        with self._lock:
+            self._clear()
+            for pk, name, name_norm, name_tokens, tag_ids in rows:
+                self._add(pk, name, name_norm, name_tokens, tag_ids)
+            self._built = True
+            self._version = version
+
+    def ensure_built(self) -> None:
+        if not self._built or self._version != catalog.version():
+            with self._lock:
+                if not self._built or self._version != catalog.version():
+                    self.build()
+
+    def advance(self, version: int) -> None:
+        """
+        Record that a local edit, already applied incrementally, produced
+        catalog ``version``. Skipped if other edits happened in between, in
+        which case the next query rebuilds.
+        """
+        with self._lock:
+            if self._built and self._version == version - 1:
+                self._version = version
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._built = False
+            self._clear()
+
+    def update(self, pk: str, name: str, name_norm: str = "", name_tokens: str = "") -> None:
+        if not self._built:
+            return
+        with self._lock:
+            old = self._entries.get(pk)
+            tag_ids = old.tag_ids if old else ()
+            self._remove(pk)
+            self._add(pk, name, name_norm, name_tokens, tag_ids)
+
+    def remove(self, pk: str) -> None:
+        if not self._built:
+            return
+        with self._lock:
+            self._remove(pk)
+
+    def set_tags(self, pk: str, tag_ids) -> None:
+        if not self._built:
+            return
+        with self._lock:
+            entry = self._entries.get(pk)
+            if entry is not None:
+                entry.tag_ids = frozenset(tag_ids)
+
+    def remove_tag(self, tag_id: int) -> None:
+        if not self._built:
+            return
+        with self._lock:
+            for entry in self._entries.values():
+                if tag_id in entry.tag_ids:
+                    entry.tag_ids = entry.tag_ids - {tag_id}
+
+    def _add(self, pk, name, name_norm, name_tokens, tag_ids) -> None:
+        if name and not name_norm:
+            # a row written without Autograph.save(), e.g. by loaddata
+            name_norm, name_tokens = search_fields(name)
+        tokens = tuple(name_tokens.split())
+        self._entries[pk] = Entry(name_norm, tokens, frozenset(tag_ids))
+        for gram in trigrams(name_norm):
+            self._trigrams[gram].add(pk)
+        self._names[name_norm].add(pk)
+        for token in tokens:
+            if token not in self._tokens:
+                self._token_keys = None
+            self._tokens[token].add(pk)
+
+    def _remove(self, pk) -> None:
+        entry = self._entries.pop(pk, None)
+        if entry is None:
+            return
+        for gram in trigrams(entry.name_norm):
+            _discard(self._trigrams, gram, pk)
+        _discard(self._names, entry.name_norm, pk)
+        for token in entry.tokens:
+            if _discard(self._tokens, token, pk):
+                self._token_keys = None
+
+    # -- querying ------------------------------------------------------------
+
+    def candidates(self, q_norm: str, tag_ids=()) -> dict[str, Entry]:
+        """
+        Entries worth scoring for ``q_norm``.
+
+        Mirrors the old ``icontains`` narrowing: if any name contains the first
+        three characters of the query only those are scored, otherwise the
+        whole (tag-filtered) catalog is. Like ``taxonomy.filter_by_tags``,
+        tag ids that aren't numbers match nothing.
+        """
+        from .taxonomy import parse_tag_ids
+
+        self.ensure_built()
+        wanted = set(parse_tag_ids(tag_ids))
+
+        with self._lock:
+            entries = self._entries
+            if tag_ids:
+                entries = {pk: e for pk, e in entries.items() if e.tag_ids & wanted}
+
+            if len(q_norm) >= 3:
+                postings = self._trigrams.get(q_norm[:3], ())
+                narrowed = {pk: entries[pk] for pk in postings if pk in entries}
+                if narrowed:
+                    return narrowed
+
+            return dict(entries)
+
+    def tiers(self, q_norm: str, candidates: dict[str, Entry]) -> list[list[str]]:
+        """
+        ``candidates`` split by ``match_tier()``. For a single-token query
+        tiers 0-3 come from the name and token postings; only what is left
+        is looked at one name at a time.
+        """
+        tiers = [[] for _ in range(TIERS)]
+        q_re = word_re(q_norm)
+        if not TOKEN_RE.fullmatch(q_norm):
+            for pk, entry in candidates.items():
+                # every tier but the last needs q somewhere in the name
+                if q_norm not in entry.name_norm:
+                    tiers[6].append(pk)
+                else:
+                    tiers[match_tier(q_norm, q_re, entry.name_norm, entry.tokens)].append(pk)
+            return tiers
+
+        # "q " can only start a name whose first token is q, so tier 2 is
+        # always empty here: those names are already in tier 1
+        with self._lock:
+            exact = self._names.get(q_norm, set()) & candidates.keys()
+            word = (self._tokens.get(q_norm, set()) & candidates.keys()) - exact
+            prefixed = set()
+            for token in self._tokens_with_prefix(q_norm):
+                prefixed |= self._tokens[token]
+        prefixed = (prefixed & candidates.keys()) - exact - word
+        tiers[0], tiers[1], tiers[3] = list(exact), list(word), list(prefixed)
+
+        matched = exact | word | prefixed
+        for pk, entry in candidates.items():
+            if pk in matched or not entry.name_norm:
+                continue
+            if q_norm not in entry.name_norm:
+                tiers[6].append(pk)
+            else:
+                tiers[4 if q_re.search(entry.name_norm) else 5].append(pk)
+        return tiers
+
+    def _tokens_with_prefix(self, prefix: str):
+        if self._token_keys is None:
+            self._token_keys = sorted(self._tokens)
+        keys = self._token_keys
+        i = bisect_left(keys, prefix)
+        while i < len(keys) and keys[i].startswith(prefix):
+            yield keys[i]
+            i += 1
+
+    def rank(self, q_norm: str, tag_ids=(), limit: int = MAX_RESULTS) -> list[str]:
+        """Return autograph ids matching ``q_norm``, best first."""
+        q_norm = normalize(q_norm)
+        if len(q_norm) < MIN_QUERY_LENGTH:
+            return []
+
+        candidates = self.candidates(q_norm, tag_ids)
+        if not candidates:
+            return []
+
+        # WRatio only orders names within a tier, so tiers past the one that
+        # fills the page are never scored
+        ranked = []
+        for tier, pks in enumerate(self.tiers(q_norm, candidates)):
+            if len(ranked) >= limit:
+                break
+            if pks:
+                ranked += ranking.rank(
+                    q_norm,
+                    [(pk, candidates[pk].name_norm) for pk in pks],
+                    limit - len(ranked),
+                    tier,
+                    threshold=settings.SEARCH_PARALLEL_THRESHOLD,
+                    workers=settings.SEARCH_RANK_WORKERS,
+                )
+        return [pk for *_, pk in ranked]
+
+
+def _discard(postings: dict, key, pk) -> bool:
+    """Remove ``pk`` from ``postings[key]``; True if that emptied the key."""
+    keys = postings.get(key)
+    if keys is None:
+        return False
+    keys.discard(pk)
+    if not keys:
+        del postings[key]
+        return True
+    return False
+
+
+index = SearchIndex()
+
+
+class InMemoryBackend:
+    """RapidFuzz ranking over the per-process ``SearchIndex``."""
+
+    def search(self, q_norm: str, tag_ids=(), limit: int = MAX_RESULTS):
+        with perf.span("rank"):
+            matched_ids = index.rank(q_norm, tag_ids, limit=limit)
+        return self.ordered(matched_ids)
+
+    async def asearch(self, q_norm: str, tag_ids=(), limit: int = MAX_RESULTS):
+        """``search()`` for async views, with the scoring off the event loop."""
+        # a (re)build queries the database, so it runs in the request's sync
+        # thread; RapidFuzz then scores in a worker thread
+        await sync_to_async(index.ensure_built)()
+        with perf.span("rank"):
+            matched_ids = await sync_to_async(index.rank, thread_sensitive=False)(q_norm, tag_ids, limit=limit)
+        return self.ordered(matched_ids)
+
+    def ids(self, q_norm: str, limit: int = MAX_RESULTS) -> list[str]:
+        """The ids ``search()`` would return, without fetching the rows."""
+        return index.rank(q_norm, limit=limit)
+
+    def ordered(self, matched_ids):
+        from .models import Autograph
+
+        if not matched_ids:
+            return Autograph.objects.none()
+
+        order = Case(*[When(id=pk, then=pos) for pos, pk in enumerate(matched_ids)])
+        return Autograph.objects.filter(id__in=matched_ids).order_by(order)
+
+
+class PostgresBackend:
+    """
+    Ranking done entirely in PostgreSQL.
+
+    Candidates come from the ``pg_trgm`` and ``search_vector`` GIN indexes
+    (see migrations 0004 and 0013) and are ordered by the same tiers as the
+    in-memory backend, with trigram similarity and ``ts_rank`` standing in
+    for WRatio. Like that backend it matches ``normalize()``d queries against
+    ``name_norm``, so "beyonce" finds "Beyoncé".
+    """
+
+    ordering = ("search_tier", "-search_score", "-search_rank", Length("name"), Lower("name"))
+
+    def search(self, q_norm: str, tag_ids=(), limit: int = MAX_RESULTS):
+        from .models import Autograph
+        from .taxonomy import filter_by_tags
+
+        q_norm = normalize(q_norm)
+        if len(q_norm) < MIN_QUERY_LENGTH:
+            return Autograph.objects.none()
+
+        matches = self.annotate(Autograph.objects.all(), q_norm)
+        matches = matches.filter(
+            Q(name_norm__contains=q_norm)
+            | Q(name_norm__trigram_similar=q_norm)
+            | Q(name_norm__trigram_word_similar=q_norm)
+            | Q(search_vector=self.tsquery(q_norm))
+        )
+        if tag_ids:
+            matches = filter_by_tags(matches, tag_ids)
+        top = matches.order_by(*self.ordering).values("pk")[:limit]
+
+        # re-annotate on the capped set so callers can still re-sort by price
+        capped = Autograph.objects.filter(pk__in=top).defer("search_vector")
+        return self.annotate(capped, q_norm).order_by(*self.ordering)
+
+    async def asearch(self, q_norm: str, tag_ids=(), limit: int = MAX_RESULTS):
+        # nothing is evaluated until the caller iterates the queryset
+        return self.search(q_norm, tag_ids, limit)
+
+    def ids(self, q_norm: str, limit: int = MAX_RESULTS) -> list[str]:
+        return list(self.search(q_norm, limit=limit).values_list("pk", flat=True))
+
+    def annotate(self, qs, q_norm: str):
+        from django.contrib.postgres.search import SearchRank, TrigramSimilarity, TrigramWordSimilarity
+
+        return qs.annotate(
+            search_tier=self.tier(q_norm),
+            search_score=Greatest(TrigramSimilarity("name_norm", q_norm), TrigramWordSimilarity(q_norm, "name_norm")),
+            search_rank=SearchRank(F("search_vector"), self.tsquery(q_norm)),
+        )
+
+    def tsquery(self, q_norm: str):
+        from django.contrib.postgres.search import SearchQuery
+
+        # prefix-match every token so "mich jor" finds "Michael Jordan"
+        terms = TOKEN_RE.findall(q_norm)
+        if not terms:
+            return SearchQuery(q_norm, config="simple")
+        return SearchQuery(" & ".join(f"{t}:*" for t in terms), config="simple", search_type="raw")
+
+    def tier(self, q_norm: str):
+        # match_tier() in SQL; name_norm is already casefolded
+        escaped = re.escape(q_norm)
+        whens = [When(name_norm=q_norm, then=Value(0))]
+        # tokens are [a-z0-9]+ runs, so only such queries can equal or prefix one
+        if TOKEN_RE.fullmatch(q_norm):
+            whens.append(When(name_norm__regex=rf"(^|[^a-z0-9]){escaped}([^a-z0-9]|$)", then=Value(1)))
+        whens.append(When(name_norm__startswith=q_norm + " ", then=Value(2)))
+        if TOKEN_RE.fullmatch(q_norm):
+            whens.append(When(name_norm__regex=rf"(^|[^a-z0-9]){escaped}", then=Value(3)))
+        whens.append(When(name_norm__regex=rf"\y{escaped}\y", then=Value(4)))
+        whens.append(When(name_norm__contains=q_norm, then=Value(5)))
+        return Case(*whens, default=Value(6), output_field=IntegerField())
+
+
+MEMORY_BACKEND = "autographs.search.InMemoryBackend"
+POSTGRES_BACKEND = "autographs.search.PostgresBackend"
+
+
+@lru_cache(maxsize=None)
+def _load_backend(path: str):
+    return import_string(path)()
+
+
+def get_backend():
+    """
+    The backend named by ``SEARCH_BACKEND``.
+
+    ``"auto"`` (the default) uses PostgreSQL when the default database is
+    PostgreSQL and falls back to the in-memory RapidFuzz backend otherwise,
+    e.g. for SQLite in development.
+    """
+    path = getattr(settings, "SEARCH_BACKEND", "auto")
+    if path == "auto":
+        path = POSTGRES_BACKEND if connection.vendor == "postgresql" else MEMORY_BACKEND
+    return _load_backend(path)
@@ -0,0 +1,146 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import cards, catalog, renditions, tasks
+from .models import Autograph, SiteSetting, Tag
+from .search import index
+
+
+def publish(apply=None) -> None:
+    """
+    Once the edit commits, ``apply`` it to this process's search index and
+    start a new catalog version. Bumping earlier would let a request that
+    lands before the commit cache the old rows under the new version.
+    """
+    def run():
+        if apply is not None:
+            apply()
+        index.advance(catalog.bump())
+
+    transaction.on_commit(run)
+
+
+def touch(pks) -> None:
+    # updated_at keys the cached card fragments, so bump it whenever
+    # something shown on the card (tags, renditions) changes
+    Autograph.objects.filter(pk__in=pks).update(updated_at=timezone.now())
+    cards.refresh(pks)
+
+
+def tags_by_autograph(pks) -> dict:
+    links = Autograph.tags.through.objects.filter(autograph_id__in=pks).values_list("autograph_id", "tag_id")
+    result = {pk: set() for pk in pks}
+    for autograph_id, tag_id in links:
+        result[autograph_id].add(tag_id)
+    return result
+
+
+def sync_tags(pks) -> dict:
+    """Copy the through rows into ``Autograph.tag_ids`` (and touch the cards)."""
+    now = timezone.now()
+    result = tags_by_autograph(pks)
+    for pk, ids in result.items():
+        Autograph.objects.filter(pk=pk).update(tag_ids=sorted(ids), updated_at=now)
+    cards.refresh(result)
+    return result
+
+
+def set_tags(result: dict):
+    """``index.set_tags`` for the result of ``sync_tags``, for ``publish()``."""
+    def apply():
+        for pk, ids in result.items():
+            index.set_tags(pk, ids)
+    return apply
+
+
+@receiver(post_save, sender=Autograph)
+def autograph_saved(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        # a stale instance may have written back an old copy of tag_ids
+        ids = sorted(instance.tags.values_list("id", flat=True))
+        if ids != instance.tag_ids:
+            Autograph.objects.filter(pk=instance.pk).update(tag_ids=ids)
+            instance.tag_ids = ids
+    pk, name, name_norm, name_tokens = instance.pk, instance.name, instance.name_norm, instance.name_tokens
+    publish(lambda: index.update(pk, name, name_norm, name_tokens))
+    if not raw and instance.image and not renditions.is_current(instance):
+        # Pillow work happens in `manage.py run_workers`, not in this request
+        # the placeholder of a replaced image would show the old one
+        stale = {"image_width": None, "image_height": None, "image_color": "", "image_placeholder": ""}
+        Autograph.objects.filter(pk=instance.pk).update(image_status=Autograph.ImageStatus.PENDING, **stale)
+        instance.image_status = Autograph.ImageStatus.PENDING
+        for name, value in stale.items():
+            setattr(instance, name, value)
+        tasks.enqueue("build_renditions", pk=instance.pk)
+    if not raw:
+        cards.refresh([instance.pk])
+
+
+@receiver(post_delete, sender=Autograph)
+def autograph_deleted(sender, instance, **kwargs):
+    pk, storage, data = instance.pk, instance.image.storage, instance.renditions
+    publish(lambda: index.remove(pk))
+    # a rollback keeps the row, so it must keep its files too
+    transaction.on_commit(lambda: renditions.delete_files(storage, data))
+
+
+@receiver(m2m_changed, sender=Autograph.tags.through)
+def autograph_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == "pre_clear":
+        # tag.autographs.clear() doesn't say which autographs it detached
+        instance._cleared_autograph_ids = list(instance.autographs.values_list("pk", flat=True))
+        return
+
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if not reverse:
+        # autograph.tags.add/remove/clear/set
+        result = sync_tags([instance.pk])
+        instance.tag_ids = sorted(result[instance.pk])
+    else:
+        # tag.autographs.add/remove/clear/set
+        pks = pk_set if action != "post_clear" else instance.__dict__.pop("_cleared_autograph_ids", [])
+        result = sync_tags(pks)
+
+    publish(set_tags(result))
+
+
+@receiver(post_save, sender=Tag)
+def tag_saved(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        # a rename changes every card carrying the tag
+        touch(instance.autographs.values_list("pk", flat=True))
+    publish()
+
+
+@receiver(pre_delete, sender=Tag)
+def tag_deleting(sender, instance, **kwargs):
+    instance._deleted_autograph_ids = list(instance.autographs.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Tag)
+def tag_deleted(sender, instance, **kwargs):
+    # the through rows are cascaded without an m2m_changed signal
+    result = sync_tags(instance.__dict__.pop("_deleted_autograph_ids", []))
+    tag_id = instance.pk
+    apply_tags = set_tags(result)
+
+    def apply():
+        apply_tags()
+        index.remove_tag(tag_id)
+
+    publish(apply)
+
+
+@receiver(post_save, sender=SiteSetting)
+@receiver(post_delete, sender=SiteSetting)
+def site_setting_changed(sender, created=False, **kwargs):
+    cache.delete(SiteSetting.CACHE_KEY)
+    if not created:
+        # catalog pages and their ETags show the settings, cached per version;
+        # get() creates the row with the defaults pages already showed
+        publish()
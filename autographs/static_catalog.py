@@ -0,0 +1,207 @@
+"""
+Static export of the public catalog (``manage.py build_static_catalog``).
+
+It writes files a CDN or bucket can serve without Django:
+- every detail page;
+- the first pages of the home grid for each sort, the first one full and
+  the rest as the HTMX fragments infinite scroll asks for;
+- the contact and newsletter pages.
+
+``/autograph/<pk>/`` becomes ``autograph/<pk>/index.html`` and
+``/?<query>`` becomes ``<query>.html``. For example, with nginx::
+
+    location / {
+        try_files $uri$args.html ${uri}index.html @django;
+    }
+
+Search, typeahead and scrolling past the exported pages still go to
+Django.
+
+Builds are incremental. Pages are rendered in groups (``Unit``), and each
+group gets a fingerprint of the rows it shows. ``updated_at`` moves with
+every change to a card, including tags and renditions. The fingerprint
+also covers what every page shares: the tag menu and its counts, the site
+settings, the templates and the release. ``.manifest.json`` in the output
+directory keeps the fingerprints and files of the last build, and only
+groups whose fingerprint changed are rendered again.
+"""
+import hashlib
+import html
+import json
+import os
+import re
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from functools import partial
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.template import engines
+from django.urls import reverse
+
+from .models import Autograph, SiteSetting
+from .pagination import SORT_KEYS
+from .routers import primary_reads
+from .taxonomy import all_tags
+from .warmup import render_page
+from .workers import process_pool
+
+MANIFEST = ".manifest.json"
+# views.home_paginator
+PAGE_SIZE = 9
+
+LOADER_RE = re.compile(r'id="loader".*?hx-get="([^"]+)"', re.S)
+
+
+@dataclass(frozen=True)
+class Unit:
+    """Pages rendered together: ``url``, then ``pages - 1`` scroll fragments."""
+
+    key: str
+    url: str
+    pages: int = 1
+
+
+@dataclass
+class BuildResult:
+    units: int = 0
+    rendered: int = 0
+    written: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+
+
+def output_path(url: str) -> str:
+    path, _, query = url.partition("?")
+    return path.lstrip("/") + (f"{query}.html" if query else "index.html")
+
+
+def _digest(value) -> str:
+    return hashlib.sha256(json.dumps(value, default=str).encode()).hexdigest()
+
+
+def shared_fingerprint() -> str:
+    """What every page shows or is rendered with, beyond its own rows."""
+    templates = []
+    for directory in engines["django"].engine.dirs:
+        for dirpath, _, filenames in sorted(os.walk(directory)):
+            for name in sorted(filenames):
+                with open(os.path.join(dirpath, name), "rb") as fh:
+                    templates.append((os.path.join(dirpath, name), hashlib.sha256(fh.read()).hexdigest()))
+    return _digest([
+        settings.RELEASE,
+        [(tag.pk, tag.name, tag.autograph_count) for tag in all_tags()],
+        SiteSetting.get().updated_at,
+        templates,
+        # fingerprinted asset names, when a manifest storage is in use
+        sorted(getattr(staticfiles_storage, "hashed_files", {}).items()),
+    ])
+
+
+def plan(pages: int) -> dict[Unit, str]:
+    """Every unit of the export with its fingerprint."""
+    shared = shared_fingerprint()
+    units = {}
+    for sort, keys in SORT_KEYS.items():
+        url = reverse("home") + (f"?sort={sort}" if sort else "")
+        # one more row: whether the last page has a sentinel
+        rows = Autograph.objects.order_by(*keys).values_list("id", "updated_at", "tag_ids")[:pages * PAGE_SIZE + 1]
+        units[Unit(f"home:{sort}", url, pages)] = _digest([shared, list(rows)])
+    for name in ("contact", "newsletter"):
+        units[Unit(f"page:{name}", reverse(name))] = shared
+    for pk, updated_at, tag_ids in Autograph.objects.values_list("id", "updated_at", "tag_ids").iterator():
+        units[Unit(f"autograph:{pk}", reverse("detail", args=[pk]))] = _digest([shared, updated_at, tag_ids])
+    return units
+
+
+def _write(root: str, name: str, body: bytes) -> bool:
+    path = os.path.join(root, name)
+    try:
+        with open(path, "rb") as fh:
+            if fh.read() == body:
+                # untouched, so syncing to a bucket skips it
+                return False
+    except FileNotFoundError:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(body)
+    os.replace(tmp, path)
+    return True
+
+
+def render_unit(unit: Unit, root: str) -> tuple[list[str], list[str]]:
+    """Render ``unit`` into ``root``; returns its files and those that changed."""
+    files, written = [], []
+    url, htmx = unit.url, False
+    with primary_reads():
+        for _ in range(unit.pages):
+            body = render_page(url, htmx)
+            name = output_path(url)
+            files.append(name)
+            if _write(root, name, body):
+                written.append(name)
+            match = LOADER_RE.search(body.decode())
+            if match is None:
+                break
+            url, htmx = urljoin(url, html.unescape(match.group(1))), True
+    return files, written
+
+
+def _load_manifest(root: str) -> dict:
+    try:
+        with open(os.path.join(root, MANIFEST)) as fh:
+            return json.load(fh)["units"]
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def _save_manifest(root: str, units: dict) -> None:
+    path = os.path.join(root, MANIFEST)
+    with open(f"{path}.tmp", "w") as fh:
+        json.dump({"units": units}, fh)
+    os.replace(f"{path}.tmp", path)
+
+
+def build(root: str, pages: int = 5, workers: int = 1, full: bool = False) -> BuildResult:
+    """
+    Bring the export in ``root`` up to date, rendering on ``workers``
+    processes; ``full`` renders everything regardless of the manifest.
+    """
+    os.makedirs(root, exist_ok=True)
+    previous = _load_manifest(root)
+    with primary_reads():
+        units = plan(pages)
+
+    stale = [
+        unit for unit, fingerprint in units.items()
+        if full
+        or previous.get(unit.key, {}).get("fingerprint") != fingerprint
+        or not all(os.path.exists(os.path.join(root, name)) for name in previous[unit.key]["files"])
+    ]
+    result = BuildResult(units=len(units))
+    # replaced unit by unit, so a failed build keeps what it didn't get to
+    manifest = {unit.key: previous[unit.key] for unit in units if unit.key in previous}
+
+    try:
+        with ExitStack() as stack:
+            render = partial(render_unit, root=root)
+            if workers > 1 and len(stale) > 1:
+                pool = stack.enter_context(process_pool(workers))
+                rendered = pool.map(render, stale, chunksize=max(1, len(stale) // (workers * 8)))
+            else:
+                rendered = map(render, stale)
+            for unit, (files, written) in zip(stale, rendered):
+                manifest[unit.key] = {"fingerprint": units[unit], "files": files}
+                result.written += written
+                result.rendered += 1
+    finally:
+        # pages of deleted autographs and scroll fragments no longer linked
+        kept = {name for entry in manifest.values() for name in entry["files"]}
+        for entry in previous.values():
+            for name in entry["files"]:
+                if name not in kept and os.path.exists(os.path.join(root, name)):
+                    os.remove(os.path.join(root, name))
+                    result.removed.append(name)
+        _save_manifest(root, manifest)
+    return result
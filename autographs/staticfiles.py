@@ -0,0 +1,174 @@
+"""
+Static asset pipeline: ``collectstatic`` minifies CSS, fingerprints every
+file (``ManifestStaticFilesStorage``) and writes ``.gz``/``.br`` siblings;
+``PrecompressedStaticMiddleware`` serves them when Django itself answers
+``/static/``. A front proxy can serve the same files directly (nginx
+``gzip_static on;`` / ``brotli_static on;``).
+"""
+import gzip
+import mimetypes
+import os
+import re
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.files.base import ContentFile
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip siblings are written without it
+    brotli = None
+
+COMPRESSIBLE = (".css", ".js", ".svg", ".json", ".map", ".txt", ".xml", ".html", ".ico")
+# skip files where the headers would outweigh the saving
+MIN_SIZE = 256
+
+# "styles.0123456789ab.css": names from the manifest never change content
+HASHED_RE = re.compile(r"\.[0-9a-f]{12}\.[^/.]+$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+# strings and comments first so their contents are left alone
+CSS_TOKEN_RE = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|(/\*.*?\*/)|(\s+)', re.S)
+CSS_PUNCTUATION_RE = re.compile(r"\s*([{};,>])\s*")
+
+
+def minify_css(css: str) -> str:
+    """
+    Drop comments and collapse whitespace. Conservative: spaces are only
+    removed around ``{ } ; , >`` so selectors such as ``.a :hover`` and
+    ``calc()`` expressions keep their meaning.
+    """
+    strings = []
+
+    def token(match):
+        string, comment, space = match.groups()
+        if string:
+            strings.append(string)
+            return f"\0{len(strings) - 1}\0"
+        return "" if comment else " "
+
+    css = CSS_TOKEN_RE.sub(token, css)
+    css = CSS_PUNCTUATION_RE.sub(r"\1", css).replace(";}", "}").strip()
+    return re.sub(r"\0(\d+)\0", lambda m: strings[int(m.group(1))], css)
+
+
+def compress(data: bytes) -> dict[str, bytes]:
+    """Precompressed variants of ``data`` worth keeping, by file suffix."""
+    variants = {"gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(data, quality=11)
+    return {ext: body for ext, body in variants.items() if len(body) < len(data)}
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """``ManifestStaticFilesStorage`` that also minifies CSS and precompresses."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            yield from super().post_process(paths, dry_run=dry_run, **options)
+            return
+
+        for name in paths:
+            if name.endswith(".css"):
+                # collectstatic already copied it here; hash the minified copy
+                with self.open(name) as fh:
+                    css = fh.read().decode("utf-8")
+                self.delete(name)
+                self._save(name, ContentFile(minify_css(css).encode("utf-8")))
+                paths[name] = (self, name)
+
+        compressible = []
+        for name, hashed_name, processed in super().post_process(paths, dry_run=dry_run, **options):
+            if not isinstance(processed, Exception) and hashed_name and hashed_name.endswith(COMPRESSIBLE):
+                compressible.append(hashed_name)
+            yield name, hashed_name, processed
+
+        for name in compressible:
+            with self.open(name) as fh:
+                data = fh.read()
+            if len(data) < MIN_SIZE:
+                continue
+            for ext, body in compress(data).items():
+                variant = f"{name}.{ext}"
+                if self.exists(variant):
+                    self.delete(variant)
+                self._save(variant, ContentFile(body))
+
+
+class PrecompressedStaticMiddleware:
+    """
+    With ``SERVE_STATIC`` on, answers ``STATIC_URL`` requests from
+    ``STATIC_ROOT``: the Brotli or gzip sibling when the client accepts it,
+    and far-future immutable caching for fingerprinted names. Everything else
+    passes through.
+    """
+
+    ENCODINGS = (("br", "br"), ("gzip", "gz"))
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.SERVE_STATIC:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL if settings.STATIC_URL.startswith("/") else "/" + settings.STATIC_URL
+        self._is_async = iscoroutinefunction(get_response)
+        if self._is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self._is_async:
+            return self.__acall__(request)
+        response = self.static_response(request)
+        return response if response is not None else self.get_response(request)
+
+    async def __acall__(self, request):
+        response = self.static_response(request)
+        return response if response is not None else await self.get_response(request)
+
+    def static_response(self, request):
+        if request.method in ("GET", "HEAD") and request.path.startswith(self.prefix):
+            return self.serve(request, request.path[len(self.prefix):])
+        return None
+
+    def serve(self, request, name: str):
+        try:
+            path = safe_join(settings.STATIC_ROOT, name)
+        except ValueError:
+            return None
+        if not os.path.isfile(path):
+            return None
+
+        stat = os.stat(path)
+        if_modified_since = parse_http_date_safe(request.headers.get("If-Modified-Since", ""))
+        if if_modified_since is not None and int(stat.st_mtime) <= if_modified_since:
+            response = HttpResponseNotModified()
+        else:
+            response = self.file_response(request, path)
+
+        response["Cache-Control"] = IMMUTABLE if HASHED_RE.search(name) else "public, max-age=3600"
+        response["Last-Modified"] = http_date(stat.st_mtime)
+        patch_vary_headers(response, ("Accept-Encoding",))
+        return response
+
+    def file_response(self, request, path: str):
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        accepted = request.headers.get("Accept-Encoding", "")
+        encoding = None
+        for candidate, ext in self.ENCODINGS:
+            if candidate in accepted and os.path.isfile(f"{path}.{ext}"):
+                path, encoding = f"{path}.{ext}", candidate
+                break
+        response = FileResponse(open(path, "rb"), content_type=content_type)
+        # FileResponse names the open file; assets are used in place, not saved
+        del response["Content-Disposition"]
+        if encoding:
+            response["Content-Encoding"] = encoding
+        return response
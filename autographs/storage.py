@@ -0,0 +1,104 @@
+"""
+Media storage for DigitalOcean Spaces (``DO_SPACES_BUCKET``, see settings).
+
+Every card asks for several image URLs, and stock ``S3Storage.url()``
+builds a boto3 session and resource per thread and runs botocore's URL
+generation per call (about half a millisecond). ``SpacesStorage`` cuts that
+down to string concatenation, and to a dictionary lookup for names already
+seen, for public objects.
+"""
+import threading
+from functools import lru_cache
+from urllib.parse import quote
+
+import botocore
+from botocore.config import Config
+from django.utils.encoding import filepath_to_uri
+from storages.backends.s3 import S3Storage
+from storages.utils import clean_name
+
+PROBE_KEY = "url-prefix-probe"
+_UNKNOWN = object()
+
+
+class SpacesStorage(S3Storage):
+    """
+    ``S3Storage`` with memoized public URLs.
+
+    - With ``custom_domain`` (``DO_SPACES_CDN_DOMAIN``) a URL is the CDN
+      prefix plus the key, and botocore is never involved.
+    - Otherwise one unsigned client per process (boto3 clients are
+      thread-safe) generates one URL, and the others reuse its prefix.
+
+    Either way a URL depends on the name alone, so it is memoized by name,
+    for up to ``url_cache_size`` names. Signed (``querystring_auth``) or
+    parametrized URLs still go through ``S3Storage``.
+    """
+
+    def __init__(self, **settings):
+        super().__init__(**settings)
+        self._setup_urls()
+
+    def get_default_settings(self):
+        return {**super().get_default_settings(), "url_cache_size": 100_000}
+
+    def _setup_urls(self):
+        self._url_client = None
+        self._url_prefix = _UNKNOWN
+        self._url_client_lock = threading.Lock()
+        self._public_url = lru_cache(maxsize=self.url_cache_size)(self._build_public_url)
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        for name in ("_url_client", "_url_client_lock", "_url_prefix", "_public_url"):
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self._setup_urls()
+
+    def url(self, name, parameters=None, expire=None, http_method=None):
+        if parameters or expire is not None or http_method or self.querystring_auth:
+            return super().url(name, parameters, expire, http_method)
+        return self._public_url(name)
+
+    def _build_public_url(self, name: str) -> str:
+        key = self._normalize_name(clean_name(name))
+        if self.custom_domain:
+            return f"{self.url_protocol}//{self.custom_domain}/{filepath_to_uri(key)}"
+        prefix = self.url_prefix()
+        if prefix is not None:
+            # quoted the way botocore quotes keys
+            return prefix + quote(key, safe="/~")
+        return self._generate_url(key)
+
+    def url_prefix(self) -> str | None:
+        """
+        What botocore puts before the key in an unsigned URL (endpoint,
+        bucket and addressing style applied), worked out once per process.
+        """
+        if self._url_prefix is _UNKNOWN:
+            url = self._generate_url(PROBE_KEY)
+            self._url_prefix = url[:-len(PROBE_KEY)] if url.endswith(f"/{PROBE_KEY}") else None
+        return self._url_prefix
+
+    def _generate_url(self, key: str) -> str:
+        return self.url_client().generate_presigned_url(
+            "get_object", Params={"Bucket": self.bucket_name, "Key": key}, ExpiresIn=self.querystring_expire,
+        )
+
+    def url_client(self):
+        """An unsigned S3 client shared by every thread of the process."""
+        if self._url_client is None:
+            with self._url_client_lock:
+                if self._url_client is None:
+                    self._url_client = self._create_session().client(
+                        "s3",
+                        region_name=self.region_name,
+                        use_ssl=self.use_ssl,
+                        endpoint_url=self.endpoint_url,
+                        config=self.client_config.merge(Config(signature_version=botocore.UNSIGNED)),
+                        verify=self.verify,
+                    )
+        return self._url_client
@@ -0,0 +1,108 @@
+import threading
+from bisect import bisect_left
+from typing import NamedTuple
+
+from . import catalog
+from .search import MIN_QUERY_LENGTH, normalize, search_fields
+
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 20
+
+
+class Suggestion(NamedTuple):
+    id: str | int
+    name: str
+
+
+class PrefixTable:
+    """
+    Sorted keys with a parallel list of suggestions; a prefix lookup is a
+    bisect plus a walk over the matching run.
+    """
+
+    def __init__(self, pairs):
+        pairs = sorted(pairs, key=lambda pair: (pair[0], len(pair[1].name), pair[1].name))
+        self.keys = [key for key, _ in pairs]
+        self.values = [value for _, value in pairs]
+
+    def lookup(self, prefix: str, limit: int, seen: set):
+        found = []
+        i = bisect_left(self.keys, prefix)
+        while i < len(self.keys) and len(found) < limit and self.keys[i].startswith(prefix):
+            value = self.values[i]
+            if value.id not in seen:
+                seen.add(value.id)
+                found.append(value)
+            i += 1
+        return found
+
+
+class Snapshot:
+    """Autograph and tag names of one catalog version, ready for prefix lookups."""
+
+    def __init__(self, autographs, tags):
+        names = []
+        words = []
+        for pk, name, name_norm, name_tokens in autographs:
+            suggestion = Suggestion(pk, name)
+            if name and not name_norm:
+                name_norm, name_tokens = search_fields(name)
+            names.append((name_norm, suggestion))
+            # "jord" should find "Michael Jordan" after the full-name matches
+            words += [(token, suggestion) for token in name_tokens.split()[1:]]
+        self.names = PrefixTable(names)
+        self.words = PrefixTable(words)
+        self.tags = PrefixTable((normalize(name), Suggestion(pk, name)) for pk, name in tags)
+
+    def suggest(self, q_norm: str, limit: int) -> dict:
+        seen = set()
+        autographs = self.names.lookup(q_norm, limit, seen)
+        if len(autographs) < limit:
+            autographs += self.words.lookup(q_norm, limit - len(autographs), seen)
+        return {
+            "autographs": autographs,
+            "tags": self.tags.lookup(q_norm, limit, set()),
+        }
+
+
+class SuggestIndex:
+    """
+    Per-process typeahead index for ``/api/suggest/``.
+
+    Unlike ``search.SearchIndex`` it is not edited in place: a new snapshot is
+    built (two queries, or none from a current ``warmup`` snapshot file) the
+    first time it is used in a new catalog version.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._snapshot = None
+
+    def snapshot(self) -> Snapshot:
+        from .models import Autograph, Tag
+        from .warmup import current_snapshot
+
+        version = catalog.version()
+        if self._version != version:
+            with self._lock:
+                if self._version != version:
+                    stored = current_snapshot(version)
+                    if stored is not None:
+                        autographs = [row[:4] for row in stored.autographs()]
+                        tags = stored.tags()
+                    else:
+                        autographs = Autograph.objects.values_list("id", "name", "name_norm", "name_tokens")
+                        tags = Tag.objects.values_list("id", "name")
+                    self._snapshot = Snapshot(autographs, tags)
+                    self._version = version
+        return self._snapshot
+
+    def suggest(self, q: str, limit: int = DEFAULT_LIMIT) -> dict:
+        q_norm = normalize(q.strip())
+        if len(q_norm) < MIN_QUERY_LENGTH:
+            return {"autographs": [], "tags": []}
+        return self.snapshot().suggest(q_norm, limit)
+
+
+index = SuggestIndex()
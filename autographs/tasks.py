@@ -0,0 +1,140 @@
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import catalog
+from .models import Autograph, Job
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+failure_handlers = {}
+
+
+def task(func=None, *, on_failure=None):
+    """
+    Register ``func`` so it can be queued by name with ``enqueue()``.
+
+    ``on_failure`` is called with the job payload once the last attempt fails.
+    """
+    def register(func):
+        registry[func.__name__] = func
+        if on_failure is not None:
+            failure_handlers[func.__name__] = on_failure
+        return func
+
+    return register(func) if func is not None else register
+
+
+def enqueue(name: str, **payload) -> Job | None:
+    """
+    Queue ``registry[name](**payload)`` for a worker.
+
+    The job row is written in the caller's transaction, so it only becomes
+    visible to workers once that commits. A matching job that is still queued
+    is reused rather than duplicated. With ``TASKS_EAGER`` the task runs in
+    process right after commit instead, which is handy without a worker.
+    """
+    if name not in registry:
+        raise KeyError(f"Unknown task {name!r}")
+
+    if getattr(settings, "TASKS_EAGER", False):
+        transaction.on_commit(lambda: registry[name](**payload))
+        return None
+
+    job = Job.objects.filter(name=name, payload=payload, status=Job.Status.QUEUED).first()
+    if job is None:
+        job = Job.objects.create(name=name, payload=payload)
+    return job
+
+
+def enqueue_many(name: str, payloads) -> None:
+    """
+    Queue one job per payload with a single insert, for bulk loads where the
+    jobs are known to be new. Honours ``TASKS_EAGER`` like ``enqueue()``.
+    """
+    if name not in registry:
+        raise KeyError(f"Unknown task {name!r}")
+
+    if getattr(settings, "TASKS_EAGER", False):
+        for payload in payloads:
+            transaction.on_commit(lambda payload=payload: registry[name](**payload))
+        return
+
+    Job.objects.bulk_create([Job(name=name, payload=payload) for payload in payloads])
+
+
+def claim(limit: int) -> list[int]:
+    """Mark up to ``limit`` due jobs as running and return their ids."""
+    due = Job.objects.filter(
+        status=Job.Status.QUEUED, run_after__lte=timezone.now(),
+    ).values_list("pk", flat=True)[:limit]
+
+    claimed = []
+    for pk in due:
+        # conditional update so two workers can never claim the same job
+        won = Job.objects.filter(pk=pk, status=Job.Status.QUEUED).update(
+            status=Job.Status.RUNNING, attempts=F("attempts") + 1, updated_at=timezone.now(),
+        )
+        if won:
+            claimed.append(pk)
+    return claimed
+
+
+def requeue_stale(older_than: timedelta) -> int:
+    """Put back jobs left running by a worker that died."""
+    return Job.objects.filter(
+        status=Job.Status.RUNNING, updated_at__lt=timezone.now() - older_than,
+    ).update(status=Job.Status.QUEUED, updated_at=timezone.now())
+
+
+def run(pk: int) -> str:
+    """Execute a claimed job and record the outcome. Returns the new status."""
+    job = Job.objects.get(pk=pk)
+    try:
+        registry[job.name](**job.payload)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            # 30s, 60s, 120s, ...
+            job.status = Job.Status.QUEUED
+            job.run_after = timezone.now() + timedelta(seconds=30 * 2 ** (job.attempts - 1))
+        else:
+            job.status = Job.Status.FAILED
+            if job.name in failure_handlers:
+                failure_handlers[job.name](**job.payload)
+        logger.warning("Job %s failed (attempt %s/%s)", job, job.attempts, job.max_attempts)
+    else:
+        job.status = Job.Status.DONE
+        job.last_error = ""
+    job.save(update_fields=["status", "run_after", "last_error", "updated_at"])
+    return job.status
+
+
+def _renditions_failed(pk: str) -> None:
+    Autograph.objects.filter(pk=pk).update(image_status=Autograph.ImageStatus.FAILED)
+
+
+@task(on_failure=_renditions_failed)
+def build_renditions(pk: str) -> None:
+    from . import renditions
+
+    autograph = Autograph.objects.filter(pk=pk).first()
+    if autograph is None:
+        return
+
+    Autograph.objects.filter(pk=pk).update(image_status=Autograph.ImageStatus.PROCESSING)
+    try:
+        renditions.refresh(autograph)
+    except Exception:
+        # back to pending while retries remain; run() marks it failed at the end
+        Autograph.objects.filter(pk=pk).update(image_status=Autograph.ImageStatus.PENDING)
+        raise
+    Autograph.objects.filter(pk=pk).update(image_status=Autograph.ImageStatus.READY)
+    # new image URLs: drop cached pages and cards
+    catalog.bump()
@@ -0,0 +1,57 @@
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Count, Exists, OuterRef, Q
+
+from . import catalog
+from .models import Autograph, Tag
+from .routers import primary_reads
+
+
+def all_tags() -> list[Tag]:
+    """
+    Every tag, by name, annotated with ``autograph_count``. One query per
+    catalog version, shared by all processes through the cache.
+    """
+    key = f"tags:{catalog.version()}"
+    tags = cache.get(key)
+    if tags is None:
+        with primary_reads():
+            tags = list(Tag.objects.annotate(autograph_count=Count("autographs")).order_by("name"))
+        cache.set(key, tags, timeout=60 * 60 * 24)
+    return tags
+
+
+def request_tags(request) -> list[Tag]:
+    """``all_tags()`` memoized on the request, for views and context processors."""
+    if not hasattr(request, "_all_tags"):
+        request._all_tags = all_tags()
+    return request._all_tags
+
+
+def parse_tag_ids(values) -> list[int]:
+    """The ids among ``values`` (e.g. ``?tags=``) that are numbers, sorted."""
+    # isdecimal, not isdigit: int() rejects digits such as "²"
+    return sorted({int(t) for t in values if str(t).isdecimal()})
+
+
+def filter_by_tags(queryset, tag_ids):
+    """
+    Autographs carrying any of ``tag_ids``, without a join or DISTINCT.
+
+    PostgreSQL answers from the GIN-indexed ``Autograph.tag_ids`` column;
+    other backends use a semijoin on the through table. Ids that aren't
+    numbers match nothing.
+    """
+    ids = parse_tag_ids(tag_ids)
+    if not ids:
+        return queryset.none()
+
+    if connections[queryset.db].vendor == "postgresql":
+        wanted = Q()
+        for tag_id in ids:
+            wanted |= Q(tag_ids__contains=[tag_id])
+        return queryset.filter(wanted)
+
+    return queryset.filter(
+        Exists(Autograph.tags.through.objects.filter(autograph_id=OuterRef("pk"), tag_id__in=ids))
+    )
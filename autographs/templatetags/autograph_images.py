@@ -0,0 +1,31 @@
+from django import template
+
+from .. import renditions
+
+register = template.Library()
+
+
+@register.inclusion_tag("partials/_picture.html")
+def picture(autograph, label, sizes="100vw", css_class="", loading=""):
+    """
+    ``<picture>`` for one of ``renditions.RENDITIONS``: WebP with a JPEG
+    fallback, a srcset over every stored width and intrinsic dimensions.
+    Falls back to the original upload until renditions have been built.
+    """
+    variant = autograph.renditions.get(label) if renditions.is_current(autograph) else None
+    context = {
+        "autograph": autograph,
+        "sizes": sizes,
+        "css_class": css_class,
+        "loading": loading,
+        "variant": variant,
+    }
+    if variant:
+        context.update({
+            "src": autograph.storage_url(variant["jpg"]),
+            "webp_srcset": renditions.srcset(autograph, "webp"),
+            "jpg_srcset": renditions.srcset(autograph, "jpg"),
+        })
+    else:
+        context["src"] = autograph.image_url
+    return context
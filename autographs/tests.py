@@ -1,3 +1,1061 @@
-from django.test import TestCase
+import io
+import json
+import os
+import tempfile
+from contextlib import ExitStack
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, connections, transaction
+from django.test import Client, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from . import (
+    async_views, benchmarks, catalog, facets, placeholders, renditions, routers, search, static_catalog, suggest,
+    tasks, warmup,
+)
+from .staticfiles import minify_css
+from .storage import SpacesStorage
+from .models import Autograph, Job, SiteSetting, Tag
+from .pagination import SORT_KEYS, CursorPaginator, encode_cursor
+
+# BENCH_SIZE=10000 python manage.py test autographs for a bigger catalog
+BENCH_SIZE = int(os.getenv("BENCH_SIZE", "1000"))
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Every catalog view must render in a fixed number of queries, however big
+    the catalog, however deep the scroll and however many tags each card has.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        benchmarks.seed(BENCH_SIZE)
+        SiteSetting.objects.create()
+        cls.sample = Autograph.objects.filter(tags__isnull=False).order_by("name").first()
+        cls.tag = Tag.objects.order_by("name").first()
+
+    def setUp(self):
+        # new catalog version: search index and tag list are rebuilt per test
+        cache.clear()
+
+    def test_scenarios_within_budget(self):
+        for scenario in benchmarks.scenarios(self.sample, self.tag):
+            with self.subTest(scenario=scenario.name):
+                url = benchmarks.resolve_url(self.client, scenario)
+                # first hit warms the search index, tag list and settings
+                benchmarks.request(self.client, url, scenario.htmx)
+                queries, sql = benchmarks.count_queries(self.client, url, scenario.htmx)
+                self.assertLessEqual(queries, scenario.budget, "\n".join(q[:120] for q in sql))
+
+    def test_cold_requests_stay_bounded(self):
+        for scenario in benchmarks.scenarios(self.sample, self.tag):
+            with self.subTest(scenario=scenario.name):
+                cache.clear()
+                url = benchmarks.resolve_url(self.client, scenario)
+                cache.clear()
+                queries, sql = benchmarks.count_queries(self.client, url, scenario.htmx)
+                # + tag list, settings, two for the ETag fingerprint, one for
+                # building the search index and one for the facet bitmaps;
+                # once per catalog version
+                self.assertLessEqual(queries, scenario.budget + 6, "\n".join(q[:120] for q in sql))
+
+    def test_deep_scroll_reaches_the_end(self):
+        seen = []
+        url = "/?sort=price_asc"
+        while url:
+            response = self.client.get(url, HTTP_HX_REQUEST="true")
+            seen += [a.pk for a in response.context["page_obj"]]
+            match = benchmarks.SENTINEL_RE.search(response.content.decode())
+            url = "/" + match.group(1).replace("&amp;", "&") if match else None
+        expected = list(Autograph.objects.order_by("price", "name", "id").values_list("pk", flat=True))
+        self.assertEqual(seen, expected)
+
+
+class CursorPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(20):
+            Autograph.objects.create(name=f"Autograph {i}", price=10 + i % 3, image=f"autographs/{i}.jpg")
+        # a bulk import: every row created in the same instant
+        Autograph.objects.update(created_at=timezone.now())
+
+    def scroll(self, sort=""):
+        paginator = CursorPaginator(Autograph.objects.all(), 9, keys=SORT_KEYS[sort])
+        seen, cursor = [], None
+        while True:
+            page = paginator.get_page(cursor)
+            seen += [a.pk for a in page]
+            if not page.has_next():
+                return seen
+            cursor = page.next_cursor
+
+    def test_newest_first_with_tied_timestamps(self):
+        expected = list(Autograph.objects.order_by("-id").values_list("pk", flat=True))
+        self.assertEqual(self.scroll(), expected)
+
+    def test_tampered_cursor_starts_over(self):
+        first = [a.pk for a in self.client.get("/").context["autographs"]]
+        for cursor in (
+            "not base64!",
+            "é",
+            "e30",  # {}
+            "W10",  # []
+            encode_cursor({"k": 5}),
+            encode_cursor({"k": ["yesterday", "x"]}),
+            encode_cursor({"k": [{"a": 1}, ["b"]]}),
+            encode_cursor({"o": -1}),
+        ):
+            with self.subTest(cursor=cursor):
+                response = self.client.get("/", {"cursor": cursor})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual([a.pk for a in response.context["autographs"]], first)
+        response = self.client.get("/", {"sort": "price_asc", "cursor": encode_cursor({"k": ["cheap", "x", "y"]})})
+        self.assertEqual(response.status_code, 200)
+
+
+class PerformanceMiddlewareTests(TestCase):
+    def test_disabled_by_default(self):
+        response = self.client.get("/")
+        self.assertNotIn("Server-Timing", response)
+
+    @override_settings(PERF_INSTRUMENTATION=True)
+    def test_server_timing_header(self):
+        Autograph.objects.create(name="John Smith", price=10, image="autographs/x.jpg")
+        with self.assertLogs("autographs.perf", "INFO") as logs:
+            response = self.client.get("/results/?q=john")
+        timing = response["Server-Timing"]
+        for metric in ("db;dur=", "rank;dur=", "render;dur=", "total;dur="):
+            self.assertIn(metric, timing)
+        line = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(line["path"], "/results/")
+        self.assertGreater(line["sql_count"], 0)
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.autograph = Autograph.objects.create(name="John Smith", price=10, image="autographs/x.jpg")
+
+    def test_not_modified_until_catalog_changes(self):
+        for url in ("/", "/results/?q=john", f"/autograph/{self.autograph.pk}/", "/contact/"):
+            with self.subTest(url=url):
+                etag = self.client.get(url)["ETag"]
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.autograph.save()
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_site_settings_change(self):
+        cache.clear()
+        url = f"/autograph/{self.autograph.pk}/"
+        etag = self.client.get(url)["ETag"]
+        settings_row = SiteSetting.objects.get()
+        settings_row.shipping_cost_display = "$20 USD"
+        with self.captureOnCommitCallbacks(execute=True):
+            settings_row.save()
+        self.assertContains(self.client.get(url, HTTP_IF_NONE_MATCH=etag), "$20 USD")
+
+    def test_unused_tag_renamed(self):
+        cache.clear()
+        tag = Tag.objects.create(name="Rock")
+        etag = self.client.get("/")["ETag"]
+        tag.name = "Blues"
+        with self.captureOnCommitCallbacks(execute=True):
+            tag.save()
+        self.assertContains(self.client.get("/", HTTP_IF_NONE_MATCH=etag), "Blues")
+
+    def test_version_moves_on_commit(self):
+        url = "/results/?q=john"
+        etag = self.client.get(url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.autograph.name = "John Renamed"
+            self.autograph.save()
+            # a request before the commit must not cache the old rows under a new version
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_fragment_and_page_differ(self):
+        page = self.client.get("/")
+        fragment = self.client.get("/", HTTP_HX_REQUEST="true")
+        self.assertNotEqual(page["ETag"], fragment["ETag"])
+        self.assertIn("HX-Request", page["Vary"])
+        self.assertIn("public", page["Cache-Control"])
+
+
+class TagIdsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.rock = Tag.objects.create(name="Rock")
+        cls.sports = Tag.objects.create(name="Sports")
+        cls.autograph = Autograph.objects.create(name="John Smith", price=10, image="autographs/x.jpg")
+
+    def tag_ids(self):
+        return Autograph.objects.get(pk=self.autograph.pk).tag_ids
+
+    def test_kept_in_sync(self):
+        self.autograph.tags.add(self.sports, self.rock)
+        self.assertEqual(self.tag_ids(), sorted([self.rock.pk, self.sports.pk]))
+
+        self.rock.autographs.remove(self.autograph)
+        self.assertEqual(self.tag_ids(), [self.sports.pk])
+
+        self.sports.autographs.clear()
+        self.assertEqual(self.tag_ids(), [])
+
+        self.autograph.tags.set([self.rock, self.sports])
+        self.sports.delete()
+        self.assertEqual(self.tag_ids(), [self.rock.pk])
+
+    def test_stale_instance_does_not_clobber(self):
+        stale = Autograph.objects.get(pk=self.autograph.pk)
+        self.autograph.tags.add(self.rock)
+        stale.save()
+        self.assertEqual(self.tag_ids(), [self.rock.pk])
+
+    def test_tag_filter_without_duplicates(self):
+        self.autograph.tags.add(self.rock, self.sports)
+        other = Autograph.objects.create(name="Jane Doe", price=5, image="autographs/y.jpg")
+        Autograph.objects.create(name="Untagged", price=5, image="autographs/z.jpg")
+        other.tags.add(self.sports)
+
+        response = self.client.get(f"/?tags={self.rock.pk}&tags={self.sports.pk}")
+        self.assertCountEqual([a.pk for a in response.context["autographs"]], [self.autograph.pk, other.pk])
+        self.assertEqual(list(self.client.get("/?tags=nope").context["autographs"]), [])
+
+    def test_search_malformed_tag_ids_match_nothing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.autograph.tags.add(self.rock)
+        response = self.client.get(f"/results/?q=john&tags={self.rock.pk}")
+        self.assertEqual([a.pk for a in response.context["autographs"]], [self.autograph.pk])
+        for tags in ("nope", "1.5", "²"):
+            response = self.client.get("/results/", {"q": "john", "tags": tags})
+            self.assertEqual(response.status_code, 200, tags)
+            self.assertEqual(list(response.context["autographs"]), [], tags)
+
+
+class SuggestTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for name in ("Michael Jordan", "Michael Jackson", "Jordan Peele", "Mick Jagger"):
+            Autograph.objects.create(name=name, price=10, image="autographs/x.jpg")
+        Tag.objects.create(name="Jazz")
+
+    def setUp(self):
+        cache.clear()
+
+    def names(self, q, **params):
+        data = self.client.get("/api/suggest/", {"q": q, **params}).json()
+        return [a["name"] for a in data["autographs"]], [t["name"] for t in data["tags"]]
+
+    def test_full_name_prefixes_before_word_prefixes(self):
+        self.assertEqual(self.names("jordan"), (["Jordan Peele", "Michael Jordan"], []))
+        self.assertEqual(self.names("MICHAEL J"), (["Michael Jackson", "Michael Jordan"], []))
+        self.assertEqual(self.names("ja"), (["Michael Jackson", "Mick Jagger"], ["Jazz"]))
+
+    def test_limit_and_short_queries(self):
+        self.assertEqual(self.names("mi", limit=1), (["Michael Jackson"], []))
+        self.assertEqual(self.names("m"), ([], []))
+
+    def test_rebuilt_after_edits(self):
+        self.assertEqual(self.names("ringo"), ([], []))
+        with self.captureOnCommitCallbacks(execute=True):
+            Autograph.objects.create(name="Ringo Starr", price=10, image="autographs/y.jpg")
+        self.assertEqual(self.names("ringo"), (["Ringo Starr"], []))
+
+    def test_htmx_options(self):
+        response = self.client.get("/api/suggest/", {"q": "jordan"}, HTTP_HX_REQUEST="true")
+        self.assertContains(response, '<option value="Jordan Peele">')
+        self.assertIn("HX-Request", response["Vary"])
+
+
+@tasks.task(on_failure=lambda **payload: JobQueueTests.failed.append(payload))
+def flaky_task(fail: bool) -> None:
+    if fail:
+        raise RuntimeError("boom")
+
+
+class JobQueueTests(TestCase):
+    failed = []
+
+    def setUp(self):
+        JobQueueTests.failed = []
+
+    def test_claim_takes_due_jobs_once(self):
+        due = [tasks.enqueue("flaky_task", fail=False), tasks.enqueue("flaky_task", fail=True)]
+        later = Job.objects.create(
+            name="flaky_task", payload={"fail": False}, run_after=timezone.now() + timedelta(hours=1),
+        )
+        self.assertEqual(tasks.enqueue("flaky_task", fail=False), due[0])
+
+        self.assertEqual(tasks.claim(1), [due[0].pk])
+        self.assertEqual(tasks.claim(5), [due[1].pk])
+        self.assertEqual(tasks.claim(5), [])
+        self.assertEqual(Job.objects.get(pk=later.pk).status, Job.Status.QUEUED)
+        self.assertEqual(Job.objects.get(pk=due[0].pk).attempts, 1)
+
+    def test_retries_with_backoff_then_fails(self):
+        job = tasks.enqueue("flaky_task", fail=True)
+        for attempt, delay in ((1, 30), (2, 60)):
+            self.assertEqual(tasks.claim(1), [job.pk])
+            before = timezone.now()
+            self.assertEqual(tasks.run(job.pk), Job.Status.QUEUED)
+            job.refresh_from_db()
+            self.assertEqual(job.attempts, attempt)
+            self.assertIn("boom", job.last_error)
+            self.assertAlmostEqual((job.run_after - before).total_seconds(), delay, delta=5)
+            Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+            self.assertEqual(self.failed, [])
+
+        tasks.claim(1)
+        self.assertEqual(tasks.run(job.pk), Job.Status.FAILED)
+        self.assertEqual(self.failed, [{"fail": True}])
+
+    def test_success_clears_error(self):
+        job = tasks.enqueue("flaky_task", fail=False)
+        Job.objects.filter(pk=job.pk).update(last_error="old")
+        tasks.claim(1)
+        self.assertEqual(tasks.run(job.pk), Job.Status.DONE)
+        self.assertEqual(Job.objects.get(pk=job.pk).last_error, "")
+
+    def test_requeue_stale(self):
+        job = tasks.enqueue("flaky_task", fail=False)
+        tasks.claim(1)
+        self.assertEqual(tasks.requeue_stale(timedelta(minutes=10)), 0)
+        Job.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(minutes=11))
+        self.assertEqual(tasks.requeue_stale(timedelta(minutes=10)), 1)
+        self.assertEqual(tasks.claim(1), [job.pk])
+
+    def test_failed_renditions_mark_autograph(self):
+        autograph = Autograph.objects.create(name="Broken", price=10, image="autographs/missing.jpg")
+        job = Job.objects.get(name="build_renditions", payload={"pk": autograph.pk})
+        Job.objects.filter(pk=job.pk).update(max_attempts=1)
+        tasks.claim(5)
+        self.assertEqual(tasks.run(job.pk), Job.Status.FAILED)
+        self.assertEqual(Autograph.objects.get(pk=autograph.pk).image_status, Autograph.ImageStatus.FAILED)
+
+
+class ImportExportTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dir = Path(self.tmp.name)
+        (self.dir / "images").mkdir()
+        Image.new("RGB", (20, 10)).save(self.dir / "images" / "jordan.jpg")
+        Tag.objects.create(name="Sports")
+
+    def import_file(self, name, content, *args):
+        (self.dir / name).write_text(content)
+        out, err = io.StringIO(), io.StringIO()
+        with override_settings(MEDIA_ROOT=self.dir / "media"):
+            call_command("import_autographs", str(self.dir / name), *args, "--batch-size", "2", stdout=out, stderr=err)
+        return err.getvalue()
+
+    def test_csv_import_uploads_images_and_links_tags(self):
+        errors = self.import_file("in.csv", (
+            "name,description,price,tags,image\n"
+            "Michael Jordan,Signed ball,120.50,Sports|Basketball,jordan.jpg\n"
+            "Missing Price,,,Sports,jordan.jpg\n"
+            "No Image,,10,,missing.jpg\n"
+            "Jane Doe,,15,,jordan.jpg\n"
+        ), "--images", str(self.dir / "images"))
+
+        self.assertIn("line 3: invalid price", errors)
+        self.assertIn("line 4:", errors)
+        jordan = Autograph.objects.get(name="Michael Jordan")
+        self.assertEqual(sorted(jordan.tags.values_list("name", flat=True)), ["Basketball", "Sports"])
+        self.assertEqual(jordan.tag_ids, sorted(jordan.tags.values_list("id", flat=True)))
+        self.assertTrue((self.dir / "media" / jordan.image.name).exists())
+        self.assertEqual(Autograph.objects.count(), 2)
+        self.assertEqual(Job.objects.filter(name="build_renditions").count(), 2)
+
+    def test_failed_insert_removes_uploads(self):
+        with mock.patch.object(Autograph.objects, "bulk_create", side_effect=IntegrityError("duplicate")):
+            with self.assertRaises(IntegrityError):
+                self.import_file(
+                    "in.csv", "name,price,image\nMichael Jordan,10,jordan.jpg\n", "--images", str(self.dir / "images"),
+                )
+        self.assertEqual(list((self.dir / "media").rglob("*.jpg")), [])
+
+    def test_export_round_trip(self):
+        self.import_file("in.jsonl", "\n".join([
+            json.dumps({"id": "abc", "name": "A", "price": "1.00", "tags": ["Sports"], "image": "autographs/a.jpg"}),
+            "not json",
+            json.dumps({"name": "B", "price": 2, "image": "autographs/b.jpg"}),
+        ]))
+
+        out = io.StringIO()
+        call_command("export_autographs", "--format", "jsonl", stdout=out)
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([(r["name"], r["tags"]) for r in records], [("A", ["Sports"]), ("B", [])])
+
+        Autograph.objects.filter(pk="abc").delete()
+        exported = "".join(json.dumps(r) + "\n" for r in records)
+        self.import_file("again.jsonl", exported)
+        self.assertEqual(Autograph.objects.count(), 2)
+        self.assertEqual(Autograph.objects.get(pk="abc").tag_ids, [Tag.objects.get(name="Sports").pk])
+
+
+class StaticPipelineTests(TestCase):
+    def test_minify_css(self):
+        css = '/* header */\n.a  >  .b :hover {\n  content: "a  ;  b";\n  width: calc(100% - 2px);\n}\n'
+        self.assertEqual(minify_css(css), '.a>.b :hover{content: "a  ;  b";width: calc(100% - 2px)}')
+
+    def test_collectstatic_serves_precompressed_immutable(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        storages = {
+            "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+            "staticfiles": {"BACKEND": "autographs.staticfiles.CompressedManifestStaticFilesStorage"},
+        }
+        with override_settings(STATIC_ROOT=root.name, STORAGES=storages, SERVE_STATIC=True):
+            call_command("collectstatic", interactive=False, verbosity=0)
+            from django.templatetags.static import static
+            url = static("css/styles.css")
+            self.assertRegex(url, r"^/static/css/styles\.[0-9a-f]{12}\.css$")
+
+            response = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip, deflate, br")
+            self.assertEqual(response["Content-Encoding"], "br")
+            self.assertEqual(response["Content-Type"], "text/css")
+            self.assertNotIn("Content-Disposition", response)
+            self.assertIn("immutable", response["Cache-Control"])
+            self.assertIn("Accept-Encoding", response["Vary"])
+
+            plain = self.client.get(url)
+            self.assertNotIn("Content-Encoding", plain)
+            self.assertNotIn("Content-Disposition", plain)
+            self.assertNotIn("/*", b"".join(plain.streaming_content).decode())
+
+
+@override_settings(ROOT_URLCONF=benchmarks.catalog_urlconf(async_views))
+class AsyncViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.rock = Tag.objects.create(name="Rock")
+        cls.jordan = Autograph.objects.create(name="Michael Jordan", price=30, image="autographs/x.jpg")
+        cls.smith = Autograph.objects.create(name="John Smith", price=10, image="autographs/y.jpg")
+        cls.smith.tags.add(cls.rock)
+
+    def setUp(self):
+        cache.clear()
+
+    async def test_catalog_pages(self):
+        response = await self.async_client.get("/", {"sort": "price_asc"})
+        self.assertEqual([a.pk for a in response.context["autographs"]], [self.smith.pk, self.jordan.pk])
+
+        response = await self.async_client.get("/", {"tags": self.rock.pk})
+        self.assertEqual([a.pk for a in response.context["autographs"]], [self.smith.pk])
+
+        response = await self.async_client.get("/results/", {"q": "jordan"})
+        self.assertEqual([a.pk for a in response.context["autographs"]], [self.jordan.pk])
+
+        response = await self.async_client.get(f"/autograph/{self.smith.pk}/")
+        self.assertContains(response, "Rock")
+        self.assertEqual((await self.async_client.get("/autograph/missing/")).status_code, 404)
+
+    async def test_conditional_get(self):
+        etag = (await self.async_client.get("/", headers={"HX-Request": "true"}))["ETag"]
+        response = await self.async_client.get("/", headers={"HX-Request": "true", "If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertIn("HX-Request", response["Vary"])
+
+    @override_settings(PERF_INSTRUMENTATION=True)
+    async def test_server_timing_counts_sync_thread_queries(self):
+        with self.assertLogs("autographs.perf", "INFO"):
+            response = await self.async_client.get("/results/", {"q": "john"})
+        self.assertRegex(response["Server-Timing"], r'db;dur=[\d.]+;desc="[1-9]\d* queries"')
+        self.assertIn("rank;dur=", response["Server-Timing"])
+
+
+class ParallelRankingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        benchmarks.seed(1000)
+
+    def setUp(self):
+        search.index.invalidate()
+
+    def test_sharded_ranking_matches_serial(self):
+        for q in ("jo", "john", "smith", "ann"):
+            serial = search.index.rank(q)
+            with override_settings(SEARCH_PARALLEL_THRESHOLD=0, SEARCH_RANK_WORKERS=2):
+                self.assertEqual(search.index.rank(q), serial, q)
+                self.assertEqual(search.index.rank(q, limit=5), serial[:5], q)
+
+
+# DJANGO_DB_ENGINE=postgresql (the default) against a real server
+@skipUnless(connection.vendor == "postgresql", "PostgresBackend needs PostgreSQL")
+class PostgresBackendTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.rock = Tag.objects.create(name="Rock")
+        cls.beyonce = Autograph.objects.create(name="Beyoncé Knowles", price=10, image="autographs/b.jpg")
+        cls.jordan = Autograph.objects.create(name="Michael Jordan", price=10, image="autographs/j.jpg")
+        cls.jordans = Autograph.objects.create(name="Jordans Signed Shoe", price=10, image="autographs/s.jpg")
+        cls.jordan.tags.add(cls.rock)
+        cls.backend = search.PostgresBackend()
+
+    def pks(self, q, tag_ids=()):
+        return [a.pk for a in self.backend.search(q.casefold(), tag_ids)]
+
+    def test_accent_insensitive(self):
+        for q in ("beyonce", "Beyoncé", "BEYONCE know"):
+            self.assertEqual(self.pks(q), [self.beyonce.pk], q)
+
+    def test_ranked_like_in_memory(self):
+        self.assertEqual(self.pks("jordan"), [self.jordan.pk, self.jordans.pk])
+        self.assertEqual(self.backend.ids("jordan"), [self.jordan.pk, self.jordans.pk])
+        self.assertEqual(self.pks("jordan", [str(self.rock.pk)]), [self.jordan.pk])
+        self.assertEqual(self.pks("jordan", ["nope"]), [])
+        self.assertEqual(self.pks("j"), [])
+
+    def test_home_filter_uses_name_norm_index(self):
+        from .views import home_paginator
+
+        queryset = home_paginator("Beyoncé", [], "").queryset
+        self.assertEqual(list(queryset), [self.beyonce])
+        with connection.cursor() as cursor:
+            # the table is tiny, so make the planner show what it could use
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            plan = queryset.explain()
+        self.assertIn("autographs_autograph_name_norm_trgm", plan)
+
+
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        search.index.invalidate()
+        # the rows go with the test transaction
+        self.addCleanup(search.index.invalidate)
+
+    def create(self, name):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Autograph.objects.create(name=name, price=10, image="autographs/x.jpg")
+
+    def test_ranked_by_tier(self):
+        # fuzzy, substring, word prefix, word, exact name
+        names = ["Jordon Smith", "Mjordanson", "Jordans Signed Shoe", "Michael Jordan", "Jordan"]
+        pks = [self.create(name).pk for name in names]
+        self.assertEqual(search.index.rank("JORDAN"), pks[::-1])
+
+    def test_kept_in_sync_without_rebuilding(self):
+        jordan = self.create("Michael Jordan")
+        self.assertEqual(search.index.rank("jordan"), [jordan.pk])
+
+        pippen = self.create("Scottie Pippen")
+        jordan.name = "Michael Jeffrey"
+        with self.captureOnCommitCallbacks(execute=True):
+            jordan.save()
+        with self.assertNumQueries(0):
+            self.assertEqual(search.index.rank("pippen"), [pippen.pk])
+            self.assertEqual(search.index.rank("jordan"), [])
+            self.assertEqual(search.index.rank("jeffrey"), [jordan.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            pippen.delete()
+        with self.assertNumQueries(0):
+            self.assertEqual(search.index.rank("pippen"), [])
+
+
+class SearchFieldsTests(TestCase):
+    def setUp(self):
+        search.index.invalidate()
+
+    def test_saved_with_the_name(self):
+        autograph = Autograph.objects.create(name="Beyoncé Knowles-Carter", price=10, image="autographs/x.jpg")
+        autograph.refresh_from_db()
+        self.assertEqual((autograph.name_norm, autograph.name_tokens), ("beyonce knowles-carter", "beyonce knowles carter"))
+
+        autograph.name = "Björk"
+        autograph.save(update_fields=["name"])
+        autograph.refresh_from_db()
+        self.assertEqual((autograph.name_norm, autograph.name_tokens), ("bjork", "bjork"))
+        self.assertEqual(search.index.rank("BJORK"), [autograph.pk])
+
+    def test_home_filter_ignores_accents(self):
+        Autograph.objects.create(name="Beyoncé Knowles", price=10, image="autographs/x.jpg")
+        Autograph.objects.create(name="Björk", price=10, image="autographs/y.jpg")
+        response = self.client.get("/?q=BEYONCE")
+        self.assertContains(response, "Beyoncé Knowles")
+        self.assertNotContains(response, "Björk")
+
+    def test_tiers_match_scoring_every_candidate(self):
+        from rapidfuzz import fuzz, process
+
+        benchmarks.seed(1000)
+        names = dict(Autograph.objects.values_list("pk", "name_norm"))
+        for q in ("jo", "john", "smith", "ann", "mar", "michael j", "o'brien"):
+            candidates = {pk: names[pk] for pk in search.index.candidates(q)}
+            scored = process.extract(q, candidates, scorer=fuzz.WRatio, score_cutoff=60, limit=None)
+            expected = sorted(
+                (search.match_tier(q, search.word_re(q), name, search.TOKEN_RE.findall(name)), -score, len(name), name, pk)
+                for name, score, pk in scored
+            )
+            self.assertEqual(search.index.rank(q), [pk for *_, pk in expected[:search.MAX_RESULTS]], q)
+
+
+class WarmupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.rock = Tag.objects.create(name="Rock")
+        cls.jordan = Autograph.objects.create(name="Michael Jordan", price=10, image="autographs/x.jpg")
+        cls.jordan.tags.add(cls.rock)
+
+    def setUp(self):
+        cache.clear()
+        search.index.invalidate()
+        suggest.index._version = None
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "catalog.snapshot")
+        self.enterContext(override_settings(CATALOG_SNAPSHOT=self.path))
+
+    def test_indexes_built_from_current_snapshot(self):
+        self.assertEqual(warmup.write_snapshot(self.path), 1)
+        with self.assertNumQueries(0):
+            self.assertTrue(warmup.warm_process())
+            self.assertEqual(search.index.rank("jordan", [self.rock.pk]), [self.jordan.pk])
+            self.assertEqual(suggest.index.suggest("roc")["tags"], [(self.rock.pk, "Rock")])
+
+    def test_stale_snapshot_ignored(self):
+        warmup.write_snapshot(self.path)
+        with self.captureOnCommitCallbacks(execute=True):
+            pippen = Autograph.objects.create(name="Scottie Pippen", price=10, image="autographs/y.jpg")
+        self.assertFalse(warmup.warm_process())
+        self.assertEqual(search.index.rank("pippen"), [pippen.pk])
+        self.assertEqual([s.name for s in suggest.index.suggest("scot")["autographs"]], ["Scottie Pippen"])
+
+    def test_per_process_cache_checks_database(self):
+        warmup.write_snapshot(self.path)
+        # another process: its own catalog version, only trusted when shared
+        cache.clear()
+        with override_settings(CACHE_BACKEND="redis"), self.assertNumQueries(0):
+            self.assertFalse(warmup.warm_process())
+        with self.assertNumQueries(2):
+            self.assertTrue(warmup.warm_process())
+            self.assertEqual(search.index.rank("jordan", [self.rock.pk]), [self.jordan.pk])
+
+        Autograph.objects.filter(pk=self.jordan.pk).update(name="Michael Jeffrey Jordan", updated_at=timezone.now())
+        cache.clear()
+        self.assertFalse(warmup.warm_process())
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command("warm_catalog", stdout=out)
+        self.assertIn("Wrote 1 autograph(s)", out.getvalue())
+        self.assertIn("Rendered /?sort=price_asc", out.getvalue())
+        self.assertIsNotNone(warmup.current_snapshot(catalog.version()))
+
+
+@override_settings(CARD_HTML=True)
+class CardHtmlTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.rock = Tag.objects.create(name="Rock")
+        self.autograph = Autograph.objects.create(name="Mick Jagger", price=10, image="autographs/x.jpg")
+
+    def card_html(self):
+        return Autograph.objects.values_list("card_html", flat=True).get(pk=self.autograph.pk)
+
+    def test_rendered_on_changes(self):
+        self.assertIn(f'href="{self.autograph.get_absolute_url()}"', self.card_html())
+        self.autograph.tags.add(self.rock)
+        self.assertIn('<span class="badge">Rock</span>', self.card_html())
+        self.rock.name = "Blues"
+        self.rock.save()
+        self.assertIn('<span class="badge">Blues</span>', self.card_html())
+
+    def test_grid_emits_stored_card(self):
+        Autograph.objects.filter(pk=self.autograph.pk).update(card_html='<a class="card">stored</a>')
+        self.assertContains(self.client.get("/"), '<a class="card">stored</a>')
+        with override_settings(CARD_HTML=False):
+            cache.clear()
+            self.assertNotContains(self.client.get("/"), '<a class="card">stored</a>')
+
+    def test_warm_catalog_rerenders(self):
+        Autograph.objects.filter(pk=self.autograph.pk).update(card_html="")
+        call_command("warm_catalog", "--cards", "--snapshot=", "--no-pages", stdout=io.StringIO())
+        self.assertIn("Mick Jagger", self.card_html())
+
+
+class RenditionTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        media = override_settings(MEDIA_ROOT=self.tmp.name)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def create(self, name, fmt, color):
+        buf = io.BytesIO()
+        Image.new("RGB", (800, 600), color).save(buf, fmt)
+        autograph = Autograph.objects.create(name=name, price=10, image=ContentFile(buf.getvalue(), name=name))
+        renditions.refresh(autograph)
+        return autograph
+
+    def card_color(self, autograph):
+        with autograph.image.storage.open(autograph.renditions["card"]["jpg"], "rb") as fh:
+            return Image.open(fh).convert("RGB").getpixel((0, 0))
+
+    def test_same_stem_kept_apart(self):
+        jpg = self.create("jordan.jpg", "JPEG", (255, 0, 0))
+        png = self.create("jordan.png", "PNG", (0, 0, 255))
+        self.assertGreater(self.card_color(jpg)[0], 200)
+        self.assertGreater(self.card_color(png)[2], 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            png.delete()
+        self.assertGreater(self.card_color(jpg)[0], 200)
+        self.assertFalse(png.image.storage.exists(png.renditions["card"]["jpg"]))
+
+    def test_files_kept_when_delete_rolls_back(self):
+        autograph = self.create("jordan.jpg", "JPEG", (255, 0, 0))
+        pk = autograph.pk
+        with self.captureOnCommitCallbacks(execute=True), self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                autograph.delete()
+                raise RuntimeError("rolled back")
+        self.assertGreater(self.card_color(Autograph.objects.get(pk=pk))[0], 200)
+
+    def test_rebuild_switches_before_deleting(self):
+        autograph = self.create("jordan.jpg", "JPEG", (255, 0, 0))
+        old = autograph.renditions["card"]["jpg"]
+        renditions.refresh(autograph, force=True)
+        new = Autograph.objects.get(pk=autograph.pk).renditions["card"]["jpg"]
+        self.assertNotEqual(new, old)
+        self.assertTrue(autograph.image.storage.exists(new))
+        self.assertFalse(autograph.image.storage.exists(old))
+
+    def test_failed_build_keeps_current_files(self):
+        autograph = self.create("jordan.jpg", "JPEG", (255, 0, 0))
+        before = autograph.renditions
+        storage = autograph.image.storage
+        real_save, saved = storage.save, []
+
+        def flaky_save(name, content):
+            if len(saved) == 3:
+                raise OSError("disk full")
+            saved.append(real_save(name, content))
+            return saved[-1]
+
+        with mock.patch.object(storage, "save", flaky_save), self.assertRaises(OSError):
+            renditions.refresh(autograph, force=True)
+        self.assertEqual(Autograph.objects.get(pk=autograph.pk).renditions, before)
+        current = [before[label][ext] for label in renditions.RENDITIONS for ext in renditions.FORMATS]
+        self.assertTrue(all(storage.exists(name) for name in current))
+        self.assertFalse(any(storage.exists(name) for name in saved))
+
+
+@override_settings(CARD_HTML=True)
+class PlaceholderTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        media = override_settings(MEDIA_ROOT=self.tmp.name)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.autograph = Autograph.objects.create(name="Ink", price=10, image=self.upload())
+
+    def upload(self, orientation=None):
+        # dark ink on a mostly white card
+        image = Image.new("RGB", (400, 300), "white")
+        image.paste((20, 20, 120), (0, 0, 100, 300))
+        exif = Image.Exif()
+        if orientation:
+            exif[0x0112] = orientation
+        buf = io.BytesIO()
+        image.save(buf, "JPEG", exif=exif)
+        return ContentFile(buf.getvalue(), name="ink.jpg")
+
+    def test_read(self):
+        fields = placeholders.read(self.upload(orientation=6))
+        self.assertEqual((fields["image_width"], fields["image_height"]), (300, 400))
+        red, green, blue = (int(fields["image_color"][i:i + 2], 16) for i in (1, 3, 5))
+        self.assertGreater(min(red, green, blue), 230)
+        self.assertTrue(fields["image_placeholder"].startswith("data:image/webp;base64,"))
+        self.assertLess(len(fields["image_placeholder"]), 400)
+
+    def test_set_with_renditions_and_shown_on_card(self):
+        renditions.refresh(self.autograph)
+        autograph = Autograph.objects.get(pk=self.autograph.pk)
+        self.assertEqual((autograph.image_width, autograph.image_height), (400, 300))
+        self.assertIn(f'style="background: {autograph.image_color} url(data:image/webp;base64,', autograph.card_html)
+        detail = self.client.get(autograph.get_absolute_url())
+        self.assertContains(detail, 'width="400" height="300"')
+
+    def test_replaced_image_drops_placeholder(self):
+        renditions.refresh(self.autograph)
+        autograph = Autograph.objects.get(pk=self.autograph.pk)
+        autograph.image = self.upload()
+        autograph.save()
+        autograph.refresh_from_db()
+        self.assertEqual((autograph.image_width, autograph.image_placeholder), (None, ""))
+        self.assertNotIn("style=", autograph.card_html)
+
+    def test_backfill(self):
+        # the command runs it in other processes, which can't see the test transaction
+        from .management.commands.backfill_placeholders import _backfill
+
+        _backfill(self.autograph.pk)
+        autograph = Autograph.objects.get(pk=self.autograph.pk)
+        self.assertEqual((autograph.image_width, autograph.image_height), (400, 300))
+        self.assertIn(autograph.image_placeholder, autograph.card_html)
+
+        # from the card rendition, with the size on record
+        renditions.refresh(autograph)
+        Autograph.objects.filter(pk=autograph.pk).update(image_width=None, image_placeholder="")
+        _backfill(autograph.pk)
+        self.assertEqual(Autograph.objects.get(pk=autograph.pk).image_width, 400)
+
+
+class FacetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.rock = Tag.objects.create(name="Rock")
+        cls.sports = Tag.objects.create(name="Sports")
+        for name, tags in (("Michael Jordan", [cls.sports]), ("Michael Jackson", [cls.rock]), ("Mick Jagger", [cls.rock])):
+            Autograph.objects.create(name=name, price=10, image="autographs/x.jpg").tags.set(tags)
+
+    def setUp(self):
+        cache.clear()
+        search.index.invalidate()
+
+    def counts(self, url):
+        response = self.client.get(url)
+        return {tag.name: tag.autograph_count for tag in response.context["all_tags"]}
+
+    def test_counts_follow_the_query_not_the_selected_tags(self):
+        self.assertEqual(self.counts("/results/?q=michael"), {"Rock": 1, "Sports": 1})
+        self.assertEqual(self.counts(f"/results/?q=michael&tags={self.rock.pk}"), {"Rock": 1, "Sports": 1})
+        self.assertEqual(self.counts("/results/?q=jagger"), {"Rock": 1, "Sports": 0})
+        self.assertEqual(self.counts("/"), {"Rock": 2, "Sports": 1})
+
+    def test_cached_per_catalog_version(self):
+        facets.tag_counts("michael")
+        with self.assertNumQueries(0):
+            self.assertEqual(facets.tag_counts("michael"), {self.rock.pk: 1, self.sports.pk: 1})
+        with self.captureOnCommitCallbacks(execute=True):
+            Autograph.objects.get(name="Michael Jordan").tags.add(self.rock)
+        self.assertEqual(facets.tag_counts("michael"), {self.rock.pk: 2, self.sports.pk: 1})
+
+
+class PublicFastPathTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.autograph = Autograph.objects.create(name="Michael Jordan", price=10, image="autographs/x.jpg")
+        cls.admin = User.objects.create_superuser("admin", "admin@example.com", "secret-password")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_catalog_skips_session_and_auth(self):
+        self.client.force_login(self.admin)
+        for url in ("/", "/results/?q=jordan", f"/autograph/{self.autograph.pk}/", "/api/suggest/?q=mi"):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertFalse(hasattr(response.wsgi_request, "session"), url)
+            self.assertFalse(hasattr(response.wsgi_request, "user"), url)
+            self.assertNotIn("Cookie", response.get("Vary", ""), url)
+
+    async def test_async_handler(self):
+        response = await self.async_client.get("/")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(hasattr(response.asgi_request, "user"))
+
+    def test_admin_and_two_factor_keep_full_stack(self):
+        response = self.client.get(reverse("admin:index"))
+        self.assertTrue(response.wsgi_request.user.is_anonymous)
+        self.assertEqual(response.status_code, 302)
+
+        response = self.client.get(reverse("two_factor:login"))
+        self.assertIn("csrftoken", response.cookies)
+
+        self.client.force_login(self.admin)
+        # logged in but without a verified device
+        self.assertFalse(self.client.get(reverse("admin:index")).wsgi_request.user.is_verified())
+
+    def test_unsafe_methods_keep_csrf(self):
+        client = Client(enforce_csrf_checks=True)
+        self.assertEqual(client.post("/results/", {"q": "jordan"}).status_code, 403)
+
+    @override_settings(PUBLIC_FAST_PATH=False)
+    def test_disabled(self):
+        response = Client().get("/")
+        self.assertTrue(hasattr(response.wsgi_request, "session"))
+
+
+class StaticCatalogTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.rock = Tag.objects.create(name="Rock")
+        cls.autographs = [
+            Autograph.objects.create(name=f"Artist {i}", price=10 + i, image=f"autographs/{i}.jpg")
+            for i in range(12)
+        ]
+        cls.autographs[0].tags.add(cls.rock)
+
+    def setUp(self):
+        cache.clear()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+
+    def build(self):
+        return static_catalog.build(str(self.root), pages=2)
+
+    def test_export_and_incremental_rebuild(self):
+        first = self.build()
+        self.assertEqual(first.rendered, 3 + 2 + 12)
+        self.assertIn("Artist 0", (self.root / f"autograph/{self.autographs[0].pk}/index.html").read_text())
+        self.assertTrue((self.root / "sort=price_asc.html").exists())
+        self.assertTrue((self.root / "contact/index.html").exists())
+        # page 2 of each sort, as the fragment the sentinel asks for
+        fragments = sorted(self.root.glob("cursor=*.html"))
+        self.assertEqual(len(fragments), 3)
+        self.assertNotIn("<html", fragments[0].read_text())
+
+        self.assertEqual(self.build().rendered, 0)
+
+        cheapest = self.autographs[0]
+        cheapest.description = "Signed in 1969"
+        cheapest.save()
+        # its page and every sort showing it
+        second = self.build()
+        self.assertEqual(second.rendered, 1 + 3)
+        self.assertIn("Signed in 1969", (self.root / f"autograph/{cheapest.pk}/index.html").read_text())
+
+    def test_removes_pages_of_deleted_autographs(self):
+        self.build()
+        pk = self.autographs[5].pk
+        self.autographs[5].delete()
+        result = self.build()
+        self.assertIn(f"autograph/{pk}/index.html", result.removed)
+        self.assertFalse((self.root / f"autograph/{pk}/index.html").exists())
+
+    def test_tag_changes_rerender_every_page(self):
+        self.build()
+        # the tag menu with its counts is on every page
+        with self.captureOnCommitCallbacks(execute=True):
+            self.autographs[3].tags.add(self.rock)
+        self.assertEqual(self.build().rendered, 3 + 2 + 12)
+
+
+class SpacesStorageTests(SimpleTestCase):
+    OPTIONS = {
+        "access_key": "key",
+        "secret_key": "secret",
+        "bucket_name": "autographs",
+        "region_name": "nyc3",
+        "endpoint_url": "https://nyc3.digitaloceanspaces.com",
+        "querystring_auth": False,
+        "file_overwrite": False,
+    }
+    NAMES = ("autographs/x.jpg", "autographs/Beyoncé (2) 100%+.jpg", "autographs/renditions/x/card-640.webp")
+
+    def test_urls_match_s3storage(self):
+        from storages.backends.s3 import S3Storage
+
+        for options in (self.OPTIONS, {**self.OPTIONS, "location": "media"}, {**self.OPTIONS, "endpoint_url": None}):
+            stock, spaces = S3Storage(**options), SpacesStorage(**options)
+            for name in self.NAMES:
+                self.assertEqual(spaces.url(name), stock.url(name))
+                self.assertEqual(spaces.url(name), stock.url(name))
+            self.assertEqual(spaces._public_url.cache_info().hits, len(self.NAMES))
+
+    def test_cdn_urls_skip_botocore(self):
+        storage = SpacesStorage(**self.OPTIONS, custom_domain="cdn.example.com")
+        self.assertEqual(storage.url("autographs/a b.jpg"), "https://cdn.example.com/autographs/a%20b.jpg")
+        self.assertIsNone(storage._url_client)
+
+    def test_signed_urls_not_memoized(self):
+        storage = SpacesStorage(**{**self.OPTIONS, "querystring_auth": True})
+        self.assertIn("Signature=", storage.url("autographs/x.jpg"))
+        self.assertEqual(storage._public_url.cache_info().currsize, 0)
+
+
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def read_db(self, request):
+        return routers.ReplicaRouter().db_for_read(Autograph) or "default"
+
+    @override_settings(DATABASE_REPLICAS=["replica_1", "replica_2"], REPLICA_READS=True)
+    def test_only_wrapped_views_read_replicas(self):
+        view = routers.replica_reads(self.read_db)
+        self.assertIn(view(None), ("replica_1", "replica_2"))
+        self.assertEqual(self.read_db(None), "default")
+        self.assertEqual(routers.ReplicaRouter().db_for_write(Autograph), "default")
+
+        async def async_view(request):
+            with routers.primary_reads():
+                primary = self.read_db(request)
+            return self.read_db(request), primary
+
+        replica, primary = async_to_sync(routers.replica_reads(async_view))(None)
+        self.assertIn(replica, ("replica_1", "replica_2"))
+        self.assertEqual(primary, "default")
+
+    @override_settings(DATABASE_REPLICAS=["replica_1"], REPLICA_READS=True, REPLICA_LAG_WINDOW=30)
+    def test_primary_right_after_a_change(self):
+        view = routers.replica_reads(self.read_db)
+        self.assertEqual(view(None), "replica_1")
+        catalog.bump()
+        # the ETag already reflects the change; a lagging replica may not
+        self.assertEqual(view(None), "default")
+        with override_settings(REPLICA_LAG_WINDOW=0):
+            self.assertEqual(view(None), "replica_1")
+
+    @override_settings(DATABASE_REPLICAS=["replica_1"], REPLICA_READS=False)
+    def test_switched_off(self):
+        self.assertEqual(routers.replica_reads(self.read_db)(None), "default")
+
+
+# Against real replica connections (test mirrors of "default"):
+# SQLITE_REPLICAS=2 DJANGO_REPLICA_READS=0 DJANGO_DB_ENGINE=sqlite python manage.py test autographs
+# REPLICA_READS is off for the rest of the suite: TestCase data is never
+# committed, so another connection can't see it. REPLICA_LAG_WINDOW=0: setUp
+# has just changed the catalog, and the mirrors have no lag
+@skipUnless(settings.DATABASE_REPLICAS, "no DATABASE_REPLICAS configured")
+@override_settings(REPLICA_READS=True, REPLICA_LAG_WINDOW=0)
+class ReplicaReadsTests(TransactionTestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        cache.clear()
+        search.index.invalidate()
+        self.autograph = Autograph.objects.create(name="Michael Jordan", price=10, image="autographs/x.jpg")
+        self.autograph.tags.add(Tag.objects.create(name="Sports"))
+
+    def queries(self, url):
+        contexts = {alias: CaptureQueriesContext(connections[alias]) for alias in connections}
+        with ExitStack() as stack:
+            for context in contexts.values():
+                stack.enter_context(context)
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return {alias: len(context) for alias, context in contexts.items() if len(context)}
+
+    def test_catalog_pages_read_replicas(self):
+        for url in ("/", "/results/?q=jordan", f"/autograph/{self.autograph.pk}/"):
+            # the fingerprint, tag list and index are cached per catalog version
+            self.client.get(url)
+            counts = self.queries(url)
+            self.assertTrue(counts, url)
+            self.assertTrue(set(counts) <= set(settings.DATABASE_REPLICAS), url)
+
+    def test_writes_go_to_primary(self):
+        with CaptureQueriesContext(connections["default"]) as primary:
+            Autograph.objects.filter(pk=self.autograph.pk).update(price=12)
+        self.assertEqual(len(primary), 1)
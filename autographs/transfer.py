@@ -0,0 +1,264 @@
+"""
+Bulk import/export of the catalog as CSV or JSON Lines, used by
+``manage.py import_autographs`` / ``export_autographs`` and the admin
+export action.
+
+One record per autograph::
+
+    {"id": "...", "name": "...", "description": "...", "price": "12.50",
+     "tags": ["Music", "Rock"], "image": "autographs/x.jpg"}
+
+In CSV the tags are joined with ``|``. ``id`` is optional on import.
+"""
+import csv
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+
+from django.core.files import File
+from django.db import transaction
+
+from . import catalog, tasks
+from .models import Autograph, Tag
+
+FIELDS = ["id", "name", "description", "price", "tags", "image"]
+FORMATS = ("csv", "jsonl")
+TAG_SEPARATOR = "|"
+
+
+def detect_format(path: str, fmt: str | None = None) -> str:
+    if fmt:
+        return fmt
+    return "jsonl" if path.endswith((".jsonl", ".ndjson", ".json")) else "csv"
+
+
+# -- export ------------------------------------------------------------------
+
+def export_records(queryset, chunk_size: int = 2000):
+    """
+    Yield one dict per autograph in ``queryset``. Rows are streamed from the
+    database in chunks and tag names come from ``tag_ids``, so memory stays
+    flat however big the catalog is.
+    """
+    tag_names = dict(Tag.objects.values_list("id", "name"))
+    rows = queryset.order_by("created_at", "id").values_list(
+        "id", "name", "description", "price", "tag_ids", "image",
+    )
+    for pk, name, description, price, tag_ids, image in rows.iterator(chunk_size=chunk_size):
+        yield {
+            "id": pk,
+            "name": name,
+            "description": description,
+            "price": str(price),
+            "tags": [tag_names[t] for t in tag_ids if t in tag_names],
+            "image": image,
+        }
+
+
+class _Line:
+    """File-like object whose ``write`` returns the text, for csv.writer."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def export_lines(queryset, fmt: str = "csv"):
+    """Yield the export of ``queryset`` as text lines in ``fmt``."""
+    if fmt == "jsonl":
+        for record in export_records(queryset):
+            yield json.dumps(record, ensure_ascii=False) + "\n"
+        return
+
+    writer = csv.writer(_Line())
+    yield writer.writerow(FIELDS)
+    for record in export_records(queryset):
+        record["tags"] = TAG_SEPARATOR.join(record["tags"])
+        yield writer.writerow([record[name] for name in FIELDS])
+
+
+# -- import ------------------------------------------------------------------
+
+def read_records(fh, fmt: str = "csv"):
+    """Yield ``(line_number, dict)`` from a CSV or JSONL text stream."""
+    if fmt == "jsonl":
+        for number, line in enumerate(fh, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield number, json.loads(line)
+            except json.JSONDecodeError as exc:
+                # reported by clean_record along with the other bad rows
+                yield number, exc
+        return
+
+    reader = csv.DictReader(fh)
+    for record in reader:
+        record["tags"] = (record.get("tags") or "").split(TAG_SEPARATOR)
+        yield reader.line_num, record
+
+
+class RecordError(ValueError):
+    pass
+
+
+def clean_record(record: dict) -> dict:
+    if isinstance(record, Exception):
+        raise RecordError(record)
+    if not isinstance(record, dict):
+        raise RecordError("expected an object")
+
+    name = str(record.get("name") or "").strip()
+    if not name:
+        raise RecordError("name is required")
+    if len(name) > Autograph._meta.get_field("name").max_length:
+        raise RecordError("name is too long")
+
+    try:
+        price = Decimal(str(record.get("price", "")).strip())
+    except InvalidOperation:
+        price = None
+    if price is None or not price.is_finite() or price < 0 or price >= 10 ** 6:
+        raise RecordError(f"invalid price {record.get('price')!r}")
+
+    image = str(record.get("image") or "").strip()
+    if not image:
+        raise RecordError("image is required")
+
+    tags = sorted({str(t).strip() for t in record.get("tags") or []} - {""})
+    if any(len(t) > Tag._meta.get_field("name").max_length for t in tags):
+        raise RecordError("tag name is too long")
+
+    pk = str(record.get("id") or "").strip() or None
+    if pk and len(pk) > Autograph._meta.pk.max_length:
+        raise RecordError("id is too long")
+
+    return {
+        "id": pk,
+        "name": name,
+        "description": str(record.get("description") or "").strip(),
+        "price": price,
+        "tags": tags,
+        "image": image,
+    }
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    skipped: int = 0
+    errors: list[str] = field(default_factory=list)
+
+
+class Importer:
+    """
+    Insert records in batches: one ``bulk_create`` for the autographs, one
+    for their tag links and at most two queries for tags not seen yet.
+
+    With ``images_dir`` the ``image`` column names files in that directory,
+    uploaded to the image field's storage by ``workers`` threads; without
+    it the value is taken as a name already in storage.
+    """
+
+    def __init__(self, images_dir: str | None = None, batch_size: int = 500, workers: int = 8, log=None):
+        self.images_dir = images_dir
+        self.batch_size = batch_size
+        self.workers = workers
+        self.log = log or (lambda message: None)
+        self.result = ImportResult()
+        self.tag_ids: dict[str, int] = {}
+        self.field = Autograph._meta.get_field("image")
+
+    def run(self, records) -> ImportResult:
+        with ThreadPoolExecutor(max_workers=max(self.workers, 1)) as self.pool:
+            batch = []
+            for number, record in records:
+                try:
+                    batch.append((number, clean_record(record)))
+                except RecordError as exc:
+                    self.error(number, exc)
+                if len(batch) >= self.batch_size:
+                    self.import_batch(batch)
+                    batch = []
+            if batch:
+                self.import_batch(batch)
+
+        if self.result.created:
+            catalog.bump()
+        return self.result
+
+    def error(self, number: int, message) -> None:
+        self.result.errors.append(f"line {number}: {message}")
+
+    def import_batch(self, batch) -> None:
+        ids = [record["id"] for _, record in batch if record["id"]]
+        existing = set(Autograph.objects.filter(pk__in=ids).values_list("pk", flat=True)) if ids else set()
+        fresh = []
+        for number, record in batch:
+            if record["id"] and record["id"] in existing:
+                self.result.skipped += 1
+                continue
+            fresh.append((number, record))
+            if record["id"]:
+                existing.add(record["id"])
+
+        images = list(self.pool.map(self.upload, [record["image"] for _, record in fresh]))
+        self.ensure_tags({tag for _, record in fresh for tag in record["tags"]})
+
+        autographs = []
+        for (number, record), image in zip(fresh, images):
+            if isinstance(image, Exception):
+                self.error(number, image)
+                continue
+            autograph = Autograph(
+                name=record["name"],
+                description=record["description"],
+                price=record["price"],
+                image=image,
+                tag_ids=sorted(self.tag_ids[tag] for tag in record["tags"]),
+            )
+            if record["id"]:
+                autograph.pk = record["id"]
+            autograph.set_search_fields()
+            autographs.append(autograph)
+
+        through = Autograph.tags.through
+        try:
+            with transaction.atomic():
+                Autograph.objects.bulk_create(autographs)
+                through.objects.bulk_create([
+                    through(autograph_id=autograph.pk, tag_id=tag_id)
+                    for autograph in autographs
+                    for tag_id in autograph.tag_ids
+                ])
+                # bulk_create skips the post_save handler that queues these
+                tasks.enqueue_many("build_renditions", [{"pk": autograph.pk} for autograph in autographs])
+        except Exception:
+            if self.images_dir:
+                # no row points at this batch's uploads any more
+                list(self.pool.map(self.field.storage.delete, [autograph.image.name for autograph in autographs]))
+            raise
+
+        self.result.created += len(autographs)
+        self.log(f"{self.result.created} imported")
+
+    def ensure_tags(self, names) -> None:
+        missing = [name for name in names if name not in self.tag_ids]
+        if not missing:
+            return
+        Tag.objects.bulk_create([Tag(name=name) for name in missing], ignore_conflicts=True)
+        self.tag_ids.update(Tag.objects.filter(name__in=missing).values_list("name", "id"))
+
+    def upload(self, image: str):
+        """Storage name for ``image``, uploading it first with ``images_dir``."""
+        if not self.images_dir:
+            return image
+        path = os.path.join(self.images_dir, image)
+        try:
+            with open(path, "rb") as fh:
+                name = self.field.generate_filename(None, os.path.basename(image))
+                return self.field.storage.save(name, File(fh), max_length=self.field.max_length)
+        except OSError as exc:
+            return exc
+
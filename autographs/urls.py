@@ -1,10 +1,18 @@
+from django.conf import settings
 from django.urls import path
-from . import views
-
-urlpatterns = [
-    path("", views.home, name="home"),
-    path("results/", views.results, name="results"),
-    path("contact/", views.contact, name="contact"),
-    path("newsletter/", views.newsletter, name="newsletter"),
-    path("autograph/<str:pk>/", views.autograph_detail, name="detail"),
-]
\ No newline at end of file
+from . import async_views, views
+
+
+def build_urlpatterns(catalog):
+    """``catalog`` provides home/results/autograph_detail: ``views`` or ``async_views``."""
+    return [
+        path("", catalog.home, name="home"),
+        path("results/", catalog.results, name="results"),
+        path("api/suggest/", views.suggest, name="suggest"),
+        path("contact/", views.contact, name="contact"),
+        path("newsletter/", views.newsletter, name="newsletter"),
+        path("autograph/<str:pk>/", catalog.autograph_detail, name="detail"),
+    ]
+
+
+urlpatterns = build_urlpatterns(async_views if settings.ASYNC_VIEWS else views)
@@ -1,181 +1,170 @@
-from .models import Autograph, Tag, SiteSetting
-from django.shortcuts import render, get_object_or_404
-from django.db.models import Case, When
-from rapidfuzz import fuzz, process
-from django.core.cache import cache
-from django.core.paginator import Paginator
-import re
-
+from django.conf import settings
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404, render
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_headers
+
+from . import perf
+from .conditional import catalog_etag
+from .facets import faceted_tags
+from .middleware import public_route
+from .models import Autograph, SiteSetting
+from .pagination import SORT_KEYS, CursorPaginator
+from .routers import replica_reads
+from .search import get_backend as get_search_backend, normalize
+from .suggest import DEFAULT_LIMIT as SUGGEST_LIMIT, MAX_LIMIT as SUGGEST_MAX_LIMIT, index as suggest_index
+from .taxonomy import filter_by_tags, request_tags
+
+
+def render_catalog(request, context):
+    # HTMX infinite scroll only wants the next cards, not the whole page
+    template = "home.html"
+    if request.headers.get("HX-Request") == "true":
+        template = "partials/_autograph_page.html"
 
-# views.py
-import re
-from django.core.cache import cache
-from django.core.paginator import Paginator
-from django.db.models import Case, When
-from django.shortcuts import render
-from rapidfuzz import fuzz
+    with perf.span("render"):
+        return render(request, template, context)
 
-from .models import Autograph, Tag
 
+def render_detail(request, autograph, site_settings):
+    with perf.span("render"):
+        return render(request, "detail.html", {
+            "autograph": autograph,
+            "shipping_cost_display": site_settings.shipping_cost_display,
+        })
 
-def home(request):
-    q = (request.GET.get("q") or "").strip()
-    tag_ids = request.GET.getlist("tags")
-    sort = (request.GET.get("sort") or "").strip()  # NEW
-    page_number = request.GET.get("page", 1)
 
-    autographs = Autograph.objects.all().prefetch_related("tags")
+# Revalidated on every use; the ETag makes that a cheap 304 until the catalog
+# changes. The same URL serves home.html or the HTMX partial.
+catalog_cache = cache_control(public=True, max_age=0, s_maxage=settings.CATALOG_SHARED_MAX_AGE)
 
-    if q:
-        autographs = autographs.filter(name__icontains=q)
 
-    if tag_ids:
-        autographs = autographs.filter(tags__id__in=tag_ids).distinct()
-
-    # NEW: price sorting
-    if sort == "price_asc":
-        autographs = autographs.order_by("price", "name")
-    elif sort == "price_desc":
-        autographs = autographs.order_by("-price", "name")
-    # else: keep default Meta.ordering (newest-first)
+def catalog_params(request):
+    q = (request.GET.get("q") or "").strip()
+    tag_ids = request.GET.getlist("tags")
+    sort = (request.GET.get("sort") or "").strip()
+    cursor = request.GET.get("cursor")
+    return q, tag_ids, sort, cursor
 
-    paginator = Paginator(autographs, 9)
-    page_obj = paginator.get_page(page_number)
 
-    context = {
+def catalog_context(page_obj, q, tag_ids, sort, all_tags):
+    return {
         "page_obj": page_obj,
         "autographs": page_obj.object_list,
         "q": q,
-        "sort": sort,  # NEW
-        "all_tags": Tag.objects.order_by("name"),
+        "sort": sort,
+        "all_tags": all_tags,
         "selected_tag_ids": tag_ids,
     }
 
-    if request.headers.get("HX-Request") == "true":
-        return render(request, "partials/_autograph_page.html", context)
-
-    return render(request, "home.html", context)
 
+def results_tags(request, q) -> list:
+    """The tag menu for ``results``, with counts narrowed to the matches for ``q``."""
+    if request.headers.get("HX-Request") == "true":
+        # the partial has no menu
+        return request_tags(request)
+    return faceted_tags(request_tags(request), q)
 
-def results(request):
-    q = (request.GET.get("q") or "").strip()
-    q_norm = q.casefold()
-    tag_ids = request.GET.getlist("tags")
-    sort = (request.GET.get("sort") or "").strip()  # NEW
-    page_number = request.GET.get("page", 1)
 
+def home_paginator(q, tag_ids, sort) -> CursorPaginator:
     autographs = Autograph.objects.all().prefetch_related("tags")
 
+    if q:
+        # served by the name_norm trigram index on PostgreSQL (0013)
+        autographs = autographs.filter(name_norm__contains=normalize(q))
+
     if tag_ids:
-        autographs = autographs.filter(tags__id__in=tag_ids).distinct()
+        autographs = filter_by_tags(autographs, tag_ids)
 
+    # price sorts or newest-first, applied by the paginator
+    return CursorPaginator(autographs, 9, keys=SORT_KEYS.get(sort, SORT_KEYS[""]))
+
+
+def results_paginator(matches, q, tag_ids, sort) -> CursorPaginator:
+    """``matches`` is the search backend's ranked queryset for ``q``, if any."""
     if q:
-        if len(q_norm) < 2:
-            autographs = Autograph.objects.none()
-        else:
-            candidates_qs = autographs
-
-            if len(q_norm) >= 3:
-                narrowed = candidates_qs.filter(name__icontains=q_norm[:3])
-                if narrowed.exists():
-                    candidates_qs = narrowed
-
-            cache_key = f"cand:{hash((tuple(sorted(tag_ids)), q_norm[:3] if len(q_norm) >= 3 else 'all'))}"
-            candidates = cache.get(cache_key)
-
-            if candidates is None:
-                candidates = list(candidates_qs.values_list("id", "name"))
-                cache.set(cache_key, candidates, 120)
-
-            ranked = []
-            q_word = q_norm
-            q_re = re.compile(rf"\b{re.escape(q_word)}\b", re.IGNORECASE)
-
-            for pk, name in candidates:
-                name_norm = (name or "").casefold()
-                if not name_norm:
-                    continue
-
-                score = fuzz.WRatio(q_norm, name_norm)
-                if score < 60:
-                    continue
-
-                tokens = re.findall(r"[a-z0-9]+", name_norm)
-
-                if name_norm == q_norm:
-                    tier = 0
-                elif any(t == q_norm for t in tokens):
-                    tier = 1
-                elif name_norm.startswith(q_norm + " "):
-                    tier = 2
-                elif any(t.startswith(q_norm) for t in tokens):
-                    tier = 3
-                elif q_re.search(name_norm):
-                    tier = 4
-                elif q_norm in name_norm:
-                    tier = 5
-                else:
-                    tier = 6
-
-                ranked.append((pk, tier, -score, len(name_norm), name_norm))
-
-            ranked.sort(key=lambda x: (x[1], x[2], x[3], x[4]))
-            matched_ids = [pk for pk, *_ in ranked[:200]]
-
-            if matched_ids:
-                base_qs = Autograph.objects.filter(id__in=matched_ids).prefetch_related("tags")
-
-                # NEW: if sorting by price, sort within the matched set
-                if sort == "price_asc":
-                    autographs = base_qs.order_by("price", "name")
-                elif sort == "price_desc":
-                    autographs = base_qs.order_by("-price", "name")
-                else:
-                    order = Case(*[When(id=pk, then=pos) for pos, pk in enumerate(matched_ids)])
-                    autographs = base_qs.order_by(order)
-            else:
-                autographs = Autograph.objects.none()
-
-    # NEW: if no q (no ranking path), still allow sort
-    if not q:
-        if sort == "price_asc":
-            autographs = autographs.order_by("price", "name")
-        elif sort == "price_desc":
-            autographs = autographs.order_by("-price", "name")
-
-    paginator = Paginator(autographs, 9)
-    page_obj = paginator.get_page(page_number)
-
-    context = {
-        "page_obj": page_obj,
-        "autographs": page_obj.object_list,
-        "q": q,
-        "sort": sort,  # NEW
-        "all_tags": Tag.objects.order_by("name"),
-        "selected_tag_ids": tag_ids,
-    }
+        autographs = matches.prefetch_related("tags")
+    else:
+        autographs = Autograph.objects.all().prefetch_related("tags")
+        if tag_ids:
+            autographs = filter_by_tags(autographs, tag_ids)
+
+    if q and sort not in ("price_asc", "price_desc"):
+        # keep relevance order; the ranked set is capped so an offset is cheap
+        return CursorPaginator(autographs, 9)
+    # price sorts (within the matched set when searching) or newest-first
+    return CursorPaginator(autographs, 9, keys=SORT_KEYS.get(sort, SORT_KEYS[""]))
+
+
+@public_route
+@vary_on_headers("HX-Request")
+@catalog_cache
+@condition(etag_func=catalog_etag)
+@replica_reads
+def home(request):
+    q, tag_ids, sort, cursor = catalog_params(request)
+    page_obj = home_paginator(q, tag_ids, sort).get_page(cursor)
+    context = catalog_context(page_obj, q, tag_ids, sort, request_tags(request))
+    return render_catalog(request, context)
 
-    if request.headers.get("HX-Request") == "true":
-        return render(request, "partials/_autograph_page.html", context)
 
-    return render(request, "home.html", context)
+@public_route
+@vary_on_headers("HX-Request")
+@catalog_cache
+@condition(etag_func=catalog_etag)
+@replica_reads
+def results(request):
+    q, tag_ids, sort, cursor = catalog_params(request)
+    matches = get_search_backend().search(q.casefold(), tag_ids) if q else None
+    page_obj = results_paginator(matches, q, tag_ids, sort).get_page(cursor)
+    context = catalog_context(page_obj, q, tag_ids, sort, results_tags(request, q))
+    return render_catalog(request, context)
+
+
+@public_route
+@vary_on_headers("HX-Request")
+@cache_control(public=True, max_age=settings.SUGGEST_MAX_AGE)
+def suggest(request):
+    """
+    Typeahead for the search box: name prefixes from an in-process table, no
+    queries once warm. JSON by default, ``<option>`` elements for HTMX.
+    """
+    try:
+        limit = max(1, min(int(request.GET.get("limit", SUGGEST_LIMIT)), SUGGEST_MAX_LIMIT))
+    except ValueError:
+        limit = SUGGEST_LIMIT
+
+    with perf.span("suggest"):
+        found = suggest_index.suggest(request.GET.get("q") or "", limit)
 
+    if request.headers.get("HX-Request") == "true":
+        return render(request, "partials/_suggestions.html", {"suggestions": found["autographs"]})
 
+    return JsonResponse({
+        kind: [{"id": s.id, "name": s.name} for s in suggestions]
+        for kind, suggestions in found.items()
+    })
 
 
+@public_route
+@cache_control(public=True, max_age=settings.STATIC_PAGE_MAX_AGE)
+@condition(etag_func=catalog_etag)
 def contact(request):
     return render(request, "contact.html")
 
 
+@public_route
+@cache_control(public=True, max_age=settings.STATIC_PAGE_MAX_AGE)
+@condition(etag_func=catalog_etag)
 def newsletter(request):
     return render(request, "newsletter.html")
 
 
+@public_route
+@catalog_cache
+@condition(etag_func=catalog_etag)
+@replica_reads
 def autograph_detail(request, pk):
-    autograph = get_object_or_404(Autograph, pk=pk)
-    site_settings = SiteSetting.get()
-    
-    return render(request, "detail.html", {
-        "autograph": autograph,
-        "shipping_cost_display": site_settings.shipping_cost_display,
-    })
\ No newline at end of file
+    autograph = get_object_or_404(Autograph.objects.prefetch_related("tags"), pk=pk)
+    return render_detail(request, autograph, SiteSetting.get())
\ No newline at end of file
@@ -0,0 +1,221 @@
+"""
+Start-up warming, so the first requests after a deploy cost what later ones
+do.
+
+``manage.py warm_catalog`` runs once per deploy. It writes the catalog
+snapshot and renders the first page of every sort, which fills the shared
+cache (tags, catalog fingerprint, card fragments). With ``WARM_ON_STARTUP``
+each web process then builds its search and suggest indexes from the
+snapshot and compiles the catalog templates in ``AppConfig.ready()``,
+without the queries that would otherwise take.
+
+The snapshot holds the rows those indexes are built from, tagged with the
+catalog version it was taken at. Each process unpickles the rows into its
+own indexes, so it saves the queries, not memory; the file is mapped only
+so a process reads just the sections it needs. It is used while the
+version still matches; otherwise processes query as before.
+
+With a per-process cache (locmem, file) every process starts its own
+version, which never matches the snapshot's. There the snapshot is checked
+against the database instead: the newest edit and number of autographs,
+and the tags, recorded when it was written. That costs two small queries
+once per catalog version rather than the full ones.
+"""
+import hashlib
+import json
+import logging
+import mmap
+import os
+import pickle
+import struct
+import threading
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.db import DatabaseError
+from django.template.loader import get_template
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+
+from . import catalog
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"autographs-snapshot-1\n"
+HEADER = struct.Struct("<I")
+
+# compiled in every process, see warm_process()
+TEMPLATES = (
+    "home.html",
+    "partials/_autograph_page.html",
+    "partials/_card.html",
+    "partials/_suggestions.html",
+    "detail.html",
+)
+
+
+class CatalogSnapshot:
+    """A snapshot file mapped read-only; the rows are unpickled on demand."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as fh:
+            self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a catalog snapshot")
+        start = len(MAGIC) + HEADER.size
+        (length,) = HEADER.unpack_from(self._map, len(MAGIC))
+        header = json.loads(self._map[start:start + length])
+        self.version = header["version"]
+        self.state = header["state"]
+        self._sections = header["sections"]
+        self._base = start + length
+
+    def _load(self, name: str) -> list:
+        offset, size = self._sections[name]
+        with memoryview(self._map) as view:
+            return pickle.loads(view[self._base + offset:self._base + offset + size])
+
+    def autographs(self) -> list[tuple]:
+        """``(id, name, name_norm, name_tokens, tag_ids)`` per autograph."""
+        return self._load("autographs")
+
+    def tags(self) -> list[tuple]:
+        """``(id, name)`` per tag."""
+        return self._load("tags")
+
+
+def snapshot_fingerprint() -> str:
+    """
+    What a snapshot is checked against under a per-process cache:
+    ``conditional.catalog_contents()``, hashed. Not cached, since the
+    cache can't be trusted across processes there.
+    """
+    from .conditional import catalog_contents
+
+    return hashlib.md5(repr(catalog_contents()).encode()).hexdigest()
+
+
+def write_snapshot(path: str) -> int:
+    """Write the current catalog to ``path``; returns the number of autographs."""
+    from .models import Autograph, Tag
+
+    # read before the rows so a concurrent edit makes the snapshot stale
+    version = catalog.version()
+    state = snapshot_fingerprint()
+    sections = {
+        "autographs": list(Autograph.objects.values_list("id", "name", "name_norm", "name_tokens", "tag_ids")),
+        "tags": list(Tag.objects.values_list("id", "name")),
+    }
+
+    blobs, offsets, offset = [], {}, 0
+    for name, rows in sections.items():
+        blob = pickle.dumps(rows, protocol=pickle.HIGHEST_PROTOCOL)
+        offsets[name] = (offset, len(blob))
+        offset += len(blob)
+        blobs.append(blob)
+    header = json.dumps({"version": version, "state": state, "sections": offsets}).encode()
+
+    # replaced, not rewritten, so processes holding the old map are unaffected
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(MAGIC + HEADER.pack(len(header)) + header)
+        for blob in blobs:
+            fh.write(blob)
+    os.replace(tmp, path)
+    return len(sections["autographs"])
+
+
+_lock = threading.Lock()
+# (file key, snapshot, local catalog version it was last found current at)
+_opened = (None, None, None)
+
+
+def current_snapshot(version: int) -> CatalogSnapshot | None:
+    """
+    The ``CATALOG_SNAPSHOT`` file if it was taken at catalog ``version`` or,
+    with a per-process cache, if the database still matches it.
+    """
+    global _opened
+
+    path = settings.CATALOG_SNAPSHOT
+    if not path:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        if _opened[0] != key:
+            try:
+                _opened = (key, CatalogSnapshot(path), None)
+            except (OSError, ValueError, KeyError) as exc:
+                logger.warning("Ignoring catalog snapshot %s: %s", path, exc)
+                _opened = (key, None, None)
+        _, snapshot, current_at = _opened
+        if snapshot is None:
+            return None
+        if version in (snapshot.version, current_at):
+            return snapshot
+        if settings.CACHE_BACKEND in settings.SHARED_CACHE_BACKENDS:
+            return None
+        try:
+            if snapshot.state != snapshot_fingerprint():
+                # edited since, for good
+                _opened = (key, None, None)
+                return None
+        except DatabaseError as exc:
+            logger.warning("Could not check catalog snapshot %s: %s", path, exc)
+            return None
+        _opened = (key, snapshot, version)
+        return snapshot
+
+
+def warm_process() -> bool:
+    """
+    Per-process warming for ``AppConfig.ready()``: compile the catalog
+    templates and, when the snapshot is current, build the search and
+    suggest indexes from it. Queries the database only to check the
+    snapshot under a per-process cache.
+    """
+    from .search import index as search_index
+    from .suggest import index as suggest_index
+
+    for name in TEMPLATES:
+        get_template(name)
+
+    snapshot = current_snapshot(catalog.version())
+    if snapshot is None:
+        return False
+    search_index.ensure_built()
+    suggest_index.snapshot()
+    return True
+
+
+def warm_pages() -> list[str]:
+    """
+    Render the first catalog page for every sort, full and HTMX, filling the
+    shared cache. Returns the URLs rendered.
+    """
+    from .pagination import SORT_KEYS
+
+    urls = []
+    for sort in SORT_KEYS:
+        url = reverse("home") + (f"?sort={sort}" if sort else "")
+        for htmx in (False, True):
+            render_page(url, htmx)
+        urls.append(url)
+    return urls
+
+
+def render_page(url: str, htmx: bool = False) -> bytes:
+    """The body ``url`` answers a plain (or HTMX) GET with, straight from its view."""
+    request = RequestFactory().get(url, headers={"HX-Request": "true"} if htmx else {})
+    match = resolve(request.path_info)
+    view = async_to_sync(match.func) if iscoroutinefunction(match.func) else match.func
+    response = view(request, *match.args, **match.kwargs)
+    if response.status_code != 200:
+        raise RuntimeError(f"{url} answered {response.status_code}")
+    return response.content
@@ -0,0 +1,26 @@
+"""
+Process pools for the management commands that spread work over CPUs
+(``run_workers``, ``build_renditions``, ``backfill_placeholders``,
+``build_static_catalog``).
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+
+
+def process_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    ``workers`` processes, each set up as a fresh Django process.
+
+    They are spawned rather than forked: a forked child inherits whatever
+    database connection the parent has open at the time, and the parent
+    keeps querying (claiming jobs) while the pool starts workers. Two
+    processes on one socket interleave protocol messages, and a child
+    closing it ends the parent's session.
+    """
+    return ProcessPoolExecutor(
+        max_workers=max(workers, 1),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=django.setup,
+    )
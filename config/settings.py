@@ -63,6 +63,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
 
     # 2FA (django-two-factor-auth + django-otp)
     "django_otp",
@@ -77,25 +78,35 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # first, so its total covers the rest of the stack (no-op unless enabled)
+    "autographs.middleware.PerformanceMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "django.contrib.sessions.middleware.SessionMiddleware",
+    # /static/ with precompressed variants, when SERVE_STATIC is on
+    "autographs.staticfiles.PrecompressedStaticMiddleware",
+    # flags public catalog GETs; the autographs.middleware versions of the
+    # session, CSRF, auth, messages and OTP middleware let those through
+    "autographs.middleware.PublicFastPathMiddleware",
+    "autographs.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
-    "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
-    "django.contrib.messages.middleware.MessageMiddleware",
+    "autographs.middleware.CsrfViewMiddleware",
+    "autographs.middleware.AuthenticationMiddleware",
+    "autographs.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 
     # 2FA
-    "django_otp.middleware.OTPMiddleware",
+    "autographs.middleware.OTPMiddleware",
 ]
 
+# Anonymous fast path for the public_route views (see autographs.middleware);
+# the admin and two-factor pages always get the full stack
+PUBLIC_FAST_PATH = env_bool("DJANGO_PUBLIC_FAST_PATH", default=True)
+
 ROOT_URLCONF = "config.urls"
 
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [BASE_DIR / "templates"],
-        "APP_DIRS": True,
         "OPTIONS": {
             "context_processors": [
                 "django.template.context_processors.request",
@@ -103,6 +114,14 @@ TEMPLATES = [
                 "django.contrib.messages.context_processors.messages",
                 "autographs.context_processors.header_filters",
             ],
+            # compiled once per process (and reloaded on change with DEBUG);
+            # spelled out so adding a loader can't silently drop the cache
+            "loaders": [
+                ("django.template.loaders.cached.Loader", [
+                    "django.template.loaders.filesystem.Loader",
+                    "django.template.loaders.app_directories.Loader",
+                ]),
+            ],
         },
     },
 ]
@@ -117,16 +136,66 @@ TWO_FACTOR_PATCH_ADMIN = True
 WSGI_APPLICATION = "config.wsgi.application"
 
 # Database (env-driven; works for both dev + prod)
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.postgresql",
-        "NAME": os.environ.get("POSTGRES_DB", "autographs_dev"),
-        "USER": os.environ.get("POSTGRES_USER", "autographs_user"),
-        "PASSWORD": os.environ.get("POSTGRES_PASSWORD", ""),
-        "HOST": os.environ.get("POSTGRES_HOST", "127.0.0.1"),
-        "PORT": os.environ.get("POSTGRES_PORT", "5432"),
+# DJANGO_DB_ENGINE=sqlite runs against a local file instead, e.g. for the test
+# suite and benchmarks in a sandbox without PostgreSQL.
+DB_ENGINE = os.getenv("DJANGO_DB_ENGINE", "postgresql").strip().lower()
+
+# Read replicas get the queries of the public catalog views, see
+# autographs.routers; admin, commands and writes always use "default".
+# Locally, SQLITE_REPLICAS=n adds n aliases on the same file to exercise that.
+# DJANGO_REPLICA_READS=0 sends everything to the primary again.
+DATABASE_ROUTERS = ["autographs.routers.ReplicaRouter"]
+REPLICA_READS = env_bool("DJANGO_REPLICA_READS", default=True)
+# Seconds after a catalog change during which those views read the primary;
+# keep it above the worst replication lag.
+REPLICA_LAG_WINDOW = float(os.getenv("DJANGO_REPLICA_LAG_WINDOW", "30"))
+
+if DB_ENGINE == "sqlite":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.getenv("SQLITE_PATH", str(BASE_DIR / "db.sqlite3")),
+        }
     }
-}
+    REPLICA_HOSTS = [None] * int(os.getenv("SQLITE_REPLICAS", "0"))
+else:
+    # Connection reuse: DJANGO_DB_POOL=1 hands each request a connection from
+    # psycopg's pool (needs psycopg-pool); otherwise a connection is kept for
+    # DJANGO_DB_CONN_MAX_AGE seconds. Reused connections are checked first.
+    DB_POOL = env_bool("DJANGO_DB_POOL", default=False)
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ.get("POSTGRES_DB", "autographs_dev"),
+            "USER": os.environ.get("POSTGRES_USER", "autographs_user"),
+            "PASSWORD": os.environ.get("POSTGRES_PASSWORD", ""),
+            "HOST": os.environ.get("POSTGRES_HOST", "127.0.0.1"),
+            "PORT": os.environ.get("POSTGRES_PORT", "5432"),
+            # Django refuses persistent connections on top of a pool
+            "CONN_MAX_AGE": 0 if DB_POOL else int(os.getenv("DJANGO_DB_CONN_MAX_AGE", "60")),
+            # also makes the pool check a connection before handing it out
+            "CONN_HEALTH_CHECKS": env_bool("DJANGO_DB_CONN_HEALTH_CHECKS", default=True),
+        }
+    }
+    if DB_POOL:
+        DATABASES["default"]["OPTIONS"] = {
+            "pool": {
+                "min_size": int(os.getenv("DJANGO_DB_POOL_MIN_SIZE", "2")),
+                "max_size": int(os.getenv("DJANGO_DB_POOL_MAX_SIZE", "10")),
+                "timeout": float(os.getenv("DJANGO_DB_POOL_TIMEOUT", "10")),
+            },
+        }
+    # "host" or "host:port", comma-separated; same database, user and options
+    REPLICA_HOSTS = [h.strip() for h in os.getenv("POSTGRES_REPLICA_HOSTS", "").split(",") if h.strip()]
+
+DATABASE_REPLICAS = []
+for number, host in enumerate(REPLICA_HOSTS, start=1):
+    replica = {**DATABASES["default"], "TEST": {"MIRROR": "default"}}
+    if host:
+        replica["HOST"], _, port = host.partition(":")
+        replica["PORT"] = port or replica["PORT"]
+    DATABASES[f"replica_{number}"] = replica
+    DATABASE_REPLICAS.append(f"replica_{number}")
 
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
@@ -152,6 +221,10 @@ if DEBUG:
 else:
     STATICFILES_DIRS = [BASE_DIR / "static"]
 
+# Let Django answer /static/ from STATIC_ROOT (precompressed, immutable
+# caching) when no front proxy does; runserver serves it itself in DEBUG
+SERVE_STATIC = env_bool("DJANGO_SERVE_STATIC", default=False)
+
 
 # Media + storage (default: local filesystem; prod can switch to DO Spaces)
 MEDIA_URL = "/media/"
@@ -174,7 +247,8 @@ DO_SPACES_CDN_DOMAIN = os.getenv("DO_SPACES_CDN_DOMAIN", "").strip()
 
 if DO_SPACES_BUCKET:
     STORAGES["default"] = {
-        "BACKEND": "storages.backends.s3.S3Storage",
+        # S3Storage with memoized public URLs, see autographs.storage
+        "BACKEND": "autographs.storage.SpacesStorage",
         "OPTIONS": {
             "access_key": os.getenv("DO_SPACES_KEY", ""),
             "secret_key": os.getenv("DO_SPACES_SECRET", ""),
@@ -185,6 +259,8 @@ if DO_SPACES_BUCKET:
             "default_acl": "public-read",
             "querystring_auth": False,
             "file_overwrite": False,
+            # image URLs point at the CDN, built without botocore
+            "custom_domain": DO_SPACES_CDN_DOMAIN.rstrip("/") or None,
         },
     }
 
@@ -195,6 +271,38 @@ if DO_SPACES_BUCKET:
         MEDIA_URL = f"{DO_SPACES_ENDPOINT_URL.rstrip('/')}/{DO_SPACES_BUCKET}/"
 
 
+# Cache (env-driven). Shared backends (db/memcached/redis) let every worker see
+# the same catalog version and fragments; locmem is the per-process default for
+# dev and tests. memcached needs pymemcache and redis needs redis-py.
+CACHE_BACKENDS = {
+    "locmem": ("django.core.cache.backends.locmem.LocMemCache", "autographs"),
+    "file": ("django.core.cache.backends.filebased.FileBasedCache", str(BASE_DIR / ".cache")),
+    "db": ("django.core.cache.backends.db.DatabaseCache", "django_cache"),  # needs `manage.py createcachetable`
+    "memcached": ("django.core.cache.backends.memcached.PyMemcacheCache", "127.0.0.1:11211"),
+    "redis": ("django.core.cache.backends.redis.RedisCache", "redis://127.0.0.1:6379/1"),
+    "dummy": ("django.core.cache.backends.dummy.DummyCache", ""),
+}
+
+SHARED_CACHE_BACKENDS = {"db", "memcached", "redis"}
+
+CACHE_BACKEND = os.getenv("DJANGO_CACHE_BACKEND", "locmem").strip().lower()
+if CACHE_BACKEND not in CACHE_BACKENDS:
+    raise RuntimeError(f"Unknown DJANGO_CACHE_BACKEND {CACHE_BACKEND!r}.")
+# The catalog version lives in the cache (autographs.catalog): with a
+# per-process cache, workers that didn't make an edit would never see it.
+if IS_PROD and CACHE_BACKEND not in SHARED_CACHE_BACKENDS:
+    raise RuntimeError("DJANGO_CACHE_BACKEND must be redis, memcached or db in production.")
+
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKENDS[CACHE_BACKEND][0],
+        "LOCATION": os.getenv("DJANGO_CACHE_LOCATION", "").strip() or CACHE_BACKENDS[CACHE_BACKEND][1],
+        "TIMEOUT": int(os.getenv("DJANGO_CACHE_TIMEOUT", "300")),
+        "KEY_PREFIX": os.getenv("DJANGO_CACHE_KEY_PREFIX", "autographs"),
+    }
+}
+
+
 # Production-only security (env-driven, safe defaults)
 if IS_PROD:
     # Required when you're behind a proxy (nginx/Cloudflare) so Django knows the original scheme was HTTPS
@@ -215,9 +323,10 @@ if IS_PROD:
     X_FRAME_OPTIONS = "DENY"
     REFERRER_POLICY = "same-origin"
 
-    # Good practice in prod so stale static files don’t get served
+    # Good practice in prod so stale static files don’t get served; also
+    # minifies CSS and writes .gz/.br siblings (see autographs.staticfiles)
     STORAGES["staticfiles"] = {
-        "BACKEND": "django.contrib.staticfiles.storage.ManifestStaticFilesStorage",
+        "BACKEND": "autographs.staticfiles.CompressedManifestStaticFilesStorage",
     }
 else:
     # In dev, keep these false unless you explicitly want them on
@@ -226,6 +335,59 @@ else:
     CSRF_COOKIE_SECURE = env_bool("DJANGO_CSRF_COOKIE_SECURE", default=False)
 
 
+# Route the catalog views (home, results, detail) to autographs.async_views;
+# only worth it when served by an ASGI server (config.asgi)
+ASYNC_VIEWS = env_bool("DJANGO_ASYNC_VIEWS", default=False)
+
+# "auto" ranks in PostgreSQL when it is the default database and falls back to
+# the in-memory RapidFuzz index otherwise; or a dotted path to a backend class
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "auto").strip() or "auto"
+# In-memory ranking of at least this many candidates (short, common queries)
+# is spread over SEARCH_RANK_WORKERS threads/processes; below 2 it never is
+SEARCH_PARALLEL_THRESHOLD = int(os.getenv("SEARCH_PARALLEL_THRESHOLD", "20000"))
+SEARCH_RANK_WORKERS = int(os.getenv("SEARCH_RANK_WORKERS", str(min(os.cpu_count() or 1, 4))))
+
+# Written by `manage.py warm_catalog` after a deploy. Web processes build their
+# search/suggest indexes from it (no queries) while the catalog version it was
+# taken at is current, or under a per-process cache while the database still
+# matches it (two small queries); with WARM_ON_STARTUP they do so as they start
+CATALOG_SNAPSHOT = os.getenv("DJANGO_CATALOG_SNAPSHOT", str(BASE_DIR / ".cache" / "catalog.snapshot")).strip()
+WARM_ON_STARTUP = env_bool("DJANGO_WARM_ON_STARTUP", default=False)
+
+# Store each card's HTML on the autograph (re-rendered whenever it changes) and
+# emit it as-is in the grid; `manage.py warm_catalog --cards` re-renders them
+# all, e.g. after a deploy that changes partials/_card.html
+CARD_HTML = env_bool("DJANGO_CARD_HTML", default=False)
+
+# `manage.py build_static_catalog` writes the public pages here for a CDN or
+# bucket to serve (see autographs.static_catalog)
+STATIC_CATALOG_DIR = os.getenv("DJANGO_STATIC_CATALOG_DIR", str(BASE_DIR / "static_catalog")).strip()
+
+# Background jobs (image renditions) are processed by `manage.py run_workers`.
+# Set TASKS_EAGER to run them in-process after commit instead, e.g. in dev.
+TASKS_EAGER = env_bool("TASKS_EAGER", default=False)
+
+# HTTP caching. RELEASE (e.g. a git sha) is folded into ETags so a deploy that
+# changes templates invalidates what browsers and proxies hold.
+RELEASE = os.getenv("DJANGO_RELEASE", "").strip()
+# catalog pages are always revalidated by browsers (ETag); shared caches such
+# as a CDN may reuse them for this many seconds
+CATALOG_SHARED_MAX_AGE = int(os.getenv("CATALOG_SHARED_MAX_AGE", "0"))
+# contact/newsletter change only on deploy
+STATIC_PAGE_MAX_AGE = int(os.getenv("STATIC_PAGE_MAX_AGE", str(60 * 60)))
+# /api/suggest/ answers are fetched on every keystroke; let browsers reuse them
+SUGGEST_MAX_AGE = int(os.getenv("SUGGEST_MAX_AGE", "60"))
+
+# Per-request instrumentation: Server-Timing header + one JSON log line with
+# SQL count/time and named spans (see autographs.middleware)
+PERF_INSTRUMENTATION = env_bool("PERF_INSTRUMENTATION", default=False)
+# share of instrumented requests run under cProfile (0..1); stats are kept for
+# those slower than the threshold
+PERF_PROFILE_SAMPLE_RATE = float(os.getenv("PERF_PROFILE_SAMPLE_RATE", "0"))
+PERF_PROFILE_THRESHOLD_MS = float(os.getenv("PERF_PROFILE_THRESHOLD_MS", "500"))
+PERF_PROFILE_DIR = os.getenv("PERF_PROFILE_DIR", str(BASE_DIR / "profiles"))
+
+
 
 LOGGING = {
     "version": 1,
@@ -238,5 +400,7 @@ LOGGING = {
         # This is where unhandled 500s get logged
         "django.request": {"handlers": ["console"], "level": "ERROR", "propagate": False},
         "django": {"handlers": ["console"], "level": "INFO"},
+        # PerformanceMiddleware timing lines (JSON)
+        "autographs.perf": {"handlers": ["console"], "level": "INFO", "propagate": False},
     },
 }
\ No newline at end of file
@@ -0,0 +1,128 @@
+// Header behaviour shared by every page: the filters menu (tags + sort) and
+// the mobile hamburger menu. Loaded with `defer`, so the DOM is ready.
+
+// Filters menu
+(function () {
+  const wrap = document.querySelector(".header-filters");
+  if (!wrap) return;
+
+  const btn = wrap.querySelector(".filters-btn");
+  const menu = wrap.querySelector(".filters-menu");
+  const form = wrap.closest("form");
+
+  const tagsClearBtn = wrap.querySelector(".filters-clear-tags");
+  const sortClearBtn = wrap.querySelector(".filters-clear-sort");
+
+  const submenuBtns = Array.from(wrap.querySelectorAll(".submenu-btn"));
+
+  function closeMenu() {
+    btn.setAttribute("aria-expanded", "false");
+    menu.hidden = true;
+    submenuBtns.forEach(b => collapseSubmenu(b));
+  }
+
+  function openMenu() {
+    btn.setAttribute("aria-expanded", "true");
+    menu.hidden = false;
+  }
+
+  function collapseSubmenu(subBtn) {
+    subBtn.setAttribute("aria-expanded", "false");
+    const panel = subBtn.closest(".filters-submenu")?.querySelector(".submenu-panel");
+    if (panel) panel.hidden = true;
+  }
+
+  function expandSubmenu(subBtn) {
+    subBtn.setAttribute("aria-expanded", "true");
+    const panel = subBtn.closest(".filters-submenu")?.querySelector(".submenu-panel");
+    if (panel) panel.hidden = false;
+  }
+
+  btn.addEventListener("click", (e) => {
+    e.stopPropagation();
+    const isOpen = btn.getAttribute("aria-expanded") === "true";
+    isOpen ? closeMenu() : openMenu();
+  });
+
+  menu.addEventListener("click", (e) => e.stopPropagation());
+
+  document.addEventListener("click", (e) => {
+    if (!wrap.contains(e.target)) closeMenu();
+  });
+
+  document.addEventListener("keydown", (e) => {
+    if (e.key === "Escape") closeMenu();
+  });
+
+  submenuBtns.forEach((subBtn) => {
+    subBtn.addEventListener("click", (e) => {
+      e.stopPropagation();
+      const isOpen = subBtn.getAttribute("aria-expanded") === "true";
+
+      submenuBtns.forEach(b => collapseSubmenu(b));
+      if (!isOpen) expandSubmenu(subBtn);
+    });
+  });
+
+  menu.addEventListener("change", (e) => {
+    const t = e.target;
+    if (!t) return;
+
+    if (t.matches('input[type="checkbox"][name="tags"]')) form.requestSubmit();
+    if (t.matches('input[type="radio"][name="sort"]')) form.requestSubmit();
+  });
+
+  if (tagsClearBtn) {
+    tagsClearBtn.addEventListener("click", () => {
+      menu.querySelectorAll('input[type="checkbox"][name="tags"]').forEach(cb => cb.checked = false);
+      form.requestSubmit();
+    });
+  }
+
+  if (sortClearBtn) {
+    sortClearBtn.addEventListener("click", () => {
+      menu.querySelectorAll('input[type="radio"][name="sort"]').forEach(rb => rb.checked = false);
+      form.requestSubmit();
+    });
+  }
+})();
+
+// Mobile hamburger menu
+(function () {
+  const root = document.querySelector(".header-more");
+  if (!root) return;
+
+  const btn = root.querySelector(".hamburger-btn");
+  const menu = root.querySelector(".hamburger-menu");
+
+  function close() {
+    btn.setAttribute("aria-expanded", "false");
+    menu.hidden = true;
+  }
+
+  function open() {
+    btn.setAttribute("aria-expanded", "true");
+    menu.hidden = false;
+  }
+
+  btn.addEventListener("click", (e) => {
+    e.stopPropagation();
+    const isOpen = btn.getAttribute("aria-expanded") === "true";
+    isOpen ? close() : open();
+  });
+
+  menu.addEventListener("click", (e) => e.stopPropagation());
+
+  document.addEventListener("click", (e) => {
+    if (!root.contains(e.target)) close();
+  });
+
+  document.addEventListener("keydown", (e) => {
+    if (e.key === "Escape") close();
+  });
+
+  // If resizing up to desktop, ensure menu closes
+  window.addEventListener("resize", () => {
+    if (window.matchMedia("(min-width: 721px)").matches) close();
+  });
+})();